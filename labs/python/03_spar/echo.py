@@ -58,9 +58,13 @@ class Echo:
     # === Stream processing ===
     @staticmethod
     async def stream_agent_async(updates):
-        """Stream and narrate agent updates using typed content classes."""
+        """Stream and narrate agent updates using typed content classes.
+
+        Returns the accumulated UsageDetails of the run (None if the server sent none).
+        """
         in_agent_line = False
         call_buffer = defaultdict(list)  # call_id -> list of partial args
+        total_usage = None
 
         async for update in updates:
             # Handle incremental text
@@ -166,6 +170,7 @@ class Echo:
                 elif isinstance(content, UsageContent):
                     usage_dict = content.to_dict(exclude={"raw_representation"}, exclude_none=True)
                     Echo.info(f"[USAGE] {json.dumps(usage_dict, ensure_ascii=False)}")
+                    total_usage = content.details if total_usage is None else total_usage + content.details
 
                 # ─────────────────────────────
                 # UNKNOWN
@@ -178,6 +183,13 @@ class Echo:
         if in_agent_line:
             print(Style.RESET_ALL)
 
+        if total_usage is not None:
+            Echo.info(
+                f"[USAGE TOTAL] in={total_usage.input_token_count or 0} "
+                f"out={total_usage.output_token_count or 0} total={total_usage.total_token_count or 0}"
+            )
+        return total_usage
+
 
     # === Helpers ===
     @staticmethod
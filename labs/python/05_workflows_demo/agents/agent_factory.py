@@ -1,70 +1,106 @@
 # agents/agent_factory.py
-from agent_framework.openai import OpenAIChatClient
-from .general_agent import build_general_agent
-from .summarizer_agent import build_summarizer_agent
-from .search_agent import build_search_agent
-from .fetch_agent import build_fetch_agent
-from .title_generator_agent import build_title_generator_agent
-from .pure_fetch_agent import build_pure_fetch_agent
-from .markdown_summarizer_agent import build_markdown_summarizer_agent
-from .research_aggregator_agent import build_research_aggregator_agent
-from .folder_manager_agent import build_folder_manager_agent
-from .collector_agent import build_collector_agent
-from .sys_exec_agent import build_sys_exec_agent
-from .file_organizer_agent import build_file_organizer_agent
-from .system_inspector_agent import build_system_inspector_agent
-from .dev_helper_agent import build_dev_helper_agent
-
-from config import OPENAI_API_BASE, OPENAI_API_KEY, MODEL_ID
+import importlib
+from typing import Callable
+
+from clients import build_chat_client, build_response_cache, wrap_for_agent
+
+# Builders are referenced as "module:function" and imported on first use, so
+# heavy tool modules (tools.system → psutil, GPUtil, pkg_resources) are only
+# loaded when an agent that needs them is actually requested.
+DEFAULT_AGENT_BUILDERS: dict[str, str] = {
+    "GeneralAgent": "general_agent:build_general_agent",
+    "SummarizerAgent": "summarizer_agent:build_summarizer_agent",
+    "SearchAgent": "search_agent:build_search_agent",
+    "QueryRewriterAgent": "query_rewriter_agent:build_query_rewriter_agent",
+    "FetchAgent": "fetch_agent:build_fetch_agent",
+    "TitleGeneratorAgent": "title_generator_agent:build_title_generator_agent",
+    "PureFetcherAgent": "pure_fetch_agent:build_pure_fetch_agent",
+    "MarkdownSummarizerAgent": "markdown_summarizer_agent:build_markdown_summarizer_agent",
+    "ResearchAggregatorAgent": "research_aggregator_agent:build_research_aggregator_agent",
+    "FolderManagerAgent": "folder_manager_agent:build_folder_manager_agent",
+    "CollectorAgent": "collector_agent:build_collector_agent",
+    "SysExecAgent": "sys_exec_agent:build_sys_exec_agent",
+    "FileOrganizerAgent": "file_organizer_agent:build_file_organizer_agent",
+    "SystemInspectorAgent": "system_inspector_agent:build_system_inspector_agent",
+    "DevHelperAgent": "dev_helper_agent:build_dev_helper_agent",
+}
 
 
 class AgentFactory:
     """
     Central registry and factory for all ChatAgents.
     Keeps model configuration consistent and allows discovery by name.
+
+    Agents are built lazily: the registry stores builders and constructs each
+    agent on its first `get()`. Use `warmup()` (or `init_defaults(warmup=True)`)
+    when every agent is needed up front, e.g. for DevUI registration.
     """
 
     def __init__(self):
-        self._client = OpenAIChatClient(
-            base_url=OPENAI_API_BASE,
-            api_key=OPENAI_API_KEY,
-            model_id=MODEL_ID,
-        )
+        # Plain OpenAIChatClient, or a load balancer when several endpoints are configured
+        self._client = build_chat_client()
+        # Optional response cache, applied per agent (LLM_CACHE_AGENTS / LLM_NEAR_DUP_AGENTS)
+        self._cache = build_response_cache()
+        self._builders: dict[str, Callable | str] = {}
         self._registry: dict[str, object] = {}
 
     # -------------------------------------------------------
     # Initialization
     # -------------------------------------------------------
-    def init_defaults(self):
-        builders = {
-            "GeneralAgent": build_general_agent,
-            "SummarizerAgent": build_summarizer_agent,
-            "SearchAgent": build_search_agent,
-            "FetchAgent": build_fetch_agent,
-            "TitleGeneratorAgent": build_title_generator_agent,
-            "PureFetcherAgent": build_pure_fetch_agent,
-            "MarkdownSummarizerAgent": build_markdown_summarizer_agent,
-            "ResearchAggregatorAgent": build_research_aggregator_agent,   
-            "FolderManagerAgent": build_folder_manager_agent,
-            "CollectorAgent": build_collector_agent,
-            "SysExecAgent": build_sys_exec_agent,
-            "FileOrganizerAgent": build_file_organizer_agent,
-            "SystemInspectorAgent": build_system_inspector_agent,
-            "DevHelperAgent": build_dev_helper_agent,
-        }
-        for name, builder in builders.items():
-            agent = builder(self._client)
-            self._registry[name] = agent
+    def init_defaults(self, warmup: bool = False):
+        for name, builder in DEFAULT_AGENT_BUILDERS.items():
+            self.register(name, builder)
+        if warmup:
+            self.warmup()
+        return self
+
+    def register(self, name: str, builder: Callable | str):
+        """Register a builder (callable or "module:function" inside `agents`)."""
+        self._builders[name] = builder
+        self._registry.pop(name, None)
+        return self
+
+    def warmup(self, names: list[str] | None = None):
+        """Build the given agents (all registered ones by default) ahead of time."""
+        for name in names or list(self._builders):
+            self.get(name)
         return self
 
     # -------------------------------------------------------
     # Access methods
     # -------------------------------------------------------
     def get(self, name: str):
+        agent = self._registry.get(name)
+        if agent is not None:
+            return agent
         try:
-            return self._registry[name]
+            builder = self._builders[name]
         except KeyError:
-            raise KeyError(f"Agent '{name}' not registered in factory. Available: {list(self._registry)}")
+            raise KeyError(f"Agent '{name}' not registered in factory. Available: {list(self._builders)}")
+        agent = self._resolve(builder)(self._client_for(name))
+        self._registry[name] = agent
+        return agent
 
     def all(self):
+        self.warmup()
         return list(self._registry.values())
+
+    def names(self) -> list[str]:
+        return list(self._builders)
+
+    def is_built(self, name: str) -> bool:
+        return name in self._registry
+
+    def cache_stats(self) -> dict | None:
+        return self._cache.stats() if self._cache else None
+
+    def _client_for(self, name: str):
+        return wrap_for_agent(self._client, name, self._cache)
+
+    @staticmethod
+    def _resolve(builder: Callable | str) -> Callable:
+        if callable(builder):
+            return builder
+        module_name, fn_name = builder.split(":")
+        module = importlib.import_module(f".{module_name}", package=__package__)
+        return getattr(module, fn_name)
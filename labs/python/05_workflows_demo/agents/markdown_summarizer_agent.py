@@ -14,4 +14,5 @@ def build_markdown_summarizer_agent(chat_client):
             " - Content must be in Markdown format with appropriate headings, lists, and code blocks.\n"
         ),
         chat_client=chat_client,
+        temperature=0.0,
     )
@@ -0,0 +1,14 @@
+# agents/query_rewriter_agent.py
+from agent_framework import ChatAgent
+
+def build_query_rewriter_agent(chat_client):
+    return ChatAgent(
+        name="QueryRewriterAgent",
+        description="Turns a research question into a short web search query.",
+        instructions=(
+            "Rewrite the given question or request as a single web search query of at most 10 words. "
+            "Keep names, versions and technical terms exactly as written; drop filler words. "
+            "Return ONLY the query on one line, without quotes, commentary or search operators."
+        ),
+        chat_client=chat_client,
+    )
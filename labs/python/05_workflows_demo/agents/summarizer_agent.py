@@ -7,4 +7,5 @@ def build_summarizer_agent(chat_client):
         description="Summarizes a conversation or text passage concisely.",
         instructions="Summarize the key points from the provided conversation or text, keeping meaning intact but concise.",
         chat_client=chat_client,
+        temperature=0.0,
     )
@@ -7,4 +7,5 @@ def build_title_generator_agent(chat_client):
         description="Generates short, descriptive titles summarizing input topics.",
         instructions="Create a concise, human-readable title summarizing the given text or conversation.",
         chat_client=chat_client,
+        temperature=0.0,
     )
@@ -0,0 +1,124 @@
+# benchmarks/checkpoint_policy_benchmark.py
+"""
+Checkpoint writes of wf07 (HITL) and wf08 under each checkpoint policy
+(workflows/checkpoint_policy.py).
+
+Agents are stubbed as in wf08_concurrency_benchmark.py (fixed latency,
+canned text, canned page fetches) and checkpoints go to an
+InMemoryCheckpointStorage, so only the policy changes between rows. The
+wf07 approval is answered "yes" by a scripted response source. Bytes are
+the JSON size of each saved checkpoint, i.e. what PostgresCheckpointStorage
+writes to maf_checkpoints.data (measured here whatever
+CHECKPOINT_MEASURE_BYTES says).
+
+Usage (from labs/python/05_workflows_demo):
+  python benchmarks/checkpoint_policy_benchmark.py
+  python benchmarks/checkpoint_policy_benchmark.py --policy every --policy every:3+expensive --latency 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agent_framework import AgentRunResponse, ChatMessage, InMemoryCheckpointStorage  # noqa: E402
+
+import workflows.wf07_search_with_hitl as wf07  # noqa: E402
+import workflows.wf08_search_with_multiagent_and_tooling as wf08  # noqa: E402
+from runners.hitl import FileResponses, HitlDriver, HitlState  # noqa: E402
+from workflows.checkpoint_policy import CheckpointPolicy, apply_checkpoint_policy, checkpoint_stats  # noqa: E402
+
+OUTPUT_DIR = tempfile.mkdtemp(prefix="ckpt_bench_")
+PAGE = "Agent Framework runs agents on local models through Docker Model Runner. " * 60
+
+CANNED = {
+    "TitleGeneratorAgent": "Agent Framework and Docker Model Runner",
+    "FolderManagerAgent": f"Created {OUTPUT_DIR}",
+    "SearchAgent": '["https://example.org/a", "https://example.org/b", "https://example.org/c"]',
+    "FetchAgent": PAGE,
+    "MarkdownSummarizerAgent": "# TL;DR\n\nCanned page summary.",
+    "ResearchAggregatorAgent": "Unified research summary.",
+}
+
+DEFAULT_POLICIES = ["every", "every:2", "hitl", "expensive", "interval:0.5", "every:3+expensive"]
+
+
+async def stub_fetch(url: str) -> str:
+    return f"Canned content of {url}. {PAGE}"
+
+
+class StubAgent:
+    def __init__(self, name: str, latency: float):
+        self.name = name
+        self.latency = latency
+
+    async def run(self, messages, **kwargs) -> AgentRunResponse:
+        await asyncio.sleep(self.latency)
+        return AgentRunResponse(messages=[ChatMessage(role="assistant", text=CANNED.get(self.name, "Canned summary."))])
+
+
+class StubAgentFactory:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def get(self, name: str) -> StubAgent:
+        return StubAgent(name, self.latency)
+
+
+def build(wf_id: str, latency: float):
+    factory, storage = StubAgentFactory(latency), InMemoryCheckpointStorage()
+    if wf_id == "07SearchHITL":
+        return wf07.build_search_with_hitl_workflow(factory, storage)
+    return wf08.build_search_with_multiagent_and_tooling_workflow(factory, storage)
+
+
+async def run_once(wf_id: str, policy: str, latency: float, answers: Path) -> dict:
+    key = f"{wf_id} {policy}"
+    checkpoint_stats.pop(key, None)
+    workflow = apply_checkpoint_policy(
+        build(wf_id, latency), CheckpointPolicy.parse(policy), stats_key=key, measure_bytes=True
+    )
+    t0 = time.perf_counter()
+    run = await HitlDriver(workflow, FileResponses(answers)).run("research query")
+    elapsed = time.perf_counter() - t0
+    if run.state == HitlState.FAILED:
+        raise RuntimeError(f"{key}: {run.error}")
+    return {"workflow": wf_id, "policy": policy, "elapsed_s": round(elapsed, 2), **checkpoint_stats[key].to_dict()}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Checkpoint write volume of wf07/wf08 under each checkpoint policy.")
+    parser.add_argument("--policy", action="append", help=f"Policy to measure (repeatable; default: {DEFAULT_POLICIES})")
+    parser.add_argument("--wf", action="append", choices=["07SearchHITL", "08MagSearchTools"])
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per stubbed LLM round trip")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    wf08.fetch_webpage = stub_fetch
+    answers = Path(OUTPUT_DIR) / "answers.json"
+    answers.write_text(json.dumps({"*": "yes"}), encoding="utf-8")
+
+    rows = []
+    for wf_id in args.wf or ["07SearchHITL", "08MagSearchTools"]:
+        for policy in args.policy or DEFAULT_POLICIES:
+            rows.append(await run_once(wf_id, policy, args.latency, answers))
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{'workflow':<17} {'policy':<18} {'saved':>5} {'skipped':>7} {'KB':>8} {'save s':>7} {'run s':>6}")
+    for r in rows:
+        print(
+            f"{r['workflow']:<17} {r['policy']:<18} {r['saved']:>5} {r['skipped']:>7} "
+            f"{r['kb_written'] if r['kb_written'] is not None else '-':>8} {r['save_s']:>7} {r['elapsed_s']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
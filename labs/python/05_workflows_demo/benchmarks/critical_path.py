@@ -0,0 +1,100 @@
+# benchmarks/critical_path.py
+"""
+Critical path of every registered workflow, and what parallelizing
+independent sequential executors would save (workflows/graph_analysis.py).
+
+Executor costs are the mean `executor_time_s` of recorded runs (written by
+console.py / batch / worker runs with USAGE_TRACKING on). Without recorded
+runs every agent executor counts as one unit (one LLM round trip).
+
+Workflows are only built, never run: no MCP gateway or model server is
+needed, only the agent configuration.
+
+Usage (from labs/python/05_workflows_demo):
+  python benchmarks/critical_path.py
+  python benchmarks/critical_path.py --usage-dir checkpoints/usage
+  python benchmarks/critical_path.py --postgres --runs 200 --json
+  python benchmarks/critical_path.py --wf 08MagSearchTools --wf08-sequential
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agent_framework import InMemoryCheckpointStorage  # noqa: E402
+
+from agents import AgentFactory  # noqa: E402
+from workflows.graph_analysis import analyze, executor_timings  # noqa: E402
+from workflows.wf08_search_with_multiagent_and_tooling import (  # noqa: E402
+    build_search_with_multiagent_and_tooling_workflow,
+)
+from workflows.workflow_factory import WorkflowFactory  # noqa: E402
+
+
+def load_usage_dir(path: Path) -> list[dict]:
+    return [json.loads(p.read_text(encoding="utf-8")) for p in sorted(path.glob("*.json"))]
+
+
+async def load_postgres(runs: int) -> list[dict]:
+    from persistence.checkpoint_storage_factory import CheckpointStorageFactory
+
+    storage = await CheckpointStorageFactory().init_postgres()
+    try:
+        return await storage.list_run_usage(limit=runs)
+    finally:
+        await storage.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Critical-path analysis of the registered workflows.")
+    parser.add_argument("--wf", action="append", help="Workflow ID to analyze (repeatable; default: all)")
+    parser.add_argument("--usage-dir", type=Path, help="Directory of run usage JSON files (FileCheckpointStorage/usage)")
+    parser.add_argument("--postgres", action="store_true", help="Read recorded runs from maf_run_usage")
+    parser.add_argument("--runs", type=int, default=100, help="Most recent runs to average (with --postgres)")
+    parser.add_argument("--wf08-sequential", action="store_true",
+                        help="Analyze wf08 as the strictly sequential chain (concurrent_stages=False)")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of text")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    summaries: list[dict] = []
+    if args.usage_dir:
+        summaries += load_usage_dir(args.usage_dir)
+    if args.postgres:
+        summaries += await load_postgres(args.runs)
+    timings = executor_timings(summaries)
+
+    storage = InMemoryCheckpointStorage()
+    wf_factory = WorkflowFactory(AgentFactory().init_defaults(), storage).init_defaults()
+    if args.wf08_sequential:
+        wf_factory.register(
+            "08MagSearchTools",
+            lambda: build_search_with_multiagent_and_tooling_workflow(
+                wf_factory._agent_factory, storage, concurrent_stages=False
+            ),
+        )
+
+    reports = []
+    for wf_id in args.wf or wf_factory.ids():
+        try:
+            workflow = wf_factory.get(wf_id)
+        except Exception as e:
+            print(f"== {wf_id} ==\ncould not build: {e}\n", file=sys.stderr)
+            continue
+        reports.append(analyze(workflow, timings.get(wf_id)))
+
+    if args.json:
+        print(json.dumps([r.to_dict() for r in reports], indent=2))
+        return
+    print(f"{len(summaries)} recorded run(s) used for timings\n")
+    for report in reports:
+        print(report.format() + "\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
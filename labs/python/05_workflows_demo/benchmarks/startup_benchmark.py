@@ -0,0 +1,95 @@
+# benchmarks/startup_benchmark.py
+"""
+Import-time and startup-time benchmark for the console and DevUI entry points.
+
+Each scenario runs in a fresh interpreter so module caches do not hide import
+costs. No MCP gateway, Postgres or model server is needed: checkpointing uses
+InMemoryCheckpointStorage and no agent is ever run.
+
+Usage (from labs/python/05_workflows_demo):
+  python benchmarks/startup_benchmark.py
+  python benchmarks/startup_benchmark.py --repeat 10 --wf 01BSequence
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+LAB_ROOT = Path(__file__).resolve().parent.parent
+
+# Each snippet prints a JSON dict with at least {"seconds": ...}
+IMPORT_SNIPPET = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - t0, "modules": len(sys.modules),
+                   "tools.system": "tools.system" in sys.modules}}))
+"""
+
+STARTUP_SNIPPET = """
+import asyncio, json, sys, time
+t0 = time.perf_counter()
+from agent_framework import InMemoryCheckpointStorage
+from agents import AgentFactory
+from workflows.workflow_factory import WorkflowFactory
+
+agents = AgentFactory().init_defaults(warmup={warmup})
+wf_factory = WorkflowFactory(agents, InMemoryCheckpointStorage()).init_defaults()
+{build}
+print(json.dumps({{"seconds": time.perf_counter() - t0, "modules": len(sys.modules),
+                   "tools.system": "tools.system" in sys.modules,
+                   "agents_built": sum(agents.is_built(n) for n in agents.names())}}))
+"""
+
+SCENARIOS = {
+    "import main": lambda args: IMPORT_SNIPPET.format(module="main"),
+    "import console": lambda args: IMPORT_SNIPPET.format(module="console"),
+    "console startup (lazy)": lambda args: STARTUP_SNIPPET.format(
+        warmup=False, build=f"wf_factory.get({args.wf!r})"
+    ),
+    "devui startup (warmup)": lambda args: STARTUP_SNIPPET.format(
+        warmup=True, build="wf_factory.all()"
+    ),
+}
+
+
+def run_once(code: str) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=LAB_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "failed")
+    # loggers write to stderr; the JSON result is the last stdout line
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import and startup time of main.py / console.py.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per scenario (fresh interpreter each)")
+    parser.add_argument("--wf", default="01BSequence", help="Workflow ID for the console scenario")
+    args = parser.parse_args()
+
+    print(f"{'scenario':<26} {'median':>9} {'min':>9} {'modules':>8} {'tools.system':>13} {'agents':>7}")
+    for name, make_code in SCENARIOS.items():
+        code = make_code(args)
+        try:
+            runs = [run_once(code) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{name:<26} failed: {e}")
+            continue
+        seconds = [r["seconds"] for r in runs]
+        last = runs[-1]
+        print(
+            f"{name:<26} {statistics.median(seconds) * 1000:>7.0f}ms {min(seconds) * 1000:>7.0f}ms "
+            f"{last['modules']:>8} {str(last['tools.system']):>13} {str(last.get('agents_built', '-')):>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# benchmarks/wf08_concurrency_benchmark.py
+"""
+End-to-end latency of wf08 with concurrent stages vs. the sequential chain.
+
+Agents are stubbed: every `agent.run()` sleeps for a fixed "LLM round trip"
+and returns canned text, and page fetches return canned text instantly, so
+the numbers isolate the graph shape. No MCP gateway, Postgres or model
+server is needed. Collected Markdown files go to a temporary folder.
+
+Sequential:  title → folder → search → collector → summarizer   (5 round trips)
+Concurrent:  (title → folder) ∥ search → collector → summarizer (4 round trips)
+
+The collector summarizes the 3 canned URLs in parallel (COLLECT_MAX_CONCURRENCY
+≥ 3 keeps that stage at one round trip).
+
+Usage (from labs/python/05_workflows_demo):
+  python benchmarks/wf08_concurrency_benchmark.py
+  python benchmarks/wf08_concurrency_benchmark.py --latency 0.5 --repeat 5
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agent_framework import AgentRunResponse, ChatMessage, InMemoryCheckpointStorage, WorkflowOutputEvent  # noqa: E402
+
+import workflows.wf08_search_with_multiagent_and_tooling as wf08  # noqa: E402
+
+OUTPUT_DIR = tempfile.mkdtemp(prefix="wf08_bench_")
+
+CANNED = {
+    "TitleGeneratorAgent": "Agent Framework and Docker Model Runner",
+    "FolderManagerAgent": f"Created {OUTPUT_DIR}",
+    "SearchAgent": "https://example.org/a https://example.org/b https://example.org/c",
+    "MarkdownSummarizerAgent": "# TL;DR\n\nCanned page summary.",
+    "ResearchAggregatorAgent": "Unified research summary.",
+}
+
+
+async def stub_fetch(url: str) -> str:
+    return f"Canned content of {url}."
+
+
+class StubAgent:
+    def __init__(self, name: str, latency: float):
+        self.name = name
+        self.latency = latency
+
+    async def run(self, messages, **kwargs) -> AgentRunResponse:
+        await asyncio.sleep(self.latency)
+        return AgentRunResponse(messages=[ChatMessage(role="assistant", text=CANNED[self.name])])
+
+
+class StubAgentFactory:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def get(self, name: str) -> StubAgent:
+        return StubAgent(name, self.latency)
+
+
+async def run_once(concurrent: bool, latency: float) -> float:
+    wf = wf08.build_search_with_multiagent_and_tooling_workflow(
+        StubAgentFactory(latency), InMemoryCheckpointStorage(), concurrent_stages=concurrent
+    )
+    t0 = time.perf_counter()
+    outputs = [e async for e in wf.run_stream("research query") if isinstance(e, WorkflowOutputEvent)]
+    elapsed = time.perf_counter() - t0
+    if not outputs:
+        raise RuntimeError("workflow produced no output")
+    return elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compare sequential vs concurrent wf08 graphs with stubbed agents.")
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds per stubbed LLM round trip")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    wf08.fetch_webpage = stub_fetch
+
+    results = {}
+    for label, concurrent in (("sequential", False), ("concurrent", True)):
+        runs = [await run_once(concurrent, args.latency) for _ in range(args.repeat)]
+        results[label] = statistics.median(runs)
+        print(f"{label:<12} median {results[label]:.2f}s  ({results[label] / args.latency:.1f} round trips)")
+
+    saved = results["sequential"] - results["concurrent"]
+    print(f"saved        {saved:.2f}s  ({saved / args.latency:.1f} round trips)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
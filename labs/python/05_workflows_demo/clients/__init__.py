@@ -0,0 +1,28 @@
+# clients/__init__.py
+from .load_balanced_chat_client import LoadBalancedChatClient
+from .response_cache import ResponseCache
+from .near_duplicate_cache import NearDuplicateIndex
+from .cached_chat_client import CachePolicy, CachingChatClient
+from .usage_tracking_chat_client import UsageTrackingChatClient
+from .hedged_chat_client import HedgingChatClient
+from .replay import ReplayChatClient, ReplayMCPClient, RunTape, configure_tape, current_tape, taped_mcp_client
+from .chat_client_factory import build_chat_client, build_response_cache, wrap_for_agent
+
+__all__ = [
+    "LoadBalancedChatClient",
+    "ResponseCache",
+    "NearDuplicateIndex",
+    "CachePolicy",
+    "CachingChatClient",
+    "UsageTrackingChatClient",
+    "HedgingChatClient",
+    "ReplayChatClient",
+    "ReplayMCPClient",
+    "RunTape",
+    "configure_tape",
+    "current_tape",
+    "taped_mcp_client",
+    "build_chat_client",
+    "build_response_cache",
+    "wrap_for_agent",
+]
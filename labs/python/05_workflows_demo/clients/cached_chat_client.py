@@ -0,0 +1,228 @@
+# clients/cached_chat_client.py
+"""
+Chat client wrapper that answers byte-identical requests from a ResponseCache.
+
+Only requests that are safe to replay are cached (see CachePolicy):
+  - sampling must be deterministic enough (temperature <= limit). Unset
+    temperature means the server's default sampling and is not cached
+    unless `cache_unset_temperature` says otherwise,
+  - turns that run tools are not stored: their value is usually the side
+    effect (files written), not the text. Agents whose tools are read-only
+    (search) can opt in with `cache_tool_turns`; only the final text answer
+    is stored then,
+  - requests continuing a tool loop (function results in the history) are
+    passed straight through.
+
+An optional NearDuplicateIndex answers prompts that differ from a cached
+one only in wording/casing/whitespace (see near_duplicate_cache.py).
+
+Streamed hits are replayed as ChatResponseUpdates: the cached contents first,
+then a single UsageContent carrying the recorded token counts, so
+`ChatResponse.from_chat_response_updates()` rebuilds the same usage the
+original call reported. Replayed responses/updates carry
+`additional_properties["cache_hit"] = True`.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, AsyncIterable
+
+from agent_framework import (
+    ChatMessage,
+    ChatOptions,
+    ChatResponse,
+    ChatResponseUpdate,
+    FunctionCallContent,
+    FunctionResultContent,
+    UsageContent,
+)
+
+from .near_duplicate_cache import NearDuplicateIndex
+from .response_cache import ResponseCache, cache_key
+
+logger = logging.getLogger("maf.clients.cache")
+
+_TOOL_CONTENTS = (FunctionCallContent, FunctionResultContent)
+
+
+@dataclass
+class CachePolicy:
+    # Requests with a temperature above this are treated as non-deterministic
+    max_temperature: float = 0.0
+    # Unset temperature means "server default" (usually sampled): cached only when allowed
+    cache_unset_temperature: bool = False
+    # Store the final answer of turns that called (read-only) tools
+    cache_tool_turns: bool = False
+
+    def allows_request(self, messages: list[ChatMessage], options: ChatOptions | None) -> bool:
+        temperature = options.temperature if options else None
+        if temperature is None:
+            if not self.cache_unset_temperature:
+                return False
+        elif temperature > self.max_temperature:
+            return False
+        return not _has_tool_contents(messages)
+
+    def allows_response(self, response: ChatResponse) -> bool:
+        if not response.text:
+            return False
+        return self.cache_tool_turns or not _has_tool_contents(response.messages)
+
+
+def _has_tool_contents(messages: list[ChatMessage]) -> bool:
+    return any(isinstance(c, _TOOL_CONTENTS) for m in messages for c in m.contents)
+
+
+def _as_messages(messages: Any) -> list[ChatMessage]:
+    if isinstance(messages, str):
+        return [ChatMessage(role="user", text=messages)]
+    if isinstance(messages, ChatMessage):
+        return [messages]
+    return [m if isinstance(m, ChatMessage) else ChatMessage(role="user", text=str(m)) for m in messages]
+
+
+def response_updates(response: ChatResponse, flags: dict[str, Any]) -> list[ChatResponseUpdate]:
+    """A stored response as stream updates, usage last, each carrying `flags`."""
+    updates = [
+        ChatResponseUpdate(
+            role=message.role,
+            contents=list(message.contents),
+            author_name=message.author_name,
+            response_id=response.response_id,
+            message_id=message.message_id,
+            model_id=response.model_id,
+            additional_properties=flags,
+        )
+        for message in response.messages
+    ]
+    if response.usage_details is not None:
+        updates.append(
+            ChatResponseUpdate(
+                role="assistant",
+                contents=[UsageContent(details=response.usage_details)],
+                response_id=response.response_id,
+                model_id=response.model_id,
+                additional_properties=flags,
+            )
+        )
+    return updates
+
+
+def _final_answer(response: ChatResponse) -> ChatResponse:
+    """Drop tool calls/results so a replay never looks like it ran tools again."""
+    if not _has_tool_contents(response.messages):
+        return response
+    messages = [
+        ChatMessage(
+            role=m.role,
+            contents=[c for c in m.contents if not isinstance(c, _TOOL_CONTENTS)],
+            author_name=m.author_name,
+        )
+        for m in response.messages
+    ]
+    return ChatResponse(
+        messages=[m for m in messages if m.contents],
+        response_id=response.response_id,
+        model_id=response.model_id,
+        usage_details=response.usage_details,
+    )
+
+
+class CachingChatClient:
+    """ChatClientProtocol wrapper adding exact-match and near-duplicate response caching."""
+
+    def __init__(
+        self,
+        inner,
+        cache: ResponseCache | None,
+        policy: CachePolicy | None = None,
+        agent_name: str | None = None,
+        near_duplicates: NearDuplicateIndex | None = None,
+    ):
+        self.inner = inner
+        self.cache = cache
+        self.near_duplicates = near_duplicates
+        self.policy = policy or CachePolicy()
+        self.agent_name = agent_name
+        self.model_id = getattr(inner, "model_id", None)
+        self.additional_properties: dict[str, Any] = {}
+
+    # -------------------------------------------------------
+    # ChatClientProtocol
+    # -------------------------------------------------------
+    async def get_response(self, messages, *, chat_options: ChatOptions | None = None, **kwargs: Any) -> ChatResponse:
+        key = self._key_for(messages, chat_options)
+        if key is None:
+            return await self.inner.get_response(messages, chat_options=chat_options, **kwargs)
+
+        cached = await self._lookup(key, messages, chat_options)
+        if cached is not None:
+            response = ChatResponse.from_dict(cached)
+            response.additional_properties = {**(response.additional_properties or {}), "cache_hit": True}
+            return response
+
+        response = await self.inner.get_response(messages, chat_options=chat_options, **kwargs)
+        await self._store(key, messages, chat_options, response)
+        return response
+
+    async def get_streaming_response(
+        self, messages, *, chat_options: ChatOptions | None = None, **kwargs: Any
+    ) -> AsyncIterable[ChatResponseUpdate]:
+        key = self._key_for(messages, chat_options)
+        if key is None:
+            async for update in self.inner.get_streaming_response(messages, chat_options=chat_options, **kwargs):
+                yield update
+            return
+
+        cached = await self._lookup(key, messages, chat_options)
+        if cached is not None:
+            for update in response_updates(ChatResponse.from_dict(cached), {"cache_hit": True}):
+                yield update
+            return
+
+        updates: list[ChatResponseUpdate] = []
+        async for update in self.inner.get_streaming_response(messages, chat_options=chat_options, **kwargs):
+            updates.append(update)
+            yield update
+        # Only reached when the stream completed: partial streams are never stored
+        await self._store(key, messages, chat_options, ChatResponse.from_chat_response_updates(updates))
+
+    # -------------------------------------------------------
+    # Helpers
+    # -------------------------------------------------------
+    def _key_for(self, messages, chat_options: ChatOptions | None) -> str | None:
+        messages = _as_messages(messages)
+        if not self.policy.allows_request(messages, chat_options):
+            return None
+        return cache_key(messages, chat_options, self.model_id)
+
+    async def _lookup(self, key: str, messages, chat_options: ChatOptions | None) -> dict | None:
+        if self.cache is not None:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                logger.info("[%s] LLM cache hit %s", self.agent_name, key[:12])
+                return cached
+        if self.near_duplicates is not None:
+            hit = self.near_duplicates.lookup(_as_messages(messages), chat_options, self.model_id)
+            if hit is not None:
+                logger.info(
+                    "[%s] LLM near-duplicate hit (similarity %.2f) for %r",
+                    self.agent_name, hit.similarity, hit.matched_prompt[:60],
+                )
+                return hit.value
+        return None
+
+    async def _store(self, key: str, messages, chat_options: ChatOptions | None, response: ChatResponse) -> None:
+        if not self.policy.allows_response(response):
+            logger.debug("[%s] response not cacheable (tool call or empty)", self.agent_name)
+            return
+        value = _final_answer(response).to_dict(exclude={"raw_representation"})
+        if self.near_duplicates is not None:
+            self.near_duplicates.add(_as_messages(messages), chat_options, value, self.model_id)
+        if self.cache is None:
+            return
+        try:
+            await self.cache.put(key, value, agent=self.agent_name)
+        except Exception as e:
+            # A broken cache must never fail the agent run
+            logger.warning("[%s] could not store LLM response: %s", self.agent_name, e)
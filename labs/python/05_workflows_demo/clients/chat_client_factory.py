@@ -0,0 +1,140 @@
+# clients/chat_client_factory.py
+from agent_framework.openai import OpenAIChatClient
+
+from config import (
+    LLM_CACHE,
+    LLM_CACHE_AGENTS,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_MAX_TEMPERATURE,
+    LLM_CACHE_PATH,
+    LLM_CACHE_TOOL_AGENTS,
+    LLM_CACHE_TTL_SECONDS,
+    LLM_CACHE_UNSET_TEMPERATURE,
+    LLM_HEDGE_AGENTS,
+    LLM_HEDGE_INITIAL_DELAY_SECONDS,
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_HEDGE_PERCENTILE,
+    LLM_NEAR_DUP_AGENTS,
+    LLM_NEAR_DUP_MAX_ENTRIES,
+    LLM_NEAR_DUP_NUM_PERM,
+    LLM_NEAR_DUP_THRESHOLD,
+    MODEL_ID,
+    OPENAI_API_BASE,
+    OPENAI_API_BASES,
+    OPENAI_API_KEY,
+    OPENAI_ENDPOINT_EJECTION_SECONDS,
+    OPENAI_ENDPOINT_FAILURE_THRESHOLD,
+    OPENAI_ENDPOINT_MAX_CONCURRENCY,
+    USAGE_TRACKING,
+)
+from logger import get_logger
+from .cached_chat_client import CachePolicy, CachingChatClient
+from .hedged_chat_client import HedgingChatClient
+from .load_balanced_chat_client import LoadBalancedChatClient, parse_endpoints
+from .near_duplicate_cache import NearDuplicateIndex
+from .replay import ReplayChatClient, current_tape
+from .response_cache import ResponseCache
+from .usage_tracking_chat_client import UsageTrackingChatClient
+
+logger = get_logger("maf.clients")
+
+
+def build_chat_client():
+    """
+    Build the chat client shared by all agents.
+
+    A single endpoint (OPENAI_API_BASE) gives a plain OpenAIChatClient.
+    When OPENAI_API_BASES lists several endpoints, or a concurrency cap is
+    configured, requests go through a LoadBalancedChatClient instead.
+    """
+    endpoints = parse_endpoints(OPENAI_API_BASES, OPENAI_ENDPOINT_MAX_CONCURRENCY)
+    if not endpoints:
+        endpoints = [(OPENAI_API_BASE, OPENAI_ENDPOINT_MAX_CONCURRENCY)]
+
+    if len(endpoints) == 1 and endpoints[0][1] <= 0:
+        return OpenAIChatClient(
+            base_url=endpoints[0][0],
+            api_key=OPENAI_API_KEY,
+            model_id=MODEL_ID,
+        )
+
+    logger.info(f"⚖️ Load balancing over {len(endpoints)} endpoint(s): {[url for url, _ in endpoints]}")
+    return LoadBalancedChatClient(
+        endpoints,
+        api_key=OPENAI_API_KEY,
+        model_id=MODEL_ID,
+        failure_threshold=OPENAI_ENDPOINT_FAILURE_THRESHOLD,
+        ejection_seconds=OPENAI_ENDPOINT_EJECTION_SECONDS,
+    )
+
+
+def _csv(value: str) -> set[str]:
+    return {item.strip() for item in value.split(",") if item.strip()}
+
+
+def build_response_cache() -> ResponseCache | None:
+    """Shared response cache configured by LLM_CACHE (off | memory | sqlite)."""
+    if LLM_CACHE in ("", "off", "0", "false"):
+        return None
+    sqlite_path = LLM_CACHE_PATH if LLM_CACHE == "sqlite" else None
+    logger.info(f"🗄️ LLM response cache enabled ({LLM_CACHE}) for: {sorted(_csv(LLM_CACHE_AGENTS))}")
+    return ResponseCache(
+        max_entries=LLM_CACHE_MAX_ENTRIES,
+        sqlite_path=sqlite_path,
+        ttl_seconds=LLM_CACHE_TTL_SECONDS,
+    )
+
+
+def wrap_for_agent(client, agent_name: str, cache: ResponseCache | None):
+    """
+    Per-agent view of the shared client. Adds the exact-match cache when the
+    agent is listed in LLM_CACHE_AGENTS, a near-duplicate (MinHash) tier when
+    it is listed in LLM_NEAR_DUP_AGENTS, and usage tracking (outermost) when
+    USAGE_TRACKING is on. Agents listed in LLM_HEDGE_AGENTS get hedged
+    requests right above the shared client. With a record/replay tape
+    configured, the tape sits under everything else, in place of the model
+    server, and the caches are bypassed: a cache hit would keep a call off
+    the tape when recording.
+    """
+    tape = current_tape()
+    if agent_name in _csv(LLM_HEDGE_AGENTS) and (tape is None or tape.mode == "record"):
+        client = HedgingChatClient(
+            client,
+            agent_name=agent_name,
+            percentile=LLM_HEDGE_PERCENTILE,
+            initial_delay=LLM_HEDGE_INITIAL_DELAY_SECONDS,
+            min_samples=LLM_HEDGE_MIN_SAMPLES,
+        )
+        logger.info(f"🏁 Hedged requests for {agent_name} (p{LLM_HEDGE_PERCENTILE:g})")
+    if tape is not None:
+        client = ReplayChatClient(client, tape, agent_name=agent_name)
+    else:
+        client = _with_cache(client, agent_name, cache)
+    if USAGE_TRACKING:
+        client = UsageTrackingChatClient(client, agent_name=agent_name)
+    return client
+
+
+def _with_cache(client, agent_name: str, cache: ResponseCache | None):
+    exact = cache if agent_name in _csv(LLM_CACHE_AGENTS) else None
+    near = None
+    if agent_name in _csv(LLM_NEAR_DUP_AGENTS):
+        near = NearDuplicateIndex(
+            threshold=LLM_NEAR_DUP_THRESHOLD,
+            num_perm=LLM_NEAR_DUP_NUM_PERM,
+            max_entries=LLM_NEAR_DUP_MAX_ENTRIES,
+        )
+        logger.info(f"🔁 Near-duplicate cache for {agent_name} (threshold {LLM_NEAR_DUP_THRESHOLD})")
+    if exact is None and near is None:
+        return client
+    return CachingChatClient(
+        client,
+        exact,
+        CachePolicy(
+            max_temperature=LLM_CACHE_MAX_TEMPERATURE,
+            cache_unset_temperature=LLM_CACHE_UNSET_TEMPERATURE,
+            cache_tool_turns=agent_name in _csv(LLM_CACHE_TOOL_AGENTS),
+        ),
+        agent_name=agent_name,
+        near_duplicates=near,
+    )
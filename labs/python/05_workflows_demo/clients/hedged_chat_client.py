@@ -0,0 +1,165 @@
+# clients/hedged_chat_client.py
+"""
+Hedged requests for short, idempotent agents (title generation,
+classification).
+
+Most calls of such an agent finish in about the same time; the slow tail
+comes from the request, not the prompt: a busy slot, a long queue on one
+endpoint, a generation that rambles. When a call is still running after
+the agent's p-th latency percentile, a duplicate is sent; whichever answer
+arrives first is used and the other request is cancelled.
+
+The duplicate goes through the shared client like any request, so behind a
+LoadBalancedChatClient it lands on the least loaded endpoint (the first
+request still holds its slot there); with a single server it takes another
+slot of that server (llama.cpp --parallel, vLLM batching).
+
+Percentiles come from the agent's own recent latencies; until `min_samples`
+calls were seen, `initial_delay` is used. Streams are hedged on the first
+update only: once one stream produced output, it is the one the caller
+gets. Requests carrying tools are never duplicated, since the tool loop
+runs inside the chat client and would run tools twice.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, AsyncIterable, Awaitable, Callable
+
+from agent_framework import ChatOptions, ChatResponse, ChatResponseUpdate
+
+logger = logging.getLogger("maf.clients.hedging")
+
+# Agent name → {"requests", "hedged", "hedge_won"}
+hedge_stats: dict[str, dict[str, int]] = {}
+
+
+class LatencyWindow:
+    """The last `size` call latencies of one agent."""
+
+    def __init__(self, size: int = 100):
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> float:
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+
+class HedgingChatClient:
+    """ChatClientProtocol wrapper issuing a duplicate request past the latency percentile."""
+
+    def __init__(
+        self,
+        inner,
+        agent_name: str | None = None,
+        percentile: float = 95.0,
+        initial_delay: float = 5.0,
+        min_samples: int = 20,
+        window: int = 100,
+    ):
+        self.inner = inner
+        self.agent_name = agent_name
+        self.model_id = getattr(inner, "model_id", None)
+        self.additional_properties: dict[str, Any] = {}
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self.latencies = LatencyWindow(window)
+        self.stats = hedge_stats.setdefault(agent_name or "-", {"requests": 0, "hedged": 0, "hedge_won": 0})
+
+    def hedge_delay(self) -> float:
+        if len(self.latencies) < self.min_samples:
+            return self.initial_delay
+        return self.latencies.percentile(self.percentile)
+
+    @staticmethod
+    def _hedgeable(chat_options: ChatOptions | None) -> bool:
+        return not (chat_options and chat_options.tools)
+
+    # -------------------------------------------------------
+    # ChatClientProtocol
+    # -------------------------------------------------------
+    async def get_response(self, messages, *, chat_options: ChatOptions | None = None, **kwargs: Any) -> ChatResponse:
+        if not self._hedgeable(chat_options):
+            return await self.inner.get_response(messages, chat_options=chat_options, **kwargs)
+        return await self._race(lambda: self.inner.get_response(messages, chat_options=chat_options, **kwargs))
+
+    async def get_streaming_response(
+        self, messages, *, chat_options: ChatOptions | None = None, **kwargs: Any
+    ) -> AsyncIterable[ChatResponseUpdate]:
+        if not self._hedgeable(chat_options):
+            async for update in self.inner.get_streaming_response(messages, chat_options=chat_options, **kwargs):
+                yield update
+            return
+
+        async def open_stream():
+            stream = self.inner.get_streaming_response(messages, chat_options=chat_options, **kwargs)
+            try:
+                return stream, await stream.__anext__()
+            except StopAsyncIteration:
+                return stream, None
+            except BaseException:
+                await stream.aclose()
+                raise
+
+        stream, first = await self._race(open_stream, on_discard=lambda result: result[0].aclose())
+        try:
+            if first is None:
+                return
+            yield first
+            async for update in stream:
+                yield update
+        finally:
+            await stream.aclose()
+
+    # -------------------------------------------------------
+    # Race
+    # -------------------------------------------------------
+    async def _race(self, start: Callable[[], Awaitable[Any]], on_discard: Callable[[Any], Awaitable] | None = None) -> Any:
+        """
+        Run `start()`; if it is not done after the hedge delay, run it again
+        and return the first successful result. A request that fails while
+        the other is still running does not fail the call.
+        """
+        self.stats["requests"] += 1
+        started = [time.perf_counter()]
+        tasks = [asyncio.ensure_future(start())]
+        winner = None
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=self.hedge_delay())
+            if not done:
+                started.append(time.perf_counter())
+                tasks.append(asyncio.ensure_future(start()))
+                pending.add(tasks[1])
+                self.stats["hedged"] += 1
+                logger.info("[%s] no answer after %.2fs, sending a hedged request", self.agent_name, started[1] - started[0])
+            errors: list[BaseException] = []
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        if task is not tasks[0]:
+                            self.stats["hedge_won"] += 1
+                        # The winner's own latency: the window describes single requests
+                        self.latencies.add(time.perf_counter() - started[tasks.index(task)])
+                        return task.result()
+                    errors.append(task.exception())
+                if not pending:
+                    raise errors[0]
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # The loser may have finished at the same moment and still hold a stream
+            for task in tasks:
+                if task is not winner and on_discard and not task.cancelled() and task.exception() is None:
+                    await on_discard(task.result())
@@ -0,0 +1,219 @@
+# clients/load_balanced_chat_client.py
+"""
+Chat client that spreads requests over several OpenAI-compatible endpoints
+(Docker Model Runner, vLLM, llama.cpp server...).
+
+- Endpoint selection: least outstanding requests (ties broken round-robin).
+- Per-endpoint concurrency caps: callers wait for a free slot instead of
+  piling more requests onto a busy server.
+- Passive health checks: connection errors, timeouts, 429 and 5xx responses
+  count as failures; after `failure_threshold` consecutive failures the
+  endpoint is ejected for `ejection_seconds`. Failed requests are retried on
+  another endpoint (streams only while nothing has been yielded yet).
+
+The wrapper satisfies ChatClientProtocol, so ChatAgent and every workflow
+use it exactly like a single OpenAIChatClient.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable
+
+import openai
+from agent_framework import ChatResponse, ChatResponseUpdate
+from agent_framework.openai import OpenAIChatClient
+
+logger = logging.getLogger("maf.clients.load_balancer")
+
+_ENDPOINT_ERRORS = (
+    openai.APIConnectionError,   # includes APITimeoutError
+    openai.InternalServerError,
+    openai.RateLimitError,
+)
+
+
+def is_endpoint_failure(exc: BaseException) -> bool:
+    """True when the error says something about the endpoint (not the request)."""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if isinstance(exc, _ENDPOINT_ERRORS):
+            return True
+        if isinstance(exc, openai.APIStatusError):
+            return exc.status_code >= 500
+        exc = exc.__cause__ or getattr(exc, "inner_exception", None)
+    return False
+
+
+def parse_endpoints(spec: str, default_max_concurrency: int = 0) -> list[tuple[str, int]]:
+    """Parse 'url[|max_concurrency],url2[|max_concurrency]' into (url, cap) pairs."""
+    endpoints = []
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        url, _, cap = item.partition("|")
+        endpoints.append((url.strip(), int(cap) if cap.strip() else default_max_concurrency))
+    return endpoints
+
+
+@dataclass
+class Endpoint:
+    base_url: str
+    client: OpenAIChatClient
+    max_concurrency: int = 0  # 0 = unlimited
+    outstanding: int = 0
+    consecutive_failures: int = 0
+    ejected_until: float = 0.0
+    total_requests: int = 0
+    total_failures: int = 0
+    _order: int = field(default=0, repr=False)
+
+    def is_healthy(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def has_capacity(self) -> bool:
+        return self.max_concurrency <= 0 or self.outstanding < self.max_concurrency
+
+    def load(self) -> float:
+        # normalize by capacity so a 4-slot server takes more than a 1-slot one
+        return self.outstanding / self.max_concurrency if self.max_concurrency > 0 else self.outstanding
+
+
+class LoadBalancedChatClient:
+    """ChatClientProtocol implementation balancing over several OpenAIChatClients."""
+
+    def __init__(
+        self,
+        endpoints: list[tuple[str, int]],
+        api_key: str,
+        model_id: str,
+        failure_threshold: int = 3,
+        ejection_seconds: float = 30.0,
+        max_attempts: int | None = None,
+    ):
+        if not endpoints:
+            raise ValueError("LoadBalancedChatClient needs at least one endpoint")
+        self.endpoints = [
+            Endpoint(
+                base_url=url,
+                client=OpenAIChatClient(base_url=url, api_key=api_key, model_id=model_id),
+                max_concurrency=cap,
+                _order=i,
+            )
+            for i, (url, cap) in enumerate(endpoints)
+        ]
+        self.model_id = model_id
+        self.additional_properties: dict[str, Any] = {}
+        self._failure_threshold = failure_threshold
+        self._ejection_seconds = ejection_seconds
+        self._max_attempts = max_attempts or len(self.endpoints)
+        self._slot_freed = asyncio.Condition()
+        self._rr = itertools.count()
+
+    # -------------------------------------------------------
+    # ChatClientProtocol
+    # -------------------------------------------------------
+    async def get_response(self, messages, **kwargs: Any) -> ChatResponse:
+        tried: set[str] = set()
+        for attempt in range(1, self._max_attempts + 1):
+            endpoint = await self._acquire(exclude=tried)
+            failed = False
+            try:
+                return await endpoint.client.get_response(messages, **kwargs)
+            except Exception as e:
+                # A bad request says nothing about the endpoint: surface it as-is
+                failed = is_endpoint_failure(e)
+                if not failed or attempt == self._max_attempts:
+                    raise
+                tried.add(endpoint.base_url)
+                logger.warning("Endpoint %s failed (%s), retrying elsewhere", endpoint.base_url, e)
+            finally:
+                await self._release(endpoint, ok=not failed)
+
+    async def get_streaming_response(self, messages, **kwargs: Any) -> AsyncIterable[ChatResponseUpdate]:
+        tried: set[str] = set()
+        for attempt in range(1, self._max_attempts + 1):
+            endpoint = await self._acquire(exclude=tried)
+            failed = False
+            yielded = False
+            try:
+                async for update in endpoint.client.get_streaming_response(messages, **kwargs):
+                    yielded = True
+                    yield update
+                return
+            except Exception as e:
+                failed = is_endpoint_failure(e)
+                # Once output reached the caller a retry would duplicate it
+                if yielded or not failed or attempt == self._max_attempts:
+                    raise
+                tried.add(endpoint.base_url)
+                logger.warning("Endpoint %s failed before streaming (%s), retrying elsewhere", endpoint.base_url, e)
+            finally:
+                await self._release(endpoint, ok=not failed)
+
+    # -------------------------------------------------------
+    # Endpoint selection
+    # -------------------------------------------------------
+    async def _acquire(self, exclude: set[str] | None = None) -> Endpoint:
+        exclude = exclude or set()
+        async with self._slot_freed:
+            while True:
+                endpoint = self._pick(exclude)
+                if endpoint is not None:
+                    endpoint.outstanding += 1
+                    endpoint.total_requests += 1
+                    return endpoint
+                await self._slot_freed.wait()
+
+    def _pick(self, exclude: set[str]) -> Endpoint | None:
+        now = time.monotonic()
+        candidates = [e for e in self.endpoints if e.base_url not in exclude] or self.endpoints
+        healthy = [e for e in candidates if e.is_healthy(now)]
+        if not healthy:
+            # Everything is ejected: fail open on the endpoint that comes back first
+            healthy = [min(candidates, key=lambda e: e.ejected_until)]
+        free = [e for e in healthy if e.has_capacity()]
+        if not free:
+            return None
+        tick = next(self._rr)
+        return min(free, key=lambda e: (e.load(), (e._order - tick) % len(self.endpoints)))
+
+    async def _release(self, endpoint: Endpoint, ok: bool) -> None:
+        async with self._slot_freed:
+            endpoint.outstanding -= 1
+            if ok:
+                endpoint.consecutive_failures = 0
+            else:
+                endpoint.total_failures += 1
+                endpoint.consecutive_failures += 1
+                if endpoint.consecutive_failures >= self._failure_threshold:
+                    endpoint.ejected_until = time.monotonic() + self._ejection_seconds
+                    logger.warning(
+                        "Ejecting endpoint %s for %.0fs after %d consecutive failures",
+                        endpoint.base_url, self._ejection_seconds, endpoint.consecutive_failures,
+                    )
+            self._slot_freed.notify_all()
+
+    # -------------------------------------------------------
+    # Introspection
+    # -------------------------------------------------------
+    def stats(self) -> list[dict[str, Any]]:
+        now = time.monotonic()
+        return [
+            {
+                "base_url": e.base_url,
+                "outstanding": e.outstanding,
+                "max_concurrency": e.max_concurrency,
+                "healthy": e.is_healthy(now),
+                "requests": e.total_requests,
+                "failures": e.total_failures,
+            }
+            for e in self.endpoints
+        ]
+
+    def service_url(self) -> str:
+        return ",".join(e.base_url for e in self.endpoints)
@@ -0,0 +1,181 @@
+# clients/near_duplicate_cache.py
+"""
+Near-duplicate tier for the LLM response cache.
+
+Prompts that differ only in casing, punctuation, whitespace or a filler
+word ("Latest news on Rust async" vs "latest news on rust async?") should
+reuse the same answer for cheap agents such as TitleGeneratorAgent.
+
+Each prompt is normalized, cut into character shingles and reduced to a
+MinHash signature (NumPy, `num_perm` hash functions). The fraction of equal
+signature slots estimates the Jaccard similarity of the shingle sets. A
+stored response at or above `threshold` is only returned when both prompts
+also have the same content words: one changed number or negation ("type 1"
+vs "type 2 diabetes") barely moves the shingle similarity but changes the
+question.
+
+Entries are partitioned by everything except the message text (model,
+instructions, tool schemas, sampling params, message roles), so only the
+wording of the prompt is ever fuzzy-matched.
+"""
+
+import hashlib
+import json
+import re
+import unicodedata
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+from agent_framework import ChatMessage, ChatOptions
+
+from .response_cache import describe_request
+
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+# ------------------------------------------------------------
+# Normalization and signatures
+# ------------------------------------------------------------
+def normalize_prompt(text: str) -> str:
+    """Case-, punctuation- and whitespace-insensitive form of a prompt."""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+# Filler words a near hit may differ in; negations are deliberately not here
+_FILLER_WORDS = frozenset(
+    "a an the of on in at to for from by with about and or is are was were be "
+    "what whats which who how please me my i can could would you your tell find search topic s".split()
+)
+
+
+def content_words(normalized: str) -> frozenset[str]:
+    """Words of a normalized prompt that must match exactly for a near hit (numbers included)."""
+    return frozenset(word for word in normalized.split() if word not in _FILLER_WORDS)
+
+
+def shingles(text: str, size: int = 4) -> set[str]:
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures with universal hashing (a*x + b) mod p."""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 4, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._a = rng.integers(1, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+
+    def signature(self, normalized: str) -> np.ndarray:
+        tokens = shingles(normalized, self.shingle_size)
+        if not tokens:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        hashes = np.fromiter((zlib.crc32(t.encode("utf-8")) for t in tokens), dtype=np.uint64, count=len(tokens))
+        hashes %= _MERSENNE_PRIME
+        # (num_shingles, num_perm) matrix; a, x < 2^31 so a*x + b fits in uint64
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME
+        return permuted.min(axis=0)
+
+
+# ------------------------------------------------------------
+# Index
+# ------------------------------------------------------------
+@dataclass
+class NearDuplicateHit:
+    value: dict
+    similarity: float
+    matched_prompt: str
+
+
+class _Partition:
+    def __init__(self, num_perm: int):
+        self.signatures = np.empty((0, num_perm), dtype=np.uint64)
+        self.prompts: list[str] = []
+        self.words: list[frozenset[str]] = []
+        self.values: list[dict] = []
+
+
+def _partition_key(messages: list[ChatMessage], options: ChatOptions | None, default_model_id: str | None) -> str:
+    document = describe_request(messages, options, default_model_id)
+    document["messages"] = [m.role.value if hasattr(m.role, "value") else str(m.role) for m in messages]
+    canonical = json.dumps(document, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def prompt_text(messages: list[ChatMessage]) -> str:
+    return "\n".join(m.text or "" for m in messages)
+
+
+class NearDuplicateIndex:
+    """In-memory MinHash index of recent responses, bounded per partition."""
+
+    def __init__(self, threshold: float = 0.95, num_perm: int = 128, max_entries: int = 256):
+        self.threshold = threshold
+        self.max_entries = max(1, max_entries)
+        self._hasher = MinHasher(num_perm=num_perm)
+        self._partitions: OrderedDict[str, _Partition] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(
+        self,
+        messages: list[ChatMessage],
+        options: ChatOptions | None,
+        default_model_id: str | None = None,
+    ) -> NearDuplicateHit | None:
+        partition = self._partitions.get(_partition_key(messages, options, default_model_id))
+        if partition is None or not partition.values:
+            self.misses += 1
+            return None
+        normalized = normalize_prompt(prompt_text(messages))
+        signature = self._hasher.signature(normalized)
+        similarity = (partition.signatures == signature).mean(axis=1)
+        words = content_words(normalized)
+        for index in np.argsort(-similarity, kind="stable"):
+            if similarity[index] < self.threshold:
+                break
+            if partition.words[index] == words:
+                self.hits += 1
+                return NearDuplicateHit(partition.values[index], float(similarity[index]), partition.prompts[index])
+        self.misses += 1
+        return None
+
+    def add(
+        self,
+        messages: list[ChatMessage],
+        options: ChatOptions | None,
+        value: dict,
+        default_model_id: str | None = None,
+    ) -> None:
+        key = _partition_key(messages, options, default_model_id)
+        partition = self._partitions.get(key)
+        if partition is None:
+            partition = self._partitions[key] = _Partition(self._hasher.num_perm)
+        self._partitions.move_to_end(key)
+
+        normalized = normalize_prompt(prompt_text(messages))
+        if normalized in partition.prompts:
+            return
+        partition.signatures = np.vstack([partition.signatures, self._hasher.signature(normalized)])
+        partition.prompts.append(normalized)
+        partition.words.append(content_words(normalized))
+        partition.values.append(value)
+        if len(partition.values) > self.max_entries:
+            partition.signatures = partition.signatures[1:]
+            del partition.prompts[0], partition.words[0], partition.values[0]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "near_hits": self.hits,
+            "near_misses": self.misses,
+            "near_entries": sum(len(p.values) for p in self._partitions.values()),
+        }
@@ -0,0 +1,225 @@
+# clients/replay.py
+"""
+Record / replay of a run's model and MCP traffic.
+
+  record  every chat response and MCP tool result of the run is appended to
+          a JSONL tape, keyed by (kind, executor, sequence number),
+  replay  the same calls are answered from the tape without touching the
+          model server or the MCP gateway, so a whole wf06/wf08 run is
+          reproduced in milliseconds: what remains is the framework's own
+          overhead (superstep scheduling, checkpointing, state copies).
+
+Calls are matched per executor: first by a digest of the request, then,
+for requests whose text changed (timestamps, temp paths), by sequence
+number. Concurrent calls of one executor (the wf08 collector) therefore
+still meet their own recording.
+
+Recorded chat responses are final answers: tool loops run inside the chat
+client, so tools invoked by an agent are not re-run on replay, and their
+side effects (files, folders) do not happen. MCP calls made directly by
+executors (page fetches) are replayed from the tape as well.
+
+The LLM response caches and executor memoization are bypassed while a
+tape is configured, so every call of the run reaches the tape.
+
+Enabled with console.py --record TAPE / --replay TAPE (or REPLAY_MODE and
+REPLAY_TAPE) before any agent is built.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, AsyncIterable
+
+from agent_framework import ChatOptions, ChatResponse, ChatResponseUpdate
+
+from config import REPLAY_MODE, REPLAY_TAPE
+from metrics.usage import instrument_executors, usage_tracker
+from .cached_chat_client import _as_messages, response_updates
+from .response_cache import cache_key
+
+logger = logging.getLogger("maf.clients.replay")
+
+
+class ReplayMiss(LookupError):
+    """A replayed run made a call the tape has no recording for."""
+
+
+class RunTape:
+    def __init__(self, path: str | Path, mode: str):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Tape mode must be 'record' or 'replay', got {mode!r}")
+        self.path = Path(path)
+        self.mode = mode
+        self._seq: dict[tuple[str, str], int] = defaultdict(int)
+        self._entries: dict[tuple[str, str], list[dict]] = defaultdict(list)
+        self._lock = asyncio.Lock()
+        self.recorded = 0
+        self.replayed = 0
+        if mode == "replay":
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[(entry["kind"], entry["executor"])].append(entry)
+            logger.info("▶️ Replaying %d call(s) from %s", sum(map(len, self._entries.values())), self.path)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text("", encoding="utf-8")
+            logger.info("⏺️ Recording model and MCP calls to %s", self.path)
+        # Calls are keyed by the executor that made them
+        instrument_executors()
+
+    @staticmethod
+    def _executor() -> str:
+        return usage_tracker.current_executor() or "-"
+
+    async def record(self, kind: str, digest: str, value: Any, **extra: Any) -> None:
+        executor = self._executor()
+        async with self._lock:
+            seq = self._seq[(kind, executor)]
+            self._seq[(kind, executor)] += 1
+            entry = {"kind": kind, "executor": executor, "seq": seq, "digest": digest, **extra, "value": value}
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+            self.recorded += 1
+
+    def replay(self, kind: str, digest: str) -> Any:
+        executor = self._executor()
+        entries = self._entries.get((kind, executor), [])
+        entry = next((e for e in entries if e["digest"] == digest), None)
+        if entry is None:
+            # Request text differs from the recording: fall back to call order
+            entry = entries[0] if entries else None
+        if entry is None:
+            raise ReplayMiss(f"No recorded {kind} call left for executor '{executor}' in {self.path}")
+        entries.remove(entry)
+        self.replayed += 1
+        return entry["value"]
+
+    def stats(self) -> dict[str, Any]:
+        left = sum(map(len, self._entries.values()))
+        return {"mode": self.mode, "recorded": self.recorded, "replayed": self.replayed, "unused": left}
+
+
+_tape: RunTape | None = None
+_tape_configured = False
+
+
+def configure_tape(mode: str, path: str | Path | None) -> RunTape | None:
+    """Install the process-wide tape ('off' removes it)."""
+    global _tape, _tape_configured
+    _tape = None if mode in ("", "off") or not path else RunTape(path, mode)
+    _tape_configured = True
+    return _tape
+
+
+def current_tape() -> RunTape | None:
+    if not _tape_configured:
+        configure_tape(REPLAY_MODE, REPLAY_TAPE)
+    return _tape
+
+
+def _digest(document: Any) -> str:
+    canonical = json.dumps(document, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:24]
+
+
+# ------------------------------------------------------------
+# Chat client
+# ------------------------------------------------------------
+class ReplayChatClient:
+    """Innermost ChatClientProtocol wrapper: tapes model responses, or serves them."""
+
+    def __init__(self, inner, tape: RunTape, agent_name: str | None = None):
+        self.inner = inner
+        self.tape = tape
+        self.agent_name = agent_name
+        self.model_id = getattr(inner, "model_id", None)
+        self.additional_properties: dict[str, Any] = {}
+
+    def _key(self, messages, chat_options: ChatOptions | None) -> str:
+        return cache_key(_as_messages(messages), chat_options, self.model_id)
+
+    async def get_response(self, messages, *, chat_options: ChatOptions | None = None, **kwargs: Any) -> ChatResponse:
+        key = self._key(messages, chat_options)
+        if self.tape.mode == "replay":
+            response = ChatResponse.from_dict(self.tape.replay("chat", key))
+            response.additional_properties = {**(response.additional_properties or {}), "replayed": True}
+            return response
+        response = await self.inner.get_response(messages, chat_options=chat_options, **kwargs)
+        await self.tape.record("chat", key, response.to_dict(exclude={"raw_representation"}), agent=self.agent_name)
+        return response
+
+    async def get_streaming_response(
+        self, messages, *, chat_options: ChatOptions | None = None, **kwargs: Any
+    ) -> AsyncIterable[ChatResponseUpdate]:
+        key = self._key(messages, chat_options)
+        if self.tape.mode == "replay":
+            for update in response_updates(ChatResponse.from_dict(self.tape.replay("chat", key)), {"replayed": True}):
+                yield update
+            return
+        updates: list[ChatResponseUpdate] = []
+        async for update in self.inner.get_streaming_response(messages, chat_options=chat_options, **kwargs):
+            updates.append(update)
+            yield update
+        response = ChatResponse.from_chat_response_updates(updates)
+        await self.tape.record("chat", key, response.to_dict(exclude={"raw_representation"}), agent=self.agent_name)
+
+
+# ------------------------------------------------------------
+# MCP client
+# ------------------------------------------------------------
+class ReplayMCPClient:
+    """
+    MCPGatewayClient stand-in. Recording forwards to the real client; replay
+    needs no gateway at all (connect/list_tools/close are no-ops).
+    """
+
+    def __init__(self, inner, tape: RunTape):
+        self.inner = inner
+        self.tape = tape
+        self.gateway_url = getattr(inner, "gateway_url", None)
+
+    @property
+    def session(self) -> Any:
+        # mcp_tools only checks that a session exists
+        return True if self.tape.mode == "replay" else self.inner.session
+
+    async def connect(self) -> None:
+        if self.tape.mode == "record":
+            await self.inner.connect()
+
+    async def list_tools(self) -> list[str]:
+        if self.tape.mode == "record":
+            return await self.inner.list_tools()
+        return []
+
+    async def call_tool(self, name: str, arguments: dict[str, Any]) -> str:
+        key = _digest({"tool": name, "arguments": arguments})
+        if self.tape.mode == "replay":
+            value = self.tape.replay("mcp", key)
+            if isinstance(value, dict) and "error" in value:
+                raise RuntimeError(value["error"])
+            return value
+        try:
+            result = await self.inner.call_tool(name, arguments)
+        except Exception as e:
+            # Failures are part of the run (fetch falls back to another tool on error)
+            await self.tape.record("mcp", key, {"error": f"{type(e).__name__}: {e}"}, tool=name)
+            raise
+        await self.tape.record("mcp", key, result, tool=name)
+        return result
+
+    async def close(self) -> None:
+        if self.tape.mode == "record":
+            await self.inner.close()
+
+
+def taped_mcp_client(client):
+    """`client` behind the configured tape, or unchanged when there is none."""
+    tape = current_tape()
+    return client if tape is None else ReplayMCPClient(client, tape)
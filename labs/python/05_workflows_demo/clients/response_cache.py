@@ -0,0 +1,216 @@
+# clients/response_cache.py
+"""
+Exact-match store for chat responses.
+
+Keys are SHA-256 digests of a canonical JSON document describing the request
+(model, instructions, messages, tool schemas, sampling parameters), so two
+requests share an entry only when they would send the same payload to the
+model. Values are `ChatResponse.to_dict()` documents.
+
+Two tiers:
+  - an in-memory LRU (bounded by `max_entries`) for the running process,
+  - an optional SQLite file that survives restarts, resumes and reruns.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from agent_framework import ChatMessage, ChatOptions
+
+logger = logging.getLogger("maf.clients.response_cache")
+
+_PURGE_INTERVAL_S = 60.0
+
+# Sampling parameters that change what the model returns
+SAMPLING_FIELDS = (
+    "temperature",
+    "top_p",
+    "max_tokens",
+    "seed",
+    "stop",
+    "frequency_penalty",
+    "presence_penalty",
+    "logit_bias",
+    "tool_choice",
+)
+
+# Per-message fields that differ between otherwise identical requests
+_VOLATILE_KEYS = {"message_id", "created_at", "raw_representation", "additional_properties"}
+
+
+# ------------------------------------------------------------
+# Cache keys
+# ------------------------------------------------------------
+def _strip_volatile(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _strip_volatile(v) for k, v in value.items() if k not in _VOLATILE_KEYS}
+    if isinstance(value, list):
+        return [_strip_volatile(v) for v in value]
+    return value
+
+
+def _tool_schema(tool: Any) -> Any:
+    if hasattr(tool, "to_json_schema_spec"):
+        return tool.to_json_schema_spec()
+    if isinstance(tool, dict):
+        return tool
+    name = getattr(tool, "name", None) or getattr(tool, "__qualname__", None) or type(tool).__name__
+    return {"name": name, "description": getattr(tool, "description", None) or getattr(tool, "__doc__", None)}
+
+
+def _response_format(fmt: Any) -> Any:
+    if fmt is None:
+        return None
+    if hasattr(fmt, "model_json_schema"):
+        return {"name": fmt.__name__, "schema": fmt.model_json_schema()}
+    return fmt
+
+
+def describe_request(
+    messages: list[ChatMessage],
+    chat_options: ChatOptions | None,
+    default_model_id: str | None = None,
+) -> dict[str, Any]:
+    """Everything that determines the model output, as plain JSON-able data."""
+    options = chat_options or ChatOptions()
+    return {
+        "model": options.model_id or default_model_id,
+        "instructions": options.instructions,
+        "messages": [_strip_volatile(m.to_dict()) for m in messages],
+        "tools": [_tool_schema(t) for t in (options.tools or [])],
+        "response_format": _response_format(options.response_format),
+        "sampling": {f: getattr(options, f, None) for f in SAMPLING_FIELDS},
+    }
+
+
+def cache_key(
+    messages: list[ChatMessage],
+    chat_options: ChatOptions | None,
+    default_model_id: str | None = None,
+) -> str:
+    document = describe_request(messages, chat_options, default_model_id)
+    canonical = json.dumps(document, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+# ------------------------------------------------------------
+# Store
+# ------------------------------------------------------------
+class ResponseCache:
+    """In-memory LRU in front of an optional SQLite table."""
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        sqlite_path: str | None = None,
+        ttl_seconds: float = 0,
+    ):
+        self._max_entries = max(1, max_entries)
+        self._ttl = ttl_seconds
+        self._memory: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._path = Path(sqlite_path) if sqlite_path else None
+        self._db: sqlite3.Connection | None = None
+        # One connection shared by the to_thread workers: every use goes through this lock
+        self._db_lock = threading.Lock()
+        self._last_purge = 0.0
+        self.hits = 0
+        self.misses = 0
+        if self._path:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self._path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY,"
+                " agent TEXT,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " hits INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._db.commit()
+            self._purge_expired()
+            logger.info("LLM response cache at %s", self._path)
+
+    async def get(self, key: str) -> dict | None:
+        entry = self._memory.get(key)
+        if entry is None and self._db is not None:
+            entry = await asyncio.to_thread(self._sqlite_get, key)
+            if entry is not None:
+                self._remember(key, entry)
+        if entry is None or self._expired(entry[0]):
+            self.misses += 1
+            return None
+        self._memory.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    async def put(self, key: str, value: dict, agent: str | None = None) -> None:
+        entry = (time.time(), value)
+        self._remember(key, entry)
+        if self._db is not None:
+            await asyncio.to_thread(self._sqlite_put, key, entry, agent)
+
+    def stats(self) -> dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "memory_entries": len(self._memory)}
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # --------------------------------------------------------
+    # Helpers
+    # --------------------------------------------------------
+    def _expired(self, created_at: float) -> bool:
+        return self._ttl > 0 and time.time() - created_at > self._ttl
+
+    def _remember(self, key: str, entry: tuple[float, dict]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_entries:
+            self._memory.popitem(last=False)
+
+    def _sqlite_get(self, key: str) -> tuple[float, dict] | None:
+        with self._db_lock:
+            if self._db is None:
+                return None
+            row = self._db.execute("SELECT created_at, value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE llm_cache SET hits = hits + 1 WHERE key = ?", (key,))
+            self._db.commit()
+        return row[0], json.loads(row[1])
+
+    def _sqlite_put(self, key: str, entry: tuple[float, dict], agent: str | None) -> None:
+        value = json.dumps(entry[1], ensure_ascii=False)
+        with self._db_lock:
+            if self._db is None:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, agent, value, created_at) VALUES (?, ?, ?, ?)",
+                (key, agent, value, entry[0]),
+            )
+            self._db.commit()
+        if time.time() - self._last_purge > _PURGE_INTERVAL_S:
+            self._purge_expired()
+
+    def _purge_expired(self) -> None:
+        """Delete rows past the TTL (on open, then at most every _PURGE_INTERVAL_S on put)."""
+        self._last_purge = time.time()
+        if self._ttl <= 0:
+            return
+        with self._db_lock:
+            if self._db is None:
+                return
+            deleted = self._db.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self._ttl,)).rowcount
+            self._db.commit()
+        if deleted:
+            logger.info("Purged %d expired LLM cache entries", deleted)
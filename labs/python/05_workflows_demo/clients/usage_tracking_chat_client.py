@@ -0,0 +1,101 @@
+# clients/usage_tracking_chat_client.py
+"""
+Chat client wrapper that reports one UsageRecord per call to the usage
+tracker (metrics/usage.py): tokens, latency and time-to-first-token.
+
+It sits outermost in the per-agent client stack, so cache hits are seen
+(and counted as such) while model calls are timed end to end. When the
+server does not report usage (common for local streaming servers) tokens
+are estimated from the text and the record is flagged `estimated`.
+"""
+
+import time
+from typing import Any, AsyncIterable
+
+from agent_framework import ChatOptions, ChatResponse, ChatResponseUpdate, UsageContent, UsageDetails
+
+from metrics.usage import UsageRecord, usage_tracker
+from tools.content_extraction import estimate_tokens
+
+
+def _prompt_tokens(messages, chat_options: ChatOptions | None) -> int:
+    if isinstance(messages, str):
+        text = messages
+    else:
+        items = [messages] if not isinstance(messages, (list, tuple)) else messages
+        text = "\n".join(getattr(m, "text", None) or str(m) for m in items)
+    instructions = chat_options.instructions if chat_options else None
+    return estimate_tokens(f"{instructions or ''}\n{text}")
+
+
+def _is_cache_hit(additional_properties: dict | None) -> bool:
+    return bool((additional_properties or {}).get("cache_hit"))
+
+
+class UsageTrackingChatClient:
+    """ChatClientProtocol wrapper feeding the process-wide usage tracker."""
+
+    def __init__(self, inner, agent_name: str | None = None):
+        self.inner = inner
+        self.agent_name = agent_name
+        self.model_id = getattr(inner, "model_id", None)
+        self.additional_properties: dict[str, Any] = {}
+
+    async def get_response(self, messages, *, chat_options: ChatOptions | None = None, **kwargs: Any) -> ChatResponse:
+        record = UsageRecord(agent=self.agent_name, executor=None)
+        t0 = time.perf_counter()
+        try:
+            response = await self.inner.get_response(messages, chat_options=chat_options, **kwargs)
+        except Exception as e:
+            record.error = type(e).__name__
+            raise
+        finally:
+            record.latency_s = time.perf_counter() - t0
+            if record.error:
+                usage_tracker.record(record)
+
+        record.cache_hit = _is_cache_hit(response.additional_properties)
+        self._fill_tokens(record, response.usage_details, messages, chat_options, response.text)
+        usage_tracker.record(record)
+        return response
+
+    async def get_streaming_response(
+        self, messages, *, chat_options: ChatOptions | None = None, **kwargs: Any
+    ) -> AsyncIterable[ChatResponseUpdate]:
+        record = UsageRecord(agent=self.agent_name, executor=None, streamed=True)
+        usage: UsageDetails | None = None
+        text_parts: list[str] = []
+        t0 = time.perf_counter()
+        completed = False
+        try:
+            async for update in self.inner.get_streaming_response(messages, chat_options=chat_options, **kwargs):
+                if record.ttft_s is None and update.text:
+                    record.ttft_s = time.perf_counter() - t0
+                record.cache_hit = record.cache_hit or _is_cache_hit(update.additional_properties)
+                for content in update.contents:
+                    if isinstance(content, UsageContent):
+                        usage = content.details if usage is None else usage + content.details
+                if update.text:
+                    text_parts.append(update.text)
+                yield update
+            completed = True
+        except Exception as e:
+            record.error = type(e).__name__
+            raise
+        finally:
+            # Also runs when the consumer stops early: that time was still spent
+            record.latency_s = time.perf_counter() - t0
+            if not completed and not record.error:
+                record.error = "cancelled"
+            self._fill_tokens(record, usage, messages, chat_options, "".join(text_parts))
+            usage_tracker.record(record)
+
+    @staticmethod
+    def _fill_tokens(record: UsageRecord, usage: UsageDetails | None, messages, chat_options, output_text: str) -> None:
+        if usage is not None and (usage.input_token_count or usage.output_token_count):
+            record.input_tokens = usage.input_token_count or 0
+            record.output_tokens = usage.output_token_count or 0
+            return
+        record.input_tokens = _prompt_tokens(messages, chat_options)
+        record.output_tokens = estimate_tokens(output_text or "")
+        record.estimated = True
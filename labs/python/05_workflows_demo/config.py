@@ -11,4 +11,116 @@ POSTGRES_USER = os.getenv("POSTGRES_USER", "postgres")
 POSTGRES_PASS = os.getenv("POSTGRES_PASSWORD", "postgres")
 POSTGRES_DB   = os.getenv("POSTGRES_DB", "postgres")
 DEVUI_PORT = int(os.getenv("DEVUI_PORT", "8000"))
-DEVUI_HOST = os.getenv("DEVUI_HOST", "0.0.0.0")
\ No newline at end of file
+DEVUI_HOST = os.getenv("DEVUI_HOST", "0.0.0.0")
+
+# Map-reduce summarization (local models have small context windows)
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "3000"))
+SUMMARY_MAX_CONCURRENCY = int(os.getenv("SUMMARY_MAX_CONCURRENCY", "2"))
+FETCH_MAX_CONCURRENCY = int(os.getenv("FETCH_MAX_CONCURRENCY", "4"))
+
+# SearchExecutor: agent (SearchAgent calls the search tool and lists the URLs)
+# | direct (the executor calls the tool and ranks the URLs itself, tools/web_search.py)
+SEARCH_MODE = os.getenv("SEARCH_MODE", "agent").lower()
+# Direct mode: let QueryRewriterAgent turn the question into a search query first
+SEARCH_QUERY_REWRITE = os.getenv("SEARCH_QUERY_REWRITE", "false").lower() in ("1", "true", "yes")
+
+# Multiple OpenAI-compatible endpoints: "url[|max_concurrency],url2[|max_concurrency]"
+OPENAI_API_BASES = os.getenv("OPENAI_API_BASES", "")
+OPENAI_ENDPOINT_MAX_CONCURRENCY = int(os.getenv("OPENAI_ENDPOINT_MAX_CONCURRENCY", "0"))
+OPENAI_ENDPOINT_FAILURE_THRESHOLD = int(os.getenv("OPENAI_ENDPOINT_FAILURE_THRESHOLD", "3"))
+OPENAI_ENDPOINT_EJECTION_SECONDS = float(os.getenv("OPENAI_ENDPOINT_EJECTION_SECONDS", "30"))
+
+# Exact-match LLM response cache: off | memory | sqlite
+LLM_CACHE = os.getenv("LLM_CACHE", "off").lower()
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./.cache/llm_responses.sqlite")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "0"))
+# Only requests at temperature <= LLM_CACHE_MAX_TEMPERATURE are cached; the default agents set temperature=0
+LLM_CACHE_AGENTS = os.getenv("LLM_CACHE_AGENTS", "TitleGeneratorAgent,SummarizerAgent,MarkdownSummarizerAgent")
+LLM_CACHE_MAX_TEMPERATURE = float(os.getenv("LLM_CACHE_MAX_TEMPERATURE", "0.0"))
+# Also cache agents that leave temperature to the server default (sampled output, replayable demos only)
+LLM_CACHE_UNSET_TEMPERATURE = os.getenv("LLM_CACHE_UNSET_TEMPERATURE", "false").lower() in ("1", "true", "yes")
+# Agents whose tools are read-only and stable, so the final answer of a tool turn may be
+# cached (opt-in: web search results go stale, e.g. "SearchAgent" only for replayable demos)
+LLM_CACHE_TOOL_AGENTS = os.getenv("LLM_CACHE_TOOL_AGENTS", "")
+
+# Hedged requests for short idempotent agents (clients/hedged_chat_client.py); empty = disabled
+LLM_HEDGE_AGENTS = os.getenv("LLM_HEDGE_AGENTS", "")
+# Duplicate a call still running past this percentile of the agent's recent latencies
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_INITIAL_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_INITIAL_DELAY_SECONDS", "5"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+# Near-duplicate (MinHash) cache tier for cheap agents; empty = disabled
+LLM_NEAR_DUP_AGENTS = os.getenv("LLM_NEAR_DUP_AGENTS", "")
+LLM_NEAR_DUP_THRESHOLD = float(os.getenv("LLM_NEAR_DUP_THRESHOLD", "0.95"))
+LLM_NEAR_DUP_NUM_PERM = int(os.getenv("LLM_NEAR_DUP_NUM_PERM", "128"))
+LLM_NEAR_DUP_MAX_ENTRIES = int(os.getenv("LLM_NEAR_DUP_MAX_ENTRIES", "256"))
+
+# Token / latency accounting per agent, executor and workflow run
+USAGE_TRACKING = os.getenv("USAGE_TRACKING", "true").lower() in ("1", "true", "yes")
+
+# wf08 per-URL collection (fetch → summarize → write) concurrency and retries
+COLLECT_MAX_CONCURRENCY = int(os.getenv("COLLECT_MAX_CONCURRENCY", "2"))
+COLLECT_MAX_RETRIES = int(os.getenv("COLLECT_MAX_RETRIES", "2"))
+
+# DevUI / batch: run each workflow call on its own pooled instance
+WORKFLOW_POOLING = os.getenv("WORKFLOW_POOLING", "true").lower() in ("1", "true", "yes")
+WORKFLOW_POOL_MAX_IDLE = int(os.getenv("WORKFLOW_POOL_MAX_IDLE", "4"))
+# Instances parked on unanswered HITL requests: cap per workflow and expiry (0 = none)
+WORKFLOW_POOL_MAX_PARKED = int(os.getenv("WORKFLOW_POOL_MAX_PARKED", "16"))
+WORKFLOW_POOL_PARK_TTL_SECONDS = float(os.getenv("WORKFLOW_POOL_PARK_TTL_SECONDS", "3600"))
+
+# Run scheduler: admission control and priorities in front of workflow runs
+RUN_SCHEDULER = os.getenv("RUN_SCHEDULER", "true").lower() in ("1", "true", "yes")
+RUN_MAX_CONCURRENCY = int(os.getenv("RUN_MAX_CONCURRENCY", "2"))
+# Per-workflow limits, e.g. "08MagSearchTools:1,06SearchAndSumm:2" (unlisted = global limit only)
+RUN_MAX_CONCURRENCY_PER_WORKFLOW = os.getenv("RUN_MAX_CONCURRENCY_PER_WORKFLOW", "")
+RUN_QUEUE_MAX_DEPTH = int(os.getenv("RUN_QUEUE_MAX_DEPTH", "32"))
+
+# Overall deadline of a DevUI / pooled workflow run in seconds (runners/cancellation.py); 0 = none
+RUN_DEADLINE_SECONDS = float(os.getenv("RUN_DEADLINE_SECONDS", "0"))
+
+# Distributed work queue (maf_jobs) consumed by worker.py
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "10"))
+# Consecutive failed heartbeats (database unreachable) before a worker gives up its run;
+# keep JOB_HEARTBEAT_SECONDS * this below JOB_STALE_SECONDS so it stops before a takeover
+JOB_HEARTBEAT_MAX_FAILURES = int(os.getenv("JOB_HEARTBEAT_MAX_FAILURES", "3"))
+# A running job whose heartbeat is older than this is taken over by another worker
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+# Offload pools for blocking tool work (tools/offload.py) and event-loop lag monitoring
+OFFLOAD_ENABLED = os.getenv("OFFLOAD_ENABLED", "true").lower() in ("1", "true", "yes")
+OFFLOAD_THREADS = int(os.getenv("OFFLOAD_THREADS", "8"))
+OFFLOAD_PROCESSES = int(os.getenv("OFFLOAD_PROCESSES", "2"))
+OFFLOAD_START_METHOD = os.getenv("OFFLOAD_START_METHOD", "spawn")
+LOOP_LAG_WARN_MS = float(os.getenv("LOOP_LAG_WARN_MS", "100"))
+
+# console.py: recent workflow events kept for diagnostics (ring buffer size)
+CONSOLE_EVENT_BUFFER = int(os.getenv("CONSOLE_EVENT_BUFFER", "200"))
+
+# HITL answers from an HTTP callback (console.py --responses http://...)
+HITL_CALLBACK_TIMEOUT = float(os.getenv("HITL_CALLBACK_TIMEOUT", "300"))
+
+# Checkpoint frequency (workflows/checkpoint_policy.py): every | every:N | hitl | expensive | interval:S, joined with "+"
+CHECKPOINT_POLICY = os.getenv("CHECKPOINT_POLICY", "every")
+# Per-workflow overrides, e.g. "07SearchHITL=hitl,08MagSearchTools=every:2+expensive"
+CHECKPOINT_POLICY_PER_WORKFLOW = os.getenv("CHECKPOINT_POLICY_PER_WORKFLOW", "")
+# Also record checkpoint sizes in the write stats (serializes every checkpoint once more)
+CHECKPOINT_MEASURE_BYTES = os.getenv("CHECKPOINT_MEASURE_BYTES", "false").lower() in ("1", "true", "yes")
+
+# Per-executor deadlines in seconds (workflows/deadlines.py): "executor_id_or_class=S,...", "*" = default, 0 = none.
+# Empty = no deadlines. Bound the short LLM executors, e.g. "title_generator=120,search_agent=180,search_executor=180";
+# size any "*" default for the slowest executor (wf08's collector fetches and summarizes up to 10 pages)
+EXECUTOR_DEADLINES = os.getenv("EXECUTOR_DEADLINES", "")
+
+# Memoized executor handlers (workflows/memoize.py); handlers still opt in with @memoized
+EXECUTOR_MEMO = os.getenv("EXECUTOR_MEMO", "false").lower() in ("1", "true", "yes")
+EXECUTOR_MEMO_PATH = os.getenv("EXECUTOR_MEMO_PATH", "./.cache/executor_results.sqlite")
+EXECUTOR_MEMO_MAX_ENTRIES = int(os.getenv("EXECUTOR_MEMO_MAX_ENTRIES", "256"))
+
+# Record / replay of model and MCP calls (clients/replay.py): off | record | replay
+REPLAY_MODE = os.getenv("REPLAY_MODE", "off").lower()
+REPLAY_TAPE = os.getenv("REPLAY_TAPE", "./.cache/run_tape.jsonl")
@@ -6,90 +6,157 @@ Used when DevUI cannot render HITL or interactive checkpoints.
 Usage:
   python console.py --wf SearchWithCheckpoint
   python console.py --wf SearchWithCheckpoint --resume <checkpoint_id>
+  python console.py --wf 07SearchHITL --resume latest
+  python console.py --wf 08MagSearchTools --resume-run <job_id>
+  python console.py --wf 07SearchHITL --responses approvals.json
+  python console.py --wf 06SearchAndSumm --batch inputs.jsonl --concurrency 4 --out results.jsonl
+  python console.py --wf 08MagSearchTools --record run.tape.jsonl
+  python console.py --wf 08MagSearchTools --replay run.tape.jsonl
+  python console.py --wf 08MagSearchTools --deadline 600
+
+Ctrl+C cancels the run: in-flight agent and MCP calls are stopped and a
+final checkpoint is saved to resume from. A second Ctrl+C exits at once.
 """
 
 import argparse
 import asyncio
+import signal
+
 from agent_framework import (
+    AgentRunUpdateEvent,
+    WorkflowFailedEvent,
     WorkflowOutputEvent,
-    RequestInfoEvent,
-    WorkflowStatusEvent,
-    WorkflowRunState,
 )
-from config import MCP_GATEWAY_URL
+from config import CONSOLE_EVENT_BUFFER, LOOP_LAG_WARN_MS, MCP_GATEWAY_URL
 
 from logger import get_logger
 from agents import AgentFactory
-from persistence.checkpoint_storage_factory import CheckpointStorageFactory
+from clients.hedged_chat_client import hedge_stats
+from clients.replay import configure_tape, current_tape, taped_mcp_client
+from metrics import LoopLagMonitor, usage_tracker
+from persistence.checkpoint_storage_factory import CheckpointStorageFactory, find_latest_checkpoint
+from persistence.usage_store import save_run_usage
+from runners.batch import run_batch
+from runners.cancellation import CancelToken
+from runners.hitl import HitlDriver, HitlState, ResponseSource, StdinResponses, response_source
 from tools import mcp_tools
 from tools.mcp_gateway_client import MCPGatewayClient
+from tools.offload import offload_service
+from workflows.checkpoint_policy import checkpoint_stats, format_checkpoint_stats
 from workflows.workflow_factory import WorkflowFactory
 
 logger = get_logger("maf.console")
 
 
 # ------------------------------------------------------------------------------
-# Utility: Collect workflow events and handle HITL interactions
+# Utility: Stream workflow events and handle HITL interactions
 # ------------------------------------------------------------------------------
 
-async def consume_events(stream):
-    """Collect and log events nicely."""
-    events = []
-    async for event in stream:
-        events.append(event)
-        logger.debug(f"Event received: {event.__class__.__name__}")
-    return events
+class EventPrinter:
+    """Print agent deltas as they stream and outputs as soon as they are yielded."""
 
+    def __init__(self):
+        self._streaming_from = None
 
-async def prompt_for_responses(requests):
-    """Ask the human for responses (via stdin)."""
-    responses = {}
-    for ev in requests:
-        req = ev.data
-        logger.warning("=== Human input required ===")
-        logger.warning(f"Prompt: {req.prompt}")
-        answer = input("🧠 Your answer: ").strip()
-        responses[ev.request_id] = answer
-    return responses
+    def __call__(self, event) -> None:
+        if isinstance(event, AgentRunUpdateEvent):
+            text = getattr(event.data, "text", None)
+            if text:
+                if self._streaming_from != event.executor_id:
+                    print(f"\n[{event.executor_id}] ", end="")
+                    self._streaming_from = event.executor_id
+                print(text, end="", flush=True)
+            return
+        if self._streaming_from is not None:
+            print()
+            self._streaming_from = None
 
+        if isinstance(event, WorkflowOutputEvent):
+            logger.info("✅ Workflow output:")
+            logger.info(str(event.data))
+        elif isinstance(event, WorkflowFailedEvent):
+            logger.error(f"❌ Workflow failed in {event.details.executor_id or 'workflow'}: {event.details.message}")
+        else:
+            logger.debug(f"Event received: {event.__class__.__name__}")
 
-async def run_interactive(workflow, initial_input: str = "Start workflow"):
-    """Run workflow interactively, handling HITL loops."""
-    events = await consume_events(workflow.run_stream(initial_input))
-
-    while True:
-        pending = [e for e in events if isinstance(e, RequestInfoEvent)]
 
-        for ev in events:
-            if isinstance(ev, WorkflowOutputEvent):
-                logger.info("✅ Workflow completed with output:")
-                logger.info(str(ev.data))
-                return
+def report(driver: HitlDriver) -> None:
+    run = driver.run_state
+    if run.state == HitlState.IDLE:
+        logger.info("(No pending HITL requests — workflow idle.)")
+    elif run.state == HitlState.CANCELLED:
+        logger.warning(f"Run {run.error}")
+        if run.checkpoint_id:
+            logger.warning(f"Resume with: python console.py --wf {driver.workflow.id} --resume {run.checkpoint_id}")
+    elif run.state == HitlState.FAILED:
+        logger.error(f"Run failed: {run.error}")
+        logger.warning(f"Last {min(20, len(driver.recent))} event(s):")
+        for event in list(driver.recent)[-20:]:
+            logger.warning(f"  {event!r}"[:300])
+    logger.debug(f"HITL: {run.rounds} round(s), {run.answered} answer(s), {run.events} event(s)")
 
-        if not pending:
-            for ev in events:
-                if isinstance(ev, WorkflowStatusEvent) and ev.state == WorkflowRunState.IDLE:
-                    logger.info("(No pending HITL requests — workflow idle.)")
-                    return
-            await asyncio.sleep(0.5)
-            continue
 
-        responses = await prompt_for_responses(pending)
-        events = await consume_events(workflow.send_responses_streaming(responses))
+async def run_interactive(
+    workflow,
+    initial_input: str = "Start workflow",
+    source: ResponseSource | None = None,
+    token: CancelToken | None = None,
+):
+    """Run workflow interactively, handling HITL loops."""
+    driver = HitlDriver(
+        workflow, source or StdinResponses(), on_event=EventPrinter(), history=CONSOLE_EVENT_BUFFER, token=token
+    )
+    await driver.run(initial_input)
+    report(driver)
 
 
-async def resume_from_checkpoint(workflow, checkpoint_storage, checkpoint_id: str):
+async def resume_from_checkpoint(
+    workflow,
+    checkpoint_storage,
+    checkpoint_id: str,
+    source: ResponseSource | None = None,
+    token: CancelToken | None = None,
+):
     logger.info(f"⏩ Resuming from checkpoint: {checkpoint_id}")
-    events = await consume_events(
-        workflow.run_stream_from_checkpoint(
-            checkpoint_id,
-            checkpoint_storage=checkpoint_storage,
-        )
+    driver = HitlDriver(
+        workflow, source or StdinResponses(), on_event=EventPrinter(), history=CONSOLE_EVENT_BUFFER, token=token
     )
-    pending = [e for e in events if isinstance(e, RequestInfoEvent)]
-    if pending:
-        responses = await prompt_for_responses(pending)
-        await consume_events(workflow.send_responses_streaming(responses))
+    await driver.resume(checkpoint_id, checkpoint_storage)
+    report(driver)
+
+
+def cancel_on_interrupt(token: CancelToken) -> None:
+    """First Ctrl+C cancels the run (with a final checkpoint), the next one exits."""
+    loop = asyncio.get_running_loop()
+
+    def interrupt() -> None:
+        loop.remove_signal_handler(signal.SIGINT)
+        logger.warning("Interrupted: stopping the run (Ctrl+C again to exit immediately)")
+        token.cancel("interrupted from the console")
+
+    try:
+        loop.add_signal_handler(signal.SIGINT, interrupt)
+    except NotImplementedError:
+        pass  # Windows: Ctrl+C still raises KeyboardInterrupt
+
+
+async def connect_mcp(mcp_client: MCPGatewayClient) -> None:
+    await mcp_client.connect()
+    await mcp_client.list_tools()
+    mcp_tools.init_mcp_client(mcp_client)
+
+
+async def resolve_checkpoint(storage_factory: CheckpointStorageFactory, args) -> str | None:
+    """Initialize checkpoint storage and turn --resume / --resume-run into a checkpoint ID."""
+    storage = await storage_factory.init_postgres()
+    if args.resume_run or args.resume == "latest":
+        run_id = args.resume_run or args.wf
+        checkpoint_id = await find_latest_checkpoint(storage, run_id)
+        if checkpoint_id is None:
+            raise SystemExit(f"No checkpoint found for '{run_id}'")
+        logger.info(f"🔎 Latest checkpoint of '{run_id}': {checkpoint_id}")
+        return checkpoint_id
+    return args.resume
 
 
 # ------------------------------------------------------------------------------
@@ -99,31 +166,93 @@ async def resume_from_checkpoint(workflow, checkpoint_storage, checkpoint_id: st
 async def main():
     parser = argparse.ArgumentParser(description="Run a workflow in console mode (with HITL support).")
     parser.add_argument("--wf", required=True, help="Workflow ID to run (e.g., SearchWithCheckpoint)")
-    parser.add_argument("--resume", help="Optional checkpoint ID to resume from")
+    parser.add_argument("--resume", help="Checkpoint ID to resume from, or 'latest' for the newest one of --wf")
+    parser.add_argument("--resume-run", metavar="WORKFLOW_ID",
+                        help="Resume the newest checkpoint of this run (checkpoint workflow_id, e.g. a worker job ID)")
     parser.add_argument("--input", help="Optional initial user input text", default="Join Microsoft Agent Framework With Docker Model Runner")
+    parser.add_argument("--batch", help="JSONL file of inputs to run through the workflow")
+    parser.add_argument("--concurrency", type=int, default=1, help="Batch items in flight at once")
+    parser.add_argument("--out", default="results.jsonl", help="Batch results file (appended; completed IDs are skipped)")
+    parser.add_argument("--responses", default="stdin",
+                        help="HITL answers: 'stdin', a JSON/JSONL answers file, or an http(s) callback URL")
+    parser.add_argument("--deadline", type=float, default=0,
+                        help="Cancel the run after this many seconds (with a final checkpoint to resume from)")
+    tape = parser.add_mutually_exclusive_group()
+    tape.add_argument("--record", metavar="TAPE", help="Record every model and MCP call of the run to this JSONL tape")
+    tape.add_argument("--replay", metavar="TAPE", help="Answer model and MCP calls from a recorded tape (no model server or gateway)")
     args = parser.parse_args()
+    if args.record or args.replay:
+        # Before any agent is built: the tape sits under every agent's chat client
+        configure_tape("record" if args.record else "replay", args.record or args.replay)
+    loop_monitor = LoopLagMonitor(warn_after=LOOP_LAG_WARN_MS / 1000).start()
 
-    # Initialize MCP + Agents
-    mcp_client = MCPGatewayClient(MCP_GATEWAY_URL)
-    await mcp_client.connect()
-    await mcp_client.list_tools()
-    mcp_tools.init_mcp_client(mcp_client)
-
+    mcp_client = taped_mcp_client(MCPGatewayClient(MCP_GATEWAY_URL))
+    source = response_source(args.responses)
     try:
-        # Initialize factories
+        # Agents are built lazily, with the workflow that uses them
         agent_factory = AgentFactory().init_defaults()
         storage_factory = CheckpointStorageFactory()
-        checkpoint_storage = await storage_factory.init_postgres()
-        # Build workflows
+        checkpoint_storage = storage_factory.create_postgres()
         wf_factory = WorkflowFactory(agent_factory, checkpoint_storage).init_defaults()
-        workflow = wf_factory.get(args.wf)
-        
-        if args.resume:
-            await resume_from_checkpoint(workflow, checkpoint_storage, args.resume)
-        else:
-            await run_interactive(workflow, args.input)
+
+        # Startup work is independent: connect Postgres (and find the checkpoint to
+        # resume) and build the workflow with its agents while the MCP session opens
+        warmup = asyncio.gather(
+            asyncio.to_thread(wf_factory.get, args.wf),
+            resolve_checkpoint(storage_factory, args),
+        )
+        try:
+            # In this task: the session's cancel scopes must be exited by the task that entered them
+            await connect_mcp(mcp_client)
+        except BaseException:
+            warmup.cancel()
+            raise
+        workflow, checkpoint_id = await warmup
+
+        if args.batch:
+            if wf_factory.scheduler:
+                # --concurrency is the batch's own bound: the scheduler must not silently lower it
+                wf_factory.scheduler.ensure_concurrency(args.wf, args.concurrency)
+            summary = await run_batch(
+                # Same pooled stand-in for every item: each run takes its own instance,
+                # admitted by the run scheduler behind interactive runs
+                lambda: wf_factory.pooled(args.wf, max_idle=args.concurrency, priority="batch"),
+                args.wf,
+                args.batch,
+                args.out,
+                concurrency=args.concurrency,
+                # Without --responses, runs that ask for input are recorded as "needs_input"
+                responses=None if args.responses == "stdin" else source,
+            )
+            logger.info("\n" + summary.format())
+            if wf_factory.scheduler:
+                logger.info("\n" + wf_factory.scheduler.format_stats())
+            return
+
+        # Attribute every agent call of this run (tokens, latency, TTFT)
+        token = CancelToken(args.wf, deadline_s=args.deadline or None)
+        cancel_on_interrupt(token)
+        with usage_tracker.track_run(args.wf, resumed_from=checkpoint_id) as run_usage:
+            if checkpoint_id:
+                await resume_from_checkpoint(workflow, checkpoint_storage, checkpoint_id, source, token)
+            else:
+                await run_interactive(workflow, args.input, source, token)
+        logger.info("\n" + run_usage.format_table())
+        if checkpoint_stats:
+            logger.info("Checkpoint writes:\n" + format_checkpoint_stats())
+        await save_run_usage(checkpoint_storage, run_usage)
+        if hedge_stats:
+            logger.info("Hedged requests: %s", hedge_stats)
+        if current_tape() is not None:
+            logger.info("Tape: %s", current_tape().stats())
     finally:
+        await source.close()
         await mcp_client.close()
+        await loop_monitor.stop()
+        logger.info(loop_monitor.format_stats())
+        if offload_service.stats():
+            logger.info("Offloaded work: %s", offload_service.stats())
+        offload_service.shutdown()
 
 
 if __name__ == "__main__":
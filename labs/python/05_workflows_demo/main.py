@@ -3,46 +3,101 @@
 
 from logger import get_logger
 from agent_framework.devui import DevServer
-from config import DEVUI_HOST, DEVUI_PORT, MCP_GATEWAY_URL
+from config import DEVUI_HOST, DEVUI_PORT, LOOP_LAG_WARN_MS, MCP_GATEWAY_URL, WORKFLOW_POOLING
 import asyncio
 import uvicorn
 
 from agents import AgentFactory
+from clients.replay import taped_mcp_client
+from metrics import LoopLagMonitor
 from persistence.checkpoint_storage_factory import CheckpointStorageFactory
+from runners.cancellation import active_runs
 from tools import mcp_tools
 from tools.mcp_gateway_client import MCPGatewayClient
+from tools.offload import offload_service
 from workflows.workflow_factory import WorkflowFactory
 
 
 logger = get_logger("maf.console")
 
+
+def add_run_control_routes(app, loop_monitor: LoopLagMonitor) -> None:
+    """
+    Runs in progress and their cancellation, next to the DevUI API:
+      GET  /maf/runs                       active runs (ID, workflow, age, deadline)
+      POST /maf/runs/{run_id}/cancel       cancel one run
+      POST /maf/runs/cancel?workflow_id=…  cancel every run of a workflow
+      GET  /maf/stats                      event-loop lag and offloaded (thread/process) work
+    A cancelled run stops its agent and MCP calls and saves a final
+    checkpoint; the DevUI stream ends with the checkpoint ID to resume from.
+    """
+    from fastapi import HTTPException
+
+    @app.get("/maf/runs")
+    async def list_runs() -> dict:
+        return {"runs": active_runs.snapshot()}
+
+    @app.post("/maf/runs/{run_id}/cancel")
+    async def cancel_run(run_id: str) -> dict:
+        cancelled = active_runs.cancel(run_id=run_id, reason="cancelled from DevUI")
+        if not cancelled:
+            raise HTTPException(status_code=404, detail=f"No active run '{run_id}'")
+        return {"cancelled": cancelled}
+
+    @app.post("/maf/runs/cancel")
+    async def cancel_workflow_runs(workflow_id: str) -> dict:
+        return {"cancelled": active_runs.cancel(workflow_id=workflow_id, reason="cancelled from DevUI")}
+
+    @app.get("/maf/stats")
+    async def run_stats() -> dict:
+        return {"event_loop": loop_monitor.stats(), "offload": offload_service.stats()}
+
+    # DevUI mounts its static UI at "/", which would shadow routes added after it
+    ours = [route for route in app.router.routes if getattr(route, "path", "").startswith("/maf/")]
+    others = [route for route in app.router.routes if route not in ours]
+    app.router.routes[:] = ours + others
+
+
 async def main():
-    
+    # Logs every stall of the shared event loop (inline blocking work delays all users)
+    loop_monitor = LoopLagMonitor(warn_after=LOOP_LAG_WARN_MS / 1000).start()
+
     # MCP Gateway initialization
-    mcp_client = MCPGatewayClient(MCP_GATEWAY_URL)
+    mcp_client = taped_mcp_client(MCPGatewayClient(MCP_GATEWAY_URL))
     await mcp_client.connect()
     await mcp_client.list_tools()
 
     # Make it available to all MCP tools
     mcp_tools.init_mcp_client(mcp_client)
 
-    # Init
-    factory = AgentFactory().init_defaults()
+    # Init (DevUI lists every agent, so build them all up front)
+    factory = AgentFactory().init_defaults(warmup=True)
     storage_factory = CheckpointStorageFactory()
     checkpoint_storage = await storage_factory.init_postgres()
 
-    # Build all workflows
+    # Register all workflows (built by `all()` below)
     wf_factory = WorkflowFactory(factory, checkpoint_storage).init_defaults()
 
     # Register in DevUI
     server = DevServer(host=DEVUI_HOST, port=DEVUI_PORT, ui_enabled=True)
-    server.register_entities([*factory.all(), *wf_factory.all()])
+    # Pooled workflows: concurrent runs of the same workflow get separate instances,
+    # admitted by the factory's run scheduler (RUN_MAX_CONCURRENCY, RUN_QUEUE_MAX_DEPTH)
+    # Every workflow run gets its own usage aggregate, saved next to its checkpoints
+    server.register_entities([*factory.all(), *wf_factory.all(pooled=WORKFLOW_POOLING)])
     
     # Start DevUI server
     app = server.get_app()
+    add_run_control_routes(app, loop_monitor)
 
     config = uvicorn.Config(app=app, host=DEVUI_HOST, port=DEVUI_PORT, loop="asyncio", log_level="info")
-    await uvicorn.Server(config).serve()
+    try:
+        await uvicorn.Server(config).serve()
+    finally:
+        await loop_monitor.stop()
+        logger.info(loop_monitor.format_stats())
+        if offload_service.stats():
+            logger.info("Offloaded work: %s", offload_service.stats())
+        offload_service.shutdown()
 
 if __name__ == "__main__":
     try:
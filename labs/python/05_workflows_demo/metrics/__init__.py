@@ -0,0 +1,13 @@
+# metrics/__init__.py
+from .event_loop import LoopLagMonitor
+from .usage import RunUsage, UsageRecord, UsageStats, UsageTracker, instrument_executors, usage_tracker
+
+__all__ = [
+    "LoopLagMonitor",
+    "RunUsage",
+    "UsageRecord",
+    "UsageStats",
+    "UsageTracker",
+    "instrument_executors",
+    "usage_tracker",
+]
@@ -0,0 +1,87 @@
+# metrics/event_loop.py
+"""
+Event-loop blocking monitor.
+
+A background task sleeps for `interval` seconds and measures how late it
+wakes up. Any lateness is time during which the loop ran something
+synchronous (a tool doing disk or CPU work inline, a big json.dumps...)
+and no other run, stream or heartbeat could make progress.
+
+Stalls longer than `warn_after` are counted and logged; the total blocked
+time is part of `stats()`. Run with PYTHONASYNCIODEBUG=1 to have asyncio
+name the slow callbacks themselves.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any
+
+from logger import get_logger
+
+logger = get_logger("maf.metrics.event_loop")
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = 0.05, warn_after: float = 0.1, history: int = 2000):
+        self.interval = interval
+        self.warn_after = warn_after
+        self._lags: deque[float] = deque(maxlen=history)
+        self._task: asyncio.Task | None = None
+        self.blocked_s = 0.0
+        self.stalls = 0
+        self.max_lag_s = 0.0
+        self.started_at: float | None = None
+
+    def start(self) -> "LoopLagMonitor":
+        if self._task is None:
+            self.started_at = time.perf_counter()
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="maf-loop-lag-monitor")
+        return self
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            t0 = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - t0 - self.interval)
+            self._lags.append(lag)
+            self.max_lag_s = max(self.max_lag_s, lag)
+            if lag >= self.warn_after:
+                self.stalls += 1
+                self.blocked_s += lag
+                logger.warning("🐢 Event loop blocked for %.0f ms", lag * 1000)
+
+    def stats(self) -> dict[str, Any]:
+        lags = sorted(self._lags)
+        uptime = time.perf_counter() - self.started_at if self.started_at else 0.0
+        return {
+            "samples": len(lags),
+            "stalls": self.stalls,
+            "blocked_s": round(self.blocked_s, 3),
+            "blocked_pct": round(self.blocked_s / uptime * 100, 2) if uptime else 0.0,
+            "lag_p50_ms": round(_percentile(lags, 50) * 1000, 1) if lags else None,
+            "lag_p99_ms": round(_percentile(lags, 99) * 1000, 1) if lags else None,
+            "max_lag_ms": round(self.max_lag_s * 1000, 1),
+        }
+
+    def format_stats(self) -> str:
+        s = self.stats()
+        if not s["samples"]:
+            return "Event loop: no samples"
+        return (
+            f"Event loop: blocked {s['blocked_s']:.2f}s ({s['blocked_pct']:.1f}%) in {s['stalls']} stall(s) "
+            f"≥{self.warn_after * 1000:.0f} ms; lag p50 {s['lag_p50_ms']} ms, p99 {s['lag_p99_ms']} ms, "
+            f"max {s['max_lag_ms']} ms"
+        )
@@ -0,0 +1,234 @@
+# metrics/usage.py
+"""
+Token / latency accounting for agent calls.
+
+Every chat call made by an agent goes through a UsageTrackingChatClient
+(see clients/usage_tracking_chat_client.py), which produces one UsageRecord:
+prompt/completion tokens, latency and, for streams, time-to-first-token.
+
+Records are attributed through context variables:
+  - the executor currently running (set by `instrument_executors()`, which
+    wraps `Executor.execute` once for the whole process),
+  - the workflow run opened with `usage_tracker.track_run(...)`.
+
+asyncio tasks copy the context they are created in, so agent calls made by
+concurrent executors or gathered sub-tasks keep the right attribution.
+"""
+
+import contextvars
+import functools
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Iterator
+
+from agent_framework import Executor
+
+from logger import get_logger
+
+logger = get_logger("maf.metrics.usage")
+
+_current_executor: contextvars.ContextVar[str | None] = contextvars.ContextVar("maf_executor", default=None)
+_current_run: contextvars.ContextVar["RunUsage | None"] = contextvars.ContextVar("maf_run_usage", default=None)
+
+
+# ------------------------------------------------------------
+# Records and aggregates
+# ------------------------------------------------------------
+@dataclass
+class UsageRecord:
+    agent: str | None
+    executor: str | None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    latency_s: float = 0.0
+    ttft_s: float | None = None
+    streamed: bool = False
+    cache_hit: bool = False
+    # True when the server reported no usage and tokens were estimated from text
+    estimated: bool = False
+    error: str | None = None
+
+
+@dataclass
+class UsageStats:
+    calls: int = 0
+    cache_hits: int = 0
+    errors: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    estimated_calls: int = 0
+    latency_s: float = 0.0
+    ttft_s: float = 0.0
+    ttft_samples: int = 0
+
+    def add(self, record: UsageRecord) -> None:
+        self.calls += 1
+        if record.error:
+            self.errors += 1
+        if record.cache_hit:
+            # Replayed answers cost no model time: count them, not their tokens
+            self.cache_hits += 1
+            return
+        self.input_tokens += record.input_tokens
+        self.output_tokens += record.output_tokens
+        self.estimated_calls += int(record.estimated)
+        self.latency_s += record.latency_s
+        if record.ttft_s is not None:
+            self.ttft_s += record.ttft_s
+            self.ttft_samples += 1
+
+    def to_dict(self) -> dict[str, Any]:
+        model_calls = self.calls - self.cache_hits
+        return {
+            "calls": self.calls,
+            "cache_hits": self.cache_hits,
+            "errors": self.errors,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "total_tokens": self.input_tokens + self.output_tokens,
+            "estimated_calls": self.estimated_calls,
+            "latency_s": round(self.latency_s, 3),
+            "avg_latency_s": round(self.latency_s / model_calls, 3) if model_calls else None,
+            "avg_ttft_s": round(self.ttft_s / self.ttft_samples, 3) if self.ttft_samples else None,
+        }
+
+
+@dataclass
+class RunUsage:
+    """Usage of one workflow run, broken down by executor and by agent."""
+
+    workflow_id: str
+    run_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    resumed_from: str | None = None
+    started_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    finished_at: str | None = None
+    wall_time_s: float = 0.0
+    # Time spent waiting for a RunScheduler slot (included in wall time)
+    queue_time_s: float = 0.0
+    total: UsageStats = field(default_factory=UsageStats)
+    by_executor: dict[str, UsageStats] = field(default_factory=dict)
+    by_agent: dict[str, UsageStats] = field(default_factory=dict)
+    # Wall time inside each executor (all invocations), from instrument_executors()
+    executor_time_s: dict[str, float] = field(default_factory=dict)
+    _t0: float = field(default_factory=time.perf_counter, repr=False)
+
+    def add(self, record: UsageRecord) -> None:
+        self.total.add(record)
+        self.by_executor.setdefault(record.executor or "(none)", UsageStats()).add(record)
+        self.by_agent.setdefault(record.agent or "(unnamed)", UsageStats()).add(record)
+
+    def add_executor_time(self, executor_id: str, seconds: float) -> None:
+        self.executor_time_s[executor_id] = self.executor_time_s.get(executor_id, 0.0) + seconds
+
+    def finish(self) -> None:
+        self.finished_at = datetime.now(timezone.utc).isoformat()
+        self.wall_time_s = time.perf_counter() - self._t0
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            "workflow_id": self.workflow_id,
+            "resumed_from": self.resumed_from,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "wall_time_s": round(self.wall_time_s, 3),
+            "queue_time_s": round(self.queue_time_s, 3),
+            "total": self.total.to_dict(),
+            "by_executor": {k: v.to_dict() for k, v in self.by_executor.items()},
+            "by_agent": {k: v.to_dict() for k, v in self.by_agent.items()},
+            "executor_time_s": {k: round(v, 3) for k, v in self.executor_time_s.items()},
+        }
+
+    def format_table(self) -> str:
+        queued = f", queued {self.queue_time_s:.1f}s" if self.queue_time_s else ""
+        lines = [
+            f"Usage for run {self.run_id} ({self.workflow_id}), wall time {self.wall_time_s:.1f}s{queued}",
+            f"{'executor':<24} {'calls':>5} {'cached':>6} {'in tok':>8} {'out tok':>8} {'latency':>9} {'ttft':>7}",
+        ]
+        rows = sorted(self.by_executor.items(), key=lambda kv: kv[1].latency_s, reverse=True)
+        for name, stats in rows + [("TOTAL", self.total)]:
+            d = stats.to_dict()
+            ttft = f"{d['avg_ttft_s']:.2f}s" if d["avg_ttft_s"] is not None else "-"
+            lines.append(
+                f"{name:<24} {d['calls']:>5} {d['cache_hits']:>6} {d['input_tokens']:>8} "
+                f"{d['output_tokens']:>8} {d['latency_s']:>8.1f}s {ttft:>7}"
+            )
+        return "\n".join(lines)
+
+
+# ------------------------------------------------------------
+# Tracker
+# ------------------------------------------------------------
+class UsageTracker:
+    """Process-wide sink for UsageRecords."""
+
+    def __init__(self):
+        # Calls made outside any tracked run (DevUI agent chats, ad-hoc agent runs)
+        self.untracked = RunUsage(workflow_id="(untracked)", run_id="(untracked)")
+
+    def record(self, record: UsageRecord) -> None:
+        record.executor = record.executor or _current_executor.get()
+        run = _current_run.get() or self.untracked
+        run.add(record)
+        logger.debug(
+            "[%s/%s] in=%d out=%d latency=%.2fs ttft=%s%s",
+            record.executor, record.agent, record.input_tokens, record.output_tokens, record.latency_s,
+            f"{record.ttft_s:.2f}s" if record.ttft_s is not None else "-",
+            " (cache)" if record.cache_hit else "",
+        )
+
+    @contextmanager
+    def track_run(self, workflow_id: str, resumed_from: str | None = None) -> Iterator[RunUsage]:
+        """Attribute every agent call made inside the block to a new RunUsage."""
+        run = RunUsage(workflow_id=workflow_id, resumed_from=resumed_from)
+        token = _current_run.set(run)
+        try:
+            yield run
+        finally:
+            try:
+                _current_run.reset(token)
+            except ValueError:
+                pass  # a streamed run finalized from another context
+            run.finish()
+
+    @staticmethod
+    def current_run() -> RunUsage | None:
+        return _current_run.get()
+
+    @staticmethod
+    def current_executor() -> str | None:
+        return _current_executor.get()
+
+
+usage_tracker = UsageTracker()
+
+
+# ------------------------------------------------------------
+# Executor attribution
+# ------------------------------------------------------------
+def instrument_executors() -> None:
+    """
+    Wrap `Executor.execute` once so agent calls know which executor made them,
+    and executor wall time is added to the current run.
+    """
+    if getattr(Executor.execute, "_maf_usage_instrumented", False):
+        return
+    original = Executor.execute
+
+    @functools.wraps(original)
+    async def execute(self, *args, **kwargs):
+        token = _current_executor.set(self.id)
+        t0 = time.perf_counter()
+        try:
+            return await original(self, *args, **kwargs)
+        finally:
+            _current_executor.reset(token)
+            run = _current_run.get()
+            if run is not None:
+                run.add_executor_time(self.id, time.perf_counter() - t0)
+
+    execute._maf_usage_instrumented = True
+    Executor.execute = execute
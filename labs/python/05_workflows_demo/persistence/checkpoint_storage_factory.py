@@ -30,16 +30,37 @@ class CheckpointStorageFactory:
         logger.info(f"✅ Using FileCheckpointStorage at {path}")
         return self._storage
 
+    def create_postgres(self) -> PostgresCheckpointStorage:
+        """
+        PostgreSQL storage object without connecting yet, so workflows can be
+        built against it while `initialize()` runs.
+        """
+        dsn = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASS}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+        self._storage = PostgresCheckpointStorage(dsn)
+        return self._storage
+
     async def init_postgres(self):
         """Use PostgreSQL-backed checkpointing (persistent, recommended)."""
-        dsn = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASS}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
-        storage = PostgresCheckpointStorage(dsn)
+        storage = self._storage if isinstance(self._storage, PostgresCheckpointStorage) else self.create_postgres()
         await storage.initialize()
-        self._storage = storage
         logger.info(f"✅ Using PostgresCheckpointStorage on {POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}")
-        return self._storage
+        return storage
 
     def get(self):
         if not self._storage:
             raise RuntimeError("Checkpoint storage not initialized. Call init_*() first.")
         return self._storage
+
+
+async def find_latest_checkpoint(storage, workflow_id: str) -> str | None:
+    """
+    ID of the newest checkpoint saved under `workflow_id`. Postgres answers
+    with one indexed query; other backends have to load and compare every
+    checkpoint of the run.
+    """
+    if isinstance(storage, PostgresCheckpointStorage):
+        return await storage.latest_checkpoint_id(workflow_id)
+    checkpoints = await storage.list_checkpoints(workflow_id)
+    if not checkpoints:
+        return None
+    return max(checkpoints, key=lambda cp: cp.timestamp).checkpoint_id
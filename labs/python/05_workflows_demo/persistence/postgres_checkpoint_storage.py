@@ -3,6 +3,9 @@ PostgreSQL-based CheckpointStorage for Microsoft Agent Framework Workflows.
 
 Creates the database (if missing) and ensures maf_checkpoints table exists.
 Stores entire WorkflowCheckpoint objects as JSONB payloads.
+
+Per-run token/latency aggregates (metrics/usage.py) live next to the
+checkpoints in maf_run_usage.
 """
 
 import logging
@@ -14,6 +17,7 @@ from dataclasses import asdict
 from sqlalchemy import (
     Table,
     Column,
+    Index,
     String,
     JSON,
     DateTime,
@@ -42,6 +46,22 @@ checkpoints_table = Table(
     Column("created_at", DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)),
 )
 
+# Newest checkpoint of a run (resume latest) is one index probe, not a scan of the payloads
+checkpoints_latest_index = Index(
+    "ix_maf_checkpoints_workflow_created",
+    checkpoints_table.c.workflow_id,
+    checkpoints_table.c.created_at.desc(),
+)
+
+run_usage_table = Table(
+    "maf_run_usage",
+    metadata,
+    Column("run_id", String, primary_key=True),
+    Column("workflow_id", String, index=True),
+    Column("data", JSON, nullable=False),
+    Column("created_at", DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)),
+)
+
 
 class PostgresCheckpointStorage(CheckpointStorage):
     """Lightweight PostgreSQL CheckpointStorage using SQLAlchemy async engine."""
@@ -58,6 +78,9 @@ class PostgresCheckpointStorage(CheckpointStorage):
         self.engine = await self._ensure_database_and_engine()
         async with self.engine.begin() as conn:
             await conn.run_sync(metadata.create_all)
+            # create_all only adds indexes together with a new table; databases created
+            # before the index existed get it here
+            await conn.run_sync(lambda sync_conn: checkpoints_latest_index.create(sync_conn, checkfirst=True))
         logger.info("✅ PostgresCheckpointStorage initialized and ready")
 
     async def _ensure_database_and_engine(self) -> AsyncEngine:
@@ -155,6 +178,22 @@ class PostgresCheckpointStorage(CheckpointStorage):
             rows = [WorkflowCheckpoint.from_dict(r[0]) for r in result.all()]
             return rows
 
+    async def latest_checkpoint_id(self, workflow_id: str) -> Optional[str]:
+        """
+        ID of the newest checkpoint of a workflow run (the workflow ID for
+        console/DevUI runs, the job ID for worker runs), without loading any
+        payload. Served by ix_maf_checkpoints_workflow_created.
+        """
+        assert self.engine is not None
+        async with self.engine.connect() as conn:
+            result = await conn.execute(
+                select(checkpoints_table.c.checkpoint_id)
+                .where(checkpoints_table.c.workflow_id == workflow_id)
+                .order_by(checkpoints_table.c.created_at.desc())
+                .limit(1)
+            )
+            return result.scalar_one_or_none()
+
     async def delete_checkpoint(self, checkpoint_id: str) -> bool:
         """Delete a checkpoint by ID."""
         assert self.engine is not None
@@ -169,6 +208,33 @@ class PostgresCheckpointStorage(CheckpointStorage):
             logger.debug(f"🧹 Deleted checkpoint {checkpoint_id}")
         return deleted
 
+    # --------------------------------------------------------------------------
+    # Run usage aggregates
+    # --------------------------------------------------------------------------
+    async def save_run_usage(self, run_id: str, workflow_id: str, summary: dict) -> None:
+        assert self.engine is not None, "Storage not initialized"
+        async with self.engine.begin() as conn:
+            stmt = (
+                pg_insert(run_usage_table)
+                .values(run_id=run_id, workflow_id=workflow_id, data=summary, created_at=datetime.now(timezone.utc))
+                .on_conflict_do_update(
+                    index_elements=[run_usage_table.c.run_id],
+                    set_={"data": summary, "created_at": func.now()},
+                )
+            )
+            await conn.execute(stmt)
+        logger.debug("📊 Saved usage for run %s", run_id)
+
+    async def list_run_usage(self, workflow_id: Optional[str] = None, limit: int = 20) -> List[dict]:
+        """Most recent run usage summaries, newest first."""
+        assert self.engine is not None
+        async with self.engine.connect() as conn:
+            stmt = select(run_usage_table.c.data).order_by(run_usage_table.c.created_at.desc()).limit(limit)
+            if workflow_id:
+                stmt = stmt.where(run_usage_table.c.workflow_id == workflow_id)
+            result = await conn.execute(stmt)
+            return [r[0] for r in result.all()]
+
     async def close(self):
         if self.engine:
             await self.engine.dispose()
@@ -0,0 +1,247 @@
+"""
+PostgreSQL work queue for workflow runs (maf_jobs, next to maf_checkpoints).
+
+Producers `enqueue()` a workflow ID and its input; workers on any number of
+nodes `claim()` jobs with `SELECT ... FOR UPDATE SKIP LOCKED`, so each job
+goes to exactly one worker without a coordinator.
+
+A running job carries the claiming worker's ID and a heartbeat. When the
+heartbeat is older than `stale_after` seconds the worker is presumed dead
+and the job can be claimed again (a takeover); the new worker resumes it
+from the job's latest checkpoint (see runners/worker.py). After
+`max_attempts` claims the job is marked failed instead.
+
+Timestamps are compared on the database clock, so node clocks may drift.
+"""
+
+import logging
+import uuid
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, List, Optional
+
+from sqlalchemy import (
+    JSON,
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    String,
+    Table,
+    func,
+    or_,
+    and_,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from persistence.postgres_checkpoint_storage import PostgresCheckpointStorage, metadata
+
+logger = logging.getLogger("maf.persistence.jobs")
+
+jobs_table = Table(
+    "maf_jobs",
+    metadata,
+    Column("job_id", String, primary_key=True),
+    # WorkflowFactory ID (e.g. "08MagSearchTools")
+    Column("workflow_id", String, nullable=False),
+    Column("input", JSON),
+    # queued | running | done | needs_input | failed
+    Column("status", String, nullable=False, default="queued"),
+    # Lower runs first (same ranks as runners/scheduler.PRIORITIES)
+    Column("priority", Integer, nullable=False, default=1),
+    Column("attempts", Integer, nullable=False, default=0),
+    Column("max_attempts", Integer, nullable=False, default=3),
+    Column("worker_id", String),
+    Column("heartbeat_at", DateTime(timezone=True)),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("started_at", DateTime(timezone=True)),
+    Column("finished_at", DateTime(timezone=True)),
+    Column("result", JSON),
+    Column("error", String),
+    Index("ix_maf_jobs_claim", "status", "priority", "created_at"),
+)
+
+
+@dataclass
+class Job:
+    job_id: str
+    workflow_id: str
+    input: Any
+    attempts: int
+    max_attempts: int
+    # True when this claim took the job over from a worker that stopped heartbeating
+    takeover: bool = False
+
+
+class PostgresJobQueue:
+    """Job table operations; shares the engine of a PostgresCheckpointStorage."""
+
+    def __init__(self, storage: PostgresCheckpointStorage, stale_after: float = 60.0):
+        self.storage = storage
+        self.stale_after = stale_after
+
+    @property
+    def engine(self):
+        assert self.storage.engine is not None, "Storage not initialized"
+        return self.storage.engine
+
+    async def initialize(self) -> None:
+        async with self.engine.begin() as conn:
+            await conn.run_sync(lambda sync_conn: metadata.create_all(sync_conn, tables=[jobs_table]))
+        logger.info("✅ Job queue table maf_jobs ready")
+
+    # --------------------------------------------------------------------------
+    # Producer side
+    # --------------------------------------------------------------------------
+    async def enqueue(
+        self,
+        workflow_id: str,
+        input: Any,
+        priority: int = 1,
+        max_attempts: int = 3,
+        job_id: Optional[str] = None,
+    ) -> str:
+        """Add a job; re-enqueueing an existing job_id is a no-op."""
+        job_id = job_id or str(uuid.uuid4())
+        async with self.engine.begin() as conn:
+            await conn.execute(
+                pg_insert(jobs_table)
+                .values(
+                    job_id=job_id,
+                    workflow_id=workflow_id,
+                    input=input,
+                    status="queued",
+                    priority=priority,
+                    attempts=0,
+                    max_attempts=max_attempts,
+                )
+                .on_conflict_do_nothing(index_elements=[jobs_table.c.job_id])
+            )
+        logger.debug("📥 Enqueued job %s (%s)", job_id, workflow_id)
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        async with self.engine.connect() as conn:
+            result = await conn.execute(select(jobs_table).where(jobs_table.c.job_id == job_id))
+            row = result.mappings().first()
+            return dict(row) if row else None
+
+    async def counts(self) -> dict[str, int]:
+        async with self.engine.connect() as conn:
+            result = await conn.execute(
+                select(jobs_table.c.status, func.count()).group_by(jobs_table.c.status)
+            )
+            return {status: n for status, n in result.all()}
+
+    # --------------------------------------------------------------------------
+    # Worker side
+    # --------------------------------------------------------------------------
+    async def claim(self, worker_id: str, workflow_ids: Optional[List[str]] = None) -> Optional[Job]:
+        """Lock and take the next queued (or abandoned) job, or return None."""
+        stale_before = func.now() - timedelta(seconds=self.stale_after)
+        while True:
+            async with self.engine.begin() as conn:
+                stmt = (
+                    select(jobs_table)
+                    .where(
+                        or_(
+                            jobs_table.c.status == "queued",
+                            and_(jobs_table.c.status == "running", jobs_table.c.heartbeat_at < stale_before),
+                        )
+                    )
+                    .order_by(jobs_table.c.priority, jobs_table.c.created_at)
+                    .limit(1)
+                    .with_for_update(skip_locked=True)
+                )
+                if workflow_ids:
+                    stmt = stmt.where(jobs_table.c.workflow_id.in_(workflow_ids))
+                row = (await conn.execute(stmt)).mappings().first()
+                if row is None:
+                    return None
+
+                takeover = row["status"] == "running"
+                if row["attempts"] >= row["max_attempts"]:
+                    await conn.execute(
+                        update(jobs_table)
+                        .where(jobs_table.c.job_id == row["job_id"])
+                        .values(
+                            status="failed",
+                            finished_at=func.now(),
+                            error=f"abandoned by worker {row['worker_id']} after {row['attempts']} attempt(s)",
+                        )
+                    )
+                    logger.warning("💀 Job %s exhausted its attempts, marked failed", row["job_id"])
+                    continue  # commit and look for the next job
+
+                await conn.execute(
+                    update(jobs_table)
+                    .where(jobs_table.c.job_id == row["job_id"])
+                    .values(
+                        status="running",
+                        worker_id=worker_id,
+                        heartbeat_at=func.now(),
+                        attempts=jobs_table.c.attempts + 1,
+                        started_at=func.coalesce(jobs_table.c.started_at, func.now()),
+                    )
+                )
+            if takeover:
+                logger.warning("🔁 Worker %s took over job %s from %s", worker_id, row["job_id"], row["worker_id"])
+            return Job(
+                job_id=row["job_id"],
+                workflow_id=row["workflow_id"],
+                input=row["input"],
+                attempts=row["attempts"] + 1,
+                max_attempts=row["max_attempts"],
+                takeover=takeover,
+            )
+
+    async def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """Refresh the heartbeat; False means the job is no longer ours."""
+        async with self.engine.begin() as conn:
+            res = await conn.execute(
+                update(jobs_table)
+                .where(
+                    jobs_table.c.job_id == job_id,
+                    jobs_table.c.worker_id == worker_id,
+                    jobs_table.c.status == "running",
+                )
+                .values(heartbeat_at=func.now())
+            )
+        return res.rowcount > 0
+
+    async def finish(
+        self,
+        job_id: str,
+        worker_id: str,
+        status: str,
+        result: Optional[dict] = None,
+        error: Optional[str] = None,
+    ) -> bool:
+        """Record the outcome, unless another worker has taken the job over meanwhile."""
+        async with self.engine.begin() as conn:
+            res = await conn.execute(
+                update(jobs_table)
+                .where(jobs_table.c.job_id == job_id, jobs_table.c.worker_id == worker_id)
+                .values(status=status, result=result, error=error, finished_at=func.now())
+            )
+        return res.rowcount > 0
+
+    async def retry(self, job_id: str, worker_id: str, error: Optional[str] = None) -> None:
+        """Requeue a job whose attempt failed; the attempt stays counted."""
+        async with self.engine.begin() as conn:
+            await conn.execute(
+                update(jobs_table)
+                .where(jobs_table.c.job_id == job_id, jobs_table.c.worker_id == worker_id)
+                .values(status="queued", worker_id=None, heartbeat_at=None, error=error)
+            )
+
+    async def release(self, job_id: str, worker_id: str) -> None:
+        """Put a claimed job back in the queue (worker shutting down); the attempt is not counted."""
+        async with self.engine.begin() as conn:
+            await conn.execute(
+                update(jobs_table)
+                .where(jobs_table.c.job_id == job_id, jobs_table.c.worker_id == worker_id)
+                .values(status="queued", worker_id=None, heartbeat_at=None, attempts=jobs_table.c.attempts - 1)
+            )
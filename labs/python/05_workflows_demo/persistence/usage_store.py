@@ -0,0 +1,92 @@
+# persistence/usage_store.py
+"""
+Persist per-run usage aggregates next to the checkpoints of the active
+storage backend:
+
+  - PostgresCheckpointStorage → maf_run_usage table,
+  - FileCheckpointStorage     → <storage_path>/usage/<run_id>.json,
+  - anything else (in-memory) → only logged.
+
+`track_run_usage()` gives a workflow's streaming runs a usage run of their
+own when the caller opened none (DevUI), so their agent calls are not
+lumped into the "(untracked)" bucket.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterable, AsyncIterator
+
+from metrics.usage import RunUsage, usage_tracker
+
+logger = logging.getLogger("maf.persistence.usage")
+
+
+async def save_run_usage(checkpoint_storage, run: RunUsage) -> None:
+    try:
+        summary = run.summary()
+        if hasattr(checkpoint_storage, "save_run_usage"):
+            await checkpoint_storage.save_run_usage(run.run_id, run.workflow_id, summary)
+        elif hasattr(checkpoint_storage, "storage_path"):
+            path = checkpoint_storage.storage_path / "usage" / f"{run.run_id}.json"
+            await asyncio.to_thread(_write_json, path, summary)
+        else:
+            logger.debug("Checkpoint storage %s keeps no usage; run %s not persisted",
+                         type(checkpoint_storage).__name__, run.run_id)
+            return
+        logger.info("📊 Saved usage for run %s (%s)", run.run_id, run.workflow_id)
+    except Exception as e:
+        # Accounting must never fail the workflow run itself
+        logger.warning("Could not save usage for run %s: %s", run.run_id, e)
+
+
+def _write_json(path, data: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+
+async def tracked_run_stream(
+    checkpoint_storage, workflow_id: str, stream: AsyncIterable, resumed_from: str | None = None
+) -> AsyncIterator[Any]:
+    """
+    Yield the events of `stream` inside a new usage run, saved once the stream
+    ends, fails or is abandoned (cancelled runs and DevUI disconnects included).
+    Callers that already track a run (console, batch, worker) keep theirs.
+    """
+    if usage_tracker.current_run() is not None:
+        async for event in stream:
+            yield event
+        return
+    run_usage = None
+    try:
+        with usage_tracker.track_run(workflow_id, resumed_from=resumed_from) as run_usage:
+            async for event in stream:
+                yield event
+    finally:
+        if run_usage is not None:
+            # Never raises: accounting must not replace the run's own outcome
+            await save_run_usage(checkpoint_storage, run_usage)
+
+
+def track_run_usage(workflow, workflow_id: str, checkpoint_storage) -> None:
+    """Run the instance's streaming entry points (the ones DevUI calls) through `tracked_run_stream()`."""
+    if getattr(workflow, "_maf_usage_tracked", False):
+        return
+    run_stream = workflow.run_stream
+    run_stream_from_checkpoint = workflow.run_stream_from_checkpoint
+    send_responses_streaming = workflow.send_responses_streaming
+
+    def tracked_run(message: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        return tracked_run_stream(checkpoint_storage, workflow_id, run_stream(message, **kwargs))
+
+    def tracked_resume(checkpoint_id: str, **kwargs: Any) -> AsyncIterator[Any]:
+        stream = run_stream_from_checkpoint(checkpoint_id, **kwargs)
+        return tracked_run_stream(checkpoint_storage, workflow_id, stream, resumed_from=checkpoint_id)
+
+    def tracked_responses(responses: dict[str, Any]) -> AsyncIterator[Any]:
+        return tracked_run_stream(checkpoint_storage, workflow_id, send_responses_streaming(responses))
+
+    workflow.run_stream = tracked_run
+    workflow.run_stream_from_checkpoint = tracked_resume
+    workflow.send_responses_streaming = tracked_responses
+    workflow._maf_usage_tracked = True
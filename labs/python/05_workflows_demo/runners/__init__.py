@@ -0,0 +1,21 @@
+# runners/__init__.py
+from .batch import BatchSummary, run_batch
+from .cancellation import CancelToken, RunCancelled, active_runs, current_cancel_token, raise_if_cancelled
+from .hitl import HitlDriver, ResponseSource, response_source
+from .scheduler import RunScheduler, SchedulerRejected, build_run_scheduler
+
+__all__ = [
+    "BatchSummary",
+    "CancelToken",
+    "HitlDriver",
+    "ResponseSource",
+    "RunCancelled",
+    "RunScheduler",
+    "SchedulerRejected",
+    "active_runs",
+    "build_run_scheduler",
+    "current_cancel_token",
+    "raise_if_cancelled",
+    "response_source",
+    "run_batch",
+]
@@ -0,0 +1,262 @@
+# runners/batch.py
+"""
+Batch mode for console.py: push many inputs through one workflow.
+
+  python console.py --wf 06SearchAndSumm --batch inputs.jsonl --concurrency 4 --out results.jsonl
+
+Input lines are JSON objects: {"id": "...", "input": "..."} ("text" or
+"query" are accepted instead of "input"; a missing id becomes the line
+number). Plain-text lines are used as the input itself.
+
+Every in-flight item runs on its own Workflow instance (Workflow objects do
+not allow concurrent runs; see workflows/workflow_pool.py), results are
+appended to --out as each item finishes, and a rerun skips the IDs already
+recorded with status "ok" (items that ended "error", "cancelled" or
+"needs_input" run again). Cancelled items record the checkpoint they can
+resume from.
+Workflows that stop for human input are recorded as "needs_input", unless
+a ResponseSource (runners/hitl.py, console.py --responses) answers them.
+"""
+
+import asyncio
+import json
+import statistics
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+from agent_framework import Workflow
+
+from logger import get_logger
+from metrics import usage_tracker
+from runners.cancellation import RunCancelled
+from runners.hitl import HitlDriver, HitlState, ResponseSource
+
+logger = get_logger("maf.batch")
+
+
+@dataclass
+class BatchItem:
+    id: str
+    input: Any
+
+
+@dataclass
+class BatchSummary:
+    total: int = 0
+    skipped: int = 0
+    ok: int = 0
+    failed: int = 0
+    cancelled: int = 0
+    needs_input: int = 0
+    latencies: list[float] = field(default_factory=list)
+    wall_time_s: float = 0.0
+
+    def format(self) -> str:
+        done = self.ok + self.failed + self.cancelled + self.needs_input
+        lines = [
+            f"Batch finished: {done} run, {self.skipped} skipped (already done), "
+            f"{self.ok} ok, {self.failed} failed, {self.cancelled} cancelled, {self.needs_input} need input",
+            f"Wall time {self.wall_time_s:.1f}s, throughput {done / self.wall_time_s * 60:.1f} items/min"
+            if self.wall_time_s > 0 else "Wall time 0s",
+        ]
+        if self.latencies:
+            lat = sorted(self.latencies)
+            lines.append(
+                "Latency p50 {:.1f}s, p90 {:.1f}s, p99 {:.1f}s, max {:.1f}s, mean {:.1f}s".format(
+                    _percentile(lat, 50), _percentile(lat, 90), _percentile(lat, 99), lat[-1], statistics.mean(lat)
+                )
+            )
+        return "\n".join(lines)
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+# ------------------------------------------------------------
+# Input / output files
+# ------------------------------------------------------------
+def read_batch(path: str | Path) -> list[BatchItem]:
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                record = line
+            if isinstance(record, dict):
+                value = next((record[k] for k in ("input", "text", "query") if k in record), None)
+                if value is None:
+                    logger.warning("Line %d has no input/text/query field, skipped", line_no)
+                    continue
+                items.append(BatchItem(id=str(record.get("id", line_no)), input=value))
+            else:
+                items.append(BatchItem(id=str(line_no), input=record))
+    return items
+
+
+def completed_ids(out_path: str | Path) -> set[str]:
+    """IDs already finished successfully in a previous (possibly interrupted) run."""
+    path = Path(out_path)
+    if not path.exists():
+        return set()
+    done = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # truncated last line of an interrupted run
+            if record.get("status") == "ok":
+                done.add(str(record.get("id")))
+    return done
+
+
+def jsonable(value: Any) -> Any:
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [jsonable(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): jsonable(v) for k, v in value.items()}
+    text = getattr(value, "text", None)
+    return text if isinstance(text, str) else str(value)
+
+
+# ------------------------------------------------------------
+# Runner
+# ------------------------------------------------------------
+async def run_item(
+    create_workflow: Callable[[], Workflow], item: BatchItem, wf_id: str, responses: ResponseSource | None = None
+) -> dict:
+    """Run one item on a fresh workflow instance; any failure (building it included) becomes an "error" record."""
+    started = datetime.now(timezone.utc).isoformat()
+    t0 = time.perf_counter()
+    record: dict[str, Any] = {"id": item.id, "workflow": wf_id, "started_at": started}
+    with usage_tracker.track_run(wf_id) as run_usage:
+        try:
+            # One independent workflow instance per in-flight item (or a pooled stand-in)
+            workflow = create_workflow()
+            if responses is not None:
+                await _run_answered(workflow, item.input, responses, record)
+            else:
+                result = await workflow.run(item.input)
+                outputs = result.get_outputs()
+                pending = result.get_request_info_events()
+                if pending:
+                    record["status"] = "needs_input"
+                    record["requests"] = [jsonable(getattr(e.data, "prompt", e.data)) for e in pending]
+                    # Nobody answers batch requests later: free a pooled instance parked on them
+                    discard_pending = getattr(workflow, "discard_pending", None)
+                    if discard_pending is not None:
+                        await discard_pending([e.request_id for e in pending])
+                elif outputs:
+                    record["status"] = "ok"
+                else:
+                    _idle(record)
+                record["output"] = jsonable(outputs[-1] if len(outputs) == 1 else outputs)
+        except RunCancelled as e:
+            logger.warning("[batch] item %s cancelled: %s", item.id, e.reason)
+            _cancelled(record, str(e), e.checkpoint_id)
+        except Exception as e:
+            logger.exception("[batch] item %s failed", item.id)
+            record["status"] = "error"
+            record["error"] = f"{type(e).__name__}: {e}"
+    record["latency_s"] = round(time.perf_counter() - t0, 3)
+    record["queue_s"] = round(run_usage.queue_time_s, 3)
+    record["usage"] = run_usage.total.to_dict()
+    return record
+
+
+async def _run_answered(workflow: Workflow, message: Any, responses: ResponseSource, record: dict) -> None:
+    """Run to the end, answering every HITL request from `responses`."""
+    run = await HitlDriver(workflow, responses).run(message)
+    if run.state == HitlState.FAILED:
+        raise RuntimeError(run.error)
+    if run.state == HitlState.CANCELLED:
+        _cancelled(record, run.error, run.checkpoint_id)
+    elif run.state == HitlState.COMPLETED:
+        record["status"] = "ok"
+    else:
+        _idle(record)
+    record["hitl_answers"] = run.answered
+    record["output"] = jsonable(run.outputs[-1] if len(run.outputs) == 1 else run.outputs)
+
+
+def _cancelled(record: dict, error: str | None, checkpoint_id: str | None) -> None:
+    record["status"] = "cancelled"
+    record["error"] = error
+    record["checkpoint_id"] = checkpoint_id
+
+
+def _idle(record: dict) -> None:
+    # Neither an output nor a pending request: nothing to show for the run, try it again next time
+    record["status"] = "error"
+    record["error"] = "workflow went idle without an output"
+
+
+async def run_batch(
+    create_workflow: Callable[[], Workflow],
+    wf_id: str,
+    batch_path: str | Path,
+    out_path: str | Path,
+    concurrency: int = 1,
+    responses: ResponseSource | None = None,
+) -> BatchSummary:
+    """Run every pending item of `batch_path` and append one JSON line per item to `out_path`."""
+    if responses is not None and responses.order_dependent and concurrency > 1:
+        raise ValueError(
+            f"{type(responses).__name__} answers requests in order and would be shared by {concurrency} "
+            "concurrent runs: use a mapping of answers or --concurrency 1"
+        )
+    items = read_batch(batch_path)
+    done = completed_ids(out_path)
+    pending = [item for item in items if item.id not in done]
+    summary = BatchSummary(total=len(items), skipped=len(items) - len(pending))
+    logger.info(
+        "📦 Batch %s: %d items, %d already done, %d to run (concurrency %d)",
+        batch_path, len(items), summary.skipped, len(pending), concurrency,
+    )
+
+    queue: asyncio.Queue[BatchItem] = asyncio.Queue()
+    for item in pending:
+        queue.put_nowait(item)
+    write_lock = asyncio.Lock()
+    out_file = open(out_path, "a", encoding="utf-8")
+    t0 = time.perf_counter()
+
+    async def worker():
+        while True:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            record = await run_item(create_workflow, item, wf_id, responses)
+            async with write_lock:
+                out_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out_file.flush()
+                summary.latencies.append(record["latency_s"])
+                if record["status"] == "ok":
+                    summary.ok += 1
+                elif record["status"] == "needs_input":
+                    summary.needs_input += 1
+                elif record["status"] == "cancelled":
+                    summary.cancelled += 1
+                else:
+                    summary.failed += 1
+                finished = summary.ok + summary.failed + summary.cancelled + summary.needs_input
+            logger.info("[batch] %s → %s (%.1fs) [%d/%d]", item.id, record["status"], record["latency_s"], finished, len(pending))
+
+    try:
+        await asyncio.gather(*[worker() for _ in range(max(1, concurrency))])
+    finally:
+        out_file.close()
+        summary.wall_time_s = time.perf_counter() - t0
+    return summary
@@ -0,0 +1,334 @@
+# runners/cancellation.py
+"""
+Cancellation and overall deadlines for workflow runs.
+
+Giving up on a run used to leave it running: the framework executes each
+superstep in its own task, so cancelling (or abandoning) the stream stops
+event delivery but not the executors, and their agent and MCP calls keep
+the local model busy. `cancellable_stream()` wraps a run's event stream
+and, when its CancelToken is cancelled or its deadline passes:
+
+  1. cancels the superstep task and the stream itself; the CancelledError
+     reaches every executor, agent call and tool call awaited inside it,
+     which closes their HTTP requests (the model server stops generating),
+  2. puts the messages of the interrupted superstep (and those waiting in
+     fan-in buffers, which checkpoints do not hold) back into the runner
+     context and saves a final checkpoint (workflows built with
+     checkpointing only), so the run resumes from the start of that
+     superstep with `--resume <checkpoint_id>`,
+  3. raises RunCancelled carrying the reason and that checkpoint ID.
+
+A consumer that goes away (DevUI client disconnect, cancelled task) gets
+the same cleanup before its CancelledError continues.
+
+The run's token is also the current one (`current_cancel_token()`) in
+everything the run awaits. The MCP tools call `raise_if_cancelled()`
+before each request. OffloadService stops waiting as soon as the token
+fires and drops pool work that has not started yet. The token keeps the
+ID of the run's last checkpoint, which is the one to resume from when a
+run is cancelled while it waits for HITL answers.
+
+Stopping a superstep mid-way needs runner internals the framework does
+not expose (`_run_iteration`, `_edge_runners`, `drain_messages`,
+`_create_checkpoint_if_enabled`). They are only touched in the "Runner
+hooks" section below. If a framework version lacks one of them, the hooks
+are skipped with a warning: cancellation still stops the event stream,
+but a superstep already running may finish and no final checkpoint is
+saved.
+
+Active tokens are listed in `active_runs`; DevUI exposes them under
+/maf/runs (main.py) and console.py cancels on Ctrl+C or --deadline.
+Shared-state writes made by executors of the interrupted superstep are
+kept, and pool work already running (thread or process) finishes in the
+background with its result dropped.
+"""
+
+import asyncio
+import contextvars
+import time
+import uuid
+from typing import Any, AsyncIterable, AsyncIterator
+
+from agent_framework import Workflow
+
+from logger import get_logger
+
+logger = get_logger("maf.cancellation")
+
+_current_token: contextvars.ContextVar["CancelToken | None"] = contextvars.ContextVar("maf_cancel_token", default=None)
+
+
+class RunCancelled(Exception):
+    """A run stopped by its CancelToken (explicit cancel or deadline)."""
+
+    def __init__(self, reason: str, checkpoint_id: str | None = None):
+        resume = f"; resume from checkpoint {checkpoint_id}" if checkpoint_id else ""
+        super().__init__(f"Run cancelled: {reason}{resume}")
+        self.reason = reason
+        self.checkpoint_id = checkpoint_id
+
+
+class CancelToken:
+    """Cancellation flag of one run, with an optional overall deadline (seconds from creation)."""
+
+    def __init__(self, workflow_id: str | None = None, deadline_s: float | None = None):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.workflow_id = workflow_id
+        self.created = time.monotonic()
+        self.deadline = self.created + deadline_s if deadline_s else None
+        self.reason: str | None = None
+        self.checkpoint_id: str | None = None
+        # False when another process owns the run now: its checkpoints must not be touched
+        self.save_checkpoint = True
+        # Last checkpoint the run saved (HITL supersteps included)
+        self.last_checkpoint_id: str | None = None
+        self._event = asyncio.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled", save_checkpoint: bool = True) -> None:
+        if not self.cancelled:
+            self.reason = reason
+            self.save_checkpoint = save_checkpoint
+            self._event.set()
+            logger.warning("Cancelling run %s (%s): %s", self.run_id, self.workflow_id or "-", reason)
+
+    def expire(self) -> None:
+        self.cancel(f"deadline of {self.deadline - self.created:g}s exceeded")
+
+    def remaining(self) -> float | None:
+        """Seconds left before the deadline (None without one)."""
+        return None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+
+    async def wait(self) -> None:
+        await self._event.wait()
+
+    def to_dict(self) -> dict[str, Any]:
+        remaining = self.remaining()
+        return {
+            "run_id": self.run_id,
+            "workflow_id": self.workflow_id,
+            "running_s": round(time.monotonic() - self.created, 1),
+            "deadline_in_s": None if remaining is None else round(remaining, 1),
+            "cancelled": self.cancelled,
+            "reason": self.reason,
+        }
+
+
+def current_cancel_token() -> CancelToken | None:
+    return _current_token.get()
+
+
+def raise_if_cancelled() -> None:
+    """Raise RunCancelled when the current run's token was cancelled or its deadline passed."""
+    token = _current_token.get()
+    if token is None:
+        return
+    if not token.cancelled and token.remaining() == 0:
+        token.expire()
+    if token.cancelled:
+        raise RunCancelled(token.reason or "cancelled", token.last_checkpoint_id)
+
+
+def use_cancel_token(token: CancelToken | None) -> contextvars.Token:
+    """Make `token` the current one for this task (and the tasks it starts)."""
+    return _current_token.set(token)
+
+
+def reset_cancel_token(context_token: contextvars.Token) -> None:
+    try:
+        _current_token.reset(context_token)
+    except ValueError:
+        pass  # finalized from another context
+
+
+class ActiveRuns:
+    """Tokens of the runs in progress in this process."""
+
+    def __init__(self):
+        self._tokens: dict[str, CancelToken] = {}
+
+    def add(self, token: CancelToken) -> None:
+        self._tokens[token.run_id] = token
+
+    def discard(self, token: CancelToken) -> None:
+        self._tokens.pop(token.run_id, None)
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        return [token.to_dict() for token in self._tokens.values()]
+
+    def cancel(self, run_id: str | None = None, workflow_id: str | None = None, reason: str = "cancelled") -> list[str]:
+        """Cancel one run, or every run of a workflow; returns the run IDs cancelled."""
+        matched = [
+            token
+            for token in self._tokens.values()
+            if (run_id is None or token.run_id == run_id) and (workflow_id is None or token.workflow_id == workflow_id)
+        ]
+        for token in matched:
+            token.cancel(reason)
+        return [token.run_id for token in matched]
+
+
+active_runs = ActiveRuns()
+
+
+# ------------------------------------------------------------
+# Runner hooks
+# ------------------------------------------------------------
+_RUNNER_HOOKS = ("_run_iteration", "_edge_runners", "_create_checkpoint_if_enabled")
+_warned_incompatible = False
+
+
+def _track_supersteps(workflow: Workflow):
+    """
+    Remember the running superstep task, the messages it took from the
+    context and the last checkpoint saved. Returns None when this framework
+    version lacks the runner internals used here.
+    """
+    global _warned_incompatible
+    runner = getattr(workflow, "_runner", None)
+    if getattr(runner, "_maf_cancellable", False):
+        return runner
+    ctx = getattr(runner, "context", None)
+    missing = [name for name in _RUNNER_HOOKS if not hasattr(runner, name)]
+    if ctx is None or not hasattr(ctx, "drain_messages"):
+        missing.append("context.drain_messages")
+    if missing:
+        if not _warned_incompatible:
+            _warned_incompatible = True
+            logger.warning(
+                "Runner internals %s not found in this agent_framework version: cancelled runs "
+                "stop through task cancellation only and save no final checkpoint", missing
+            )
+        return None
+    original_iteration = runner._run_iteration
+    original_drain = ctx.drain_messages
+    original_create = runner._create_checkpoint_if_enabled
+
+    async def run_iteration() -> None:
+        runner._maf_iteration_task = asyncio.current_task()
+        runner._maf_buffered = _fan_in_buffered(runner)
+        try:
+            await original_iteration()
+            runner._maf_inflight = None
+        finally:
+            runner._maf_iteration_task = None
+
+    async def drain_messages():
+        messages = await original_drain()
+        runner._maf_inflight = messages
+        return messages
+
+    async def create_checkpoint_if_enabled(*args, **kwargs):
+        checkpoint_id = await original_create(*args, **kwargs)
+        token = current_cancel_token()
+        if checkpoint_id and token is not None:
+            token.last_checkpoint_id = checkpoint_id
+        return checkpoint_id
+
+    runner._run_iteration = run_iteration
+    ctx.drain_messages = drain_messages
+    runner._create_checkpoint_if_enabled = create_checkpoint_if_enabled
+    runner._maf_iteration_task = None
+    runner._maf_inflight = None
+    runner._maf_cancellable = True
+    return runner
+
+
+def _fan_in_buffered(runner) -> list:
+    return [
+        message
+        for edge_runner in runner._edge_runners
+        for messages in getattr(edge_runner, "_buffer", {}).values()
+        for message in messages
+    ]
+
+
+async def _final_checkpoint(runner) -> str | None:
+    ctx = runner.context
+    if not ctx.has_checkpointing():
+        return None
+    inflight = runner._maf_inflight
+    pending = [message for messages in (inflight or {}).values() for message in messages]
+    # Fan-in edges buffer messages across supersteps and checkpoints do not
+    # carry those buffers: send them again (as they were when the interrupted
+    # superstep started) so the join still fires on resume
+    buffered = runner._maf_buffered if inflight is not None else _fan_in_buffered(runner)
+    pending.extend(m for m in buffered if all(m is not p for p in pending))
+    # Replace what the interrupted superstep produced with what it was given
+    await ctx.drain_messages()
+    for message in pending:
+        await ctx.send_message(message)
+    runner._maf_inflight = None
+    return await runner._create_checkpoint_if_enabled("cancelled")
+
+
+async def _stop(runner, pump: asyncio.Task, save_checkpoint: bool = True) -> str | None:
+    iteration = getattr(runner, "_maf_iteration_task", None)
+    tasks = [task for task in (iteration, pump) if task is not None and not task.done()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if runner is None or not save_checkpoint:
+        return None
+    try:
+        return await _final_checkpoint(runner)
+    except Exception as e:
+        logger.warning("Could not save the final checkpoint of a cancelled run: %s", e)
+        return None
+
+
+_END = object()
+
+
+async def cancellable_stream(workflow: Workflow, stream: AsyncIterable, token: CancelToken) -> AsyncIterator[Any]:
+    """Yield the events of `stream`, a run of `workflow`, until it ends or `token` stops it."""
+    runner = _track_supersteps(workflow)
+    active_runs.add(token)
+    context_token = use_cancel_token(token)
+    # One task iterates the whole stream: the framework keeps tracing spans open across events
+    queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+
+    async def pump() -> None:
+        try:
+            async for event in stream:
+                await queue.put((event, None))
+            await queue.put((_END, None))
+        except Exception as e:
+            await queue.put((_END, e))
+
+    pump_task = asyncio.ensure_future(pump())
+    waiter = asyncio.ensure_future(token.wait())
+    finished = False
+    try:
+        while True:
+            get = asyncio.ensure_future(queue.get())
+            try:
+                done, _ = await asyncio.wait({get, waiter}, timeout=token.remaining(), return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                if not get.done():
+                    get.cancel()
+            if get in done:
+                event, error = get.result()
+                if event is _END:
+                    finished = True
+                    if error is not None:
+                        raise error
+                    return
+                yield event
+                continue
+            if not done:
+                token.expire()
+            token.checkpoint_id = await _stop(runner, pump_task, token.save_checkpoint)
+            finished = True
+            raise RunCancelled(token.reason or "cancelled", token.checkpoint_id)
+    finally:
+        waiter.cancel()
+        if not finished:
+            # The consumer left (disconnect, task cancelled): the run must not go on without it
+            token.cancel(token.reason or "consumer went away")
+            token.checkpoint_id = await _stop(runner, pump_task, token.save_checkpoint)
+        active_runs.discard(token)
+        reset_cancel_token(context_token)
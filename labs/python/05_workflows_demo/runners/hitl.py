@@ -0,0 +1,343 @@
+# runners/hitl.py
+"""
+Event-driven human-in-the-loop driver.
+
+HitlDriver runs a workflow stream and moves through a small state machine
+on the events themselves, never on a timer:
+
+    RUNNING ──RequestInfoEvent──▶ (answer requested right away, run continues)
+    RUNNING ──stream ends, answers pending──▶ AWAITING_INPUT
+    AWAITING_INPUT ──all answers in──▶ RUNNING (send_responses_streaming)
+    RUNNING ──stream ends, nothing pending──▶ COMPLETED | IDLE | FAILED
+    any state ──CancelToken cancelled / deadline──▶ CANCELLED
+
+Answers come from a pluggable ResponseSource:
+
+  - StdinResponses    asks the operator (console.py default),
+  - FileResponses     scripted answers from a JSON/JSONL file, for tests and
+                      batch runs that must not stop for a human,
+  - CallbackResponses POSTs each request to an HTTP endpoint and uses the
+                      answer it returns (approval service, chat bot...).
+
+`response_source("stdin" | path | url)` picks one from a CLI value.
+
+With a CancelToken (runners/cancellation.py) the run stops when the token
+is cancelled or its deadline passes, including while answers are awaited;
+`run_state.checkpoint_id` is then the checkpoint to resume from.
+"""
+
+import abc
+import asyncio
+import json
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable
+
+from agent_framework import (
+    RequestInfoEvent,
+    Workflow,
+    WorkflowEvent,
+    WorkflowFailedEvent,
+    WorkflowOutputEvent,
+    WorkflowRunState,
+    WorkflowStatusEvent,
+)
+
+from config import HITL_CALLBACK_TIMEOUT
+from logger import get_logger
+from .cancellation import CancelToken, RunCancelled, cancellable_stream, reset_cancel_token, use_cancel_token
+
+logger = get_logger("maf.hitl")
+
+
+def request_prompt(event: RequestInfoEvent) -> str:
+    return str(getattr(event.data, "prompt", None) or event.data)
+
+
+# ------------------------------------------------------------
+# Response sources
+# ------------------------------------------------------------
+class ResponseSource(abc.ABC):
+    """Produces the answer to one HITL request."""
+
+    # True when answers are handed out in request order, so concurrent runs would take each other's
+    order_dependent: bool = False
+
+    @abc.abstractmethod
+    async def respond(self, event: RequestInfoEvent) -> Any:
+        """The answer to `event`."""
+
+    async def close(self) -> None:
+        pass
+
+
+class StdinResponses(ResponseSource):
+    """Ask on stdin, one prompt at a time, without blocking the event loop."""
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+
+    async def respond(self, event: RequestInfoEvent) -> str:
+        async with self._lock:
+            logger.warning("=== Human input required ===")
+            logger.warning(f"Prompt: {request_prompt(event)}")
+            answer = await asyncio.to_thread(input, "🧠 Your answer: ")
+        return answer.strip()
+
+
+class FileResponses(ResponseSource):
+    """
+    Scripted answers. The file holds either
+
+      - a JSON list (or JSONL lines) of answers, used in order, or
+      - a JSON object mapping a request type name, a source executor ID or
+        a substring of the prompt to the answer, with "*" as fallback.
+
+    Use the mapping form for concurrent batch runs: list order is shared by
+    every run of the process, so run_batch refuses a list with concurrency > 1.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        text = self.path.read_text(encoding="utf-8")
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            data = [json.loads(line) for line in text.splitlines() if line.strip()]
+        self._mapping: dict[str, Any] = {}
+        self._queue: deque = deque()
+        if isinstance(data, dict):
+            self._mapping = data
+        else:
+            self._queue.extend(data if isinstance(data, list) else [data])
+            self.order_dependent = True
+
+    async def respond(self, event: RequestInfoEvent) -> Any:
+        if self._mapping:
+            prompt = request_prompt(event)
+            for key in (getattr(event.request_type, "__name__", None), event.source_executor_id):
+                if key in self._mapping:
+                    return self._mapping[key]
+            for key, answer in self._mapping.items():
+                if key != "*" and key in prompt:
+                    return answer
+            if "*" in self._mapping:
+                return self._mapping["*"]
+            raise LookupError(f"{self.path}: no answer for request {event.request_id} ({prompt[:80]!r})")
+        if not self._queue:
+            raise LookupError(f"{self.path}: ran out of answers at request {event.request_id}")
+        return self._queue.popleft()
+
+
+class CallbackResponses(ResponseSource):
+    """
+    POST every request as JSON to `url` and use the reply: either a JSON
+    body {"answer": ...} or plain text. The endpoint may take as long as a
+    human needs, up to `timeout` seconds.
+    """
+
+    def __init__(self, url: str, timeout: float = 300.0):
+        import httpx
+
+        self.url = url
+        self._client = httpx.AsyncClient(timeout=timeout)
+
+    async def respond(self, event: RequestInfoEvent) -> Any:
+        payload = {
+            "request_id": event.request_id,
+            "source_executor_id": event.source_executor_id,
+            "request_type": getattr(event.request_type, "__name__", str(event.request_type)),
+            "prompt": request_prompt(event),
+            "data": _jsonable(event.data),
+        }
+        response = await self._client.post(self.url, json=payload)
+        response.raise_for_status()
+        if response.headers.get("content-type", "").startswith("application/json"):
+            body = response.json()
+            return body.get("answer", body) if isinstance(body, dict) else body
+        return response.text.strip()
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+def _jsonable(value: Any) -> Any:
+    if hasattr(value, "__dict__"):
+        return {k: _jsonable(v) for k, v in vars(value).items() if not k.startswith("_")}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if value is None or isinstance(value, (str, int, float, bool, dict)):
+        return value
+    return str(value)
+
+
+def response_source(spec: str | None) -> ResponseSource:
+    """'stdin' (default), an http(s) URL, or the path of an answers file."""
+    if not spec or spec == "stdin":
+        return StdinResponses()
+    if spec.startswith(("http://", "https://")):
+        return CallbackResponses(spec, timeout=HITL_CALLBACK_TIMEOUT)
+    return FileResponses(spec)
+
+
+# ------------------------------------------------------------
+# Driver
+# ------------------------------------------------------------
+class HitlState(str, Enum):
+    RUNNING = "running"
+    AWAITING_INPUT = "awaiting_input"
+    COMPLETED = "completed"
+    IDLE = "idle"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+@dataclass
+class HitlRun:
+    state: HitlState = HitlState.RUNNING
+    outputs: list = field(default_factory=list)
+    error: str | None = None
+    rounds: int = 0
+    answered: int = 0
+    events: int = 0
+    checkpoint_id: str | None = None
+
+
+class HitlDriver:
+    """
+    Drive one workflow run to a terminal state, answering its HITL requests
+    from `source`. `on_event` sees every event as it arrives (console
+    printing); the last `history` events are kept in `recent` for
+    diagnostics. `token` cancels the run or bounds it with a deadline.
+    """
+
+    def __init__(
+        self,
+        workflow,
+        source: ResponseSource,
+        on_event: Callable[[WorkflowEvent], None] | None = None,
+        history: int = 200,
+        max_rounds: int = 50,
+        token: CancelToken | None = None,
+    ):
+        self.workflow = workflow
+        self.token = token
+        self.source = source
+        self.on_event = on_event
+        self.max_rounds = max_rounds
+        self.recent: deque = deque(maxlen=history)
+        self.run_state = HitlRun()
+        self._answers: dict[str, asyncio.Task] = {}
+
+    async def run(self, message: Any) -> HitlRun:
+        return await self._loop(self.workflow.run_stream(message))
+
+    async def resume(self, checkpoint_id: str, checkpoint_storage=None) -> HitlRun:
+        return await self._loop(
+            self.workflow.run_stream_from_checkpoint(checkpoint_id, checkpoint_storage=checkpoint_storage)
+        )
+
+    def _transition(self, state: HitlState) -> None:
+        if state != self.run_state.state:
+            logger.debug("HITL %s → %s", self.run_state.state.value, state.value)
+            self.run_state.state = state
+
+    def _guard(self, stream):
+        # PooledWorkflow guards the instance it runs on itself, via the current token
+        if self.token is None or not isinstance(self.workflow, Workflow):
+            return stream
+        return cancellable_stream(self.workflow, stream, self.token)
+
+    def _cancelled(self, reason: str, checkpoint_id: str | None) -> HitlRun:
+        self.run_state.error = f"cancelled: {reason}"
+        self.run_state.checkpoint_id = checkpoint_id
+        self._transition(HitlState.CANCELLED)
+        return self.run_state
+
+    async def _loop(self, stream) -> HitlRun:
+        run = self.run_state
+        context_token = use_cancel_token(self.token)
+        try:
+            while True:
+                try:
+                    await self._consume(self._guard(stream))
+                except RunCancelled as e:
+                    return self._cancelled(e.reason, e.checkpoint_id)
+                except Exception as e:
+                    # The stream re-raises after its WorkflowFailedEvent (deadline, handler error)
+                    run.error = run.error or f"{type(e).__name__}: {e}"
+                    self._transition(HitlState.FAILED)
+                if run.state == HitlState.FAILED:
+                    return run
+                if not self._answers:
+                    self._transition(HitlState.COMPLETED if run.outputs else HitlState.IDLE)
+                    return run
+                if run.rounds >= self.max_rounds:
+                    run.error = f"gave up after {run.rounds} HITL round(s)"
+                    self._transition(HitlState.FAILED)
+                    return run
+
+                self._transition(HitlState.AWAITING_INPUT)
+                try:
+                    responses = await self._collect_answers()
+                except RunCancelled as e:
+                    # Nothing is running: the HITL checkpoint of this superstep is the one to resume
+                    return self._cancelled(e.reason, e.checkpoint_id)
+                except Exception as e:
+                    run.error = f"no answer: {type(e).__name__}: {e}"
+                    self._transition(HitlState.FAILED)
+                    return run
+                self._answers.clear()
+                run.rounds += 1
+                run.answered += len(responses)
+                self._transition(HitlState.RUNNING)
+                stream = self.workflow.send_responses_streaming(responses)
+        finally:
+            for task in self._answers.values():
+                task.cancel()
+            if self._answers:
+                # Requests left unanswered: a pooled instance must not stay parked on them
+                discard_pending = getattr(self.workflow, "discard_pending", None)
+                if discard_pending is not None:
+                    await discard_pending(list(self._answers))
+            self._answers.clear()
+            reset_cancel_token(context_token)
+
+    async def _collect_answers(self) -> dict[str, Any]:
+        answers = asyncio.gather(*self._answers.values())
+        if self.token is None:
+            return dict(zip(self._answers, await answers))
+        waiter = asyncio.ensure_future(self.token.wait())
+        try:
+            done, _ = await asyncio.wait(
+                {answers, waiter}, timeout=self.token.remaining(), return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            waiter.cancel()
+        if answers not in done:
+            answers.cancel()
+            await asyncio.gather(answers, return_exceptions=True)
+            if not self.token.cancelled:
+                self.token.expire()
+            raise RunCancelled(self.token.reason, self.token.last_checkpoint_id)
+        return dict(zip(self._answers, answers.result()))
+
+    async def _consume(self, stream) -> None:
+        """Apply events as they arrive."""
+        async for event in stream:
+            self.recent.append(event)
+            self.run_state.events += 1
+            if self.on_event is not None:
+                self.on_event(event)
+            if isinstance(event, RequestInfoEvent):
+                # Ask now: the human (or service) answers while the superstep finishes
+                self._answers[event.request_id] = asyncio.create_task(self.source.respond(event))
+            elif isinstance(event, WorkflowOutputEvent):
+                self.run_state.outputs.append(event.data)
+            elif isinstance(event, WorkflowFailedEvent):
+                self.run_state.error = f"{event.details.error_type}: {event.details.message}"
+                self._transition(HitlState.FAILED)
+            elif isinstance(event, WorkflowStatusEvent) and event.state == WorkflowRunState.FAILED:
+                self._transition(HitlState.FAILED)
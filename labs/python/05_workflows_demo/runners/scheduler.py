@@ -0,0 +1,245 @@
+# runners/scheduler.py
+"""
+Admission control for workflow runs.
+
+Every run ends up on the same local LLM endpoint, so letting all of them
+start at once only makes everyone slow. The RunScheduler sits in front of
+workflow execution (PooledWorkflow asks it for a slot before running):
+
+  - a global limit and optional per-workflow limits on runs in flight,
+  - priority classes: "hitl" (answers to a waiting human-in-the-loop run)
+    before "interactive" (DevUI / console runs) before "batch",
+    FIFO within a class,
+  - a bounded queue: once `max_queue_depth` runs are waiting, new ones are
+    rejected with SchedulerRejected instead of piling up; batch runs are
+    bounded by their caller (--concurrency), so they always wait and do not
+    count toward the depth,
+  - queue-time metrics per priority class (`stats()`, `format_stats()`).
+
+A run holds its slot only while it is actually executing: a run parked on
+HITL requests releases it and asks again (as "hitl") when the answers come.
+"""
+
+import asyncio
+import bisect
+import itertools
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator
+
+from config import (
+    RUN_MAX_CONCURRENCY,
+    RUN_MAX_CONCURRENCY_PER_WORKFLOW,
+    RUN_QUEUE_MAX_DEPTH,
+    RUN_SCHEDULER,
+)
+from logger import get_logger
+
+logger = get_logger("maf.scheduler")
+
+PRIORITIES = {"hitl": 0, "interactive": 1, "batch": 2}
+
+
+class SchedulerRejected(RuntimeError):
+    """The run queue is full; the caller should retry later."""
+
+
+@dataclass
+class RunTicket:
+    wf_id: str
+    priority: str
+    queued_s: float = 0.0
+
+
+@dataclass(order=True)
+class _Waiter:
+    rank: int
+    seq: int
+    ticket: RunTicket = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued: float = field(compare=False, default_factory=time.perf_counter)
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+class RunScheduler:
+    def __init__(
+        self,
+        max_concurrency: int = 2,
+        per_workflow: dict[str, int] | None = None,
+        max_queue_depth: int = 32,
+        history: int = 500,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_workflow = dict(per_workflow or {})
+        self.max_queue_depth = max(0, max_queue_depth)
+        self._queue: list[_Waiter] = []
+        self._seq = itertools.count()
+        self._running: Counter[str] = Counter()
+        self._queue_times: dict[str, deque[float]] = {p: deque(maxlen=history) for p in PRIORITIES}
+        self.admitted: Counter[str] = Counter()
+        self.rejected: Counter[str] = Counter()
+        self.peak_depth = 0
+
+    # -------------------------------------------------------
+    # Slots
+    # -------------------------------------------------------
+    @asynccontextmanager
+    async def slot(self, wf_id: str, priority: str = "interactive") -> AsyncIterator[RunTicket]:
+        """Wait for (or be refused) a run slot; held until the block exits."""
+        ticket = await self.admit(wf_id, priority)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    async def admit(self, wf_id: str, priority: str = "interactive") -> RunTicket:
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}'. Use one of {list(PRIORITIES)}")
+        ticket = RunTicket(wf_id, priority)
+        # release() always hands free slots to eligible waiters right away, so
+        # anyone still queued is blocked by a limit this run may not hit
+        if self._has_capacity(wf_id):
+            self._start(ticket)
+            return ticket
+        waiting = self._bounded_depth()
+        if priority != "batch" and waiting >= self.max_queue_depth:
+            self.rejected[priority] += 1
+            logger.warning("🚫 [%s] run rejected (%s): %d runs already queued", wf_id, priority, waiting)
+            raise SchedulerRejected(f"Run queue is full ({waiting} waiting, {self.running} running); retry later")
+
+        waiter = _Waiter(PRIORITIES[priority], next(self._seq), ticket, asyncio.get_running_loop().create_future())
+        bisect.insort(self._queue, waiter)
+        self.peak_depth = max(self.peak_depth, len(self._queue))
+        logger.info("⏳ [%s] run queued (%s), %d waiting, %d running", wf_id, priority, len(self._queue), self.running)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._queue:
+                self._queue.remove(waiter)
+            elif waiter.future.done() and not waiter.future.cancelled():
+                # Granted and cancelled in the same tick: give the slot back
+                self.release(ticket)
+            raise
+        return ticket
+
+    def release(self, ticket: RunTicket) -> None:
+        self._running[ticket.wf_id] -= 1
+        if self._running[ticket.wf_id] <= 0:
+            del self._running[ticket.wf_id]
+        self._dispatch()
+
+    def ensure_concurrency(self, wf_id: str, concurrency: int) -> None:
+        """Let `concurrency` runs of `wf_id` in at once (batch mode sizes the limits from --concurrency)."""
+        if self.max_concurrency < concurrency:
+            logger.info("🚦 Raising the run limit from %d to %d for this batch", self.max_concurrency, concurrency)
+            self.max_concurrency = concurrency
+        limit = self.per_workflow.get(wf_id, 0)
+        if limit and limit < concurrency:
+            logger.warning(
+                "🚦 RUN_MAX_CONCURRENCY_PER_WORKFLOW limits %s to %d concurrent run(s), not %d", wf_id, limit, concurrency
+            )
+
+    def _dispatch(self) -> None:
+        for waiter in list(self._queue):
+            if self.running >= self.max_concurrency:
+                return
+            if not self._has_capacity(waiter.ticket.wf_id):
+                continue  # this workflow is at its own limit; later classes may still fit
+            self._queue.remove(waiter)
+            waiter.ticket.queued_s = time.perf_counter() - waiter.enqueued
+            self._start(waiter.ticket)
+            waiter.future.set_result(None)
+
+    def _start(self, ticket: RunTicket) -> None:
+        self._running[ticket.wf_id] += 1
+        self.admitted[ticket.priority] += 1
+        self._queue_times[ticket.priority].append(ticket.queued_s)
+        if ticket.queued_s:
+            logger.info("▶️ [%s] run started after %.1fs in queue (%s)", ticket.wf_id, ticket.queued_s, ticket.priority)
+
+    def _bounded_depth(self) -> int:
+        return sum(1 for waiter in self._queue if waiter.ticket.priority != "batch")
+
+    def _has_capacity(self, wf_id: str) -> bool:
+        limit = self.per_workflow.get(wf_id, 0)
+        return self.running < self.max_concurrency and (not limit or self._running[wf_id] < limit)
+
+    # -------------------------------------------------------
+    # Metrics
+    # -------------------------------------------------------
+    @property
+    def running(self) -> int:
+        return sum(self._running.values())
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def stats(self) -> dict:
+        by_priority = {}
+        for priority, samples in self._queue_times.items():
+            if not (self.admitted[priority] or self.rejected[priority]):
+                continue
+            values = sorted(samples)
+            by_priority[priority] = {
+                "admitted": self.admitted[priority],
+                "rejected": self.rejected[priority],
+                "queue_p50_s": round(_percentile(values, 50), 3) if values else None,
+                "queue_p95_s": round(_percentile(values, 95), 3) if values else None,
+                "queue_max_s": round(values[-1], 3) if values else None,
+            }
+        return {
+            "running": dict(self._running),
+            "queued": self.depth,
+            "peak_queued": self.peak_depth,
+            "max_concurrency": self.max_concurrency,
+            "per_workflow": self.per_workflow,
+            "max_queue_depth": self.max_queue_depth,
+            "by_priority": by_priority,
+        }
+
+    def format_stats(self) -> str:
+        s = self.stats()
+        lines = [
+            f"Scheduler: {sum(s['running'].values())} running, {s['queued']} queued "
+            f"(peak {s['peak_queued']}), limit {s['max_concurrency']}"
+        ]
+        for priority, d in s["by_priority"].items():
+            queue = (
+                f"queue p50 {d['queue_p50_s']:.1f}s, p95 {d['queue_p95_s']:.1f}s, max {d['queue_max_s']:.1f}s"
+                if d["queue_p50_s"] is not None else "no admitted runs"
+            )
+            lines.append(f"  {priority:<12} {d['admitted']} admitted, {d['rejected']} rejected, {queue}")
+        return "\n".join(lines)
+
+
+def _limits(value: str) -> dict[str, int]:
+    """Parse "wfA:1,wfB:2" into {"wfA": 1, "wfB": 2}."""
+    limits = {}
+    for part in value.split(","):
+        if ":" in part:
+            wf_id, limit = part.rsplit(":", 1)
+            limits[wf_id.strip()] = int(limit)
+    return limits
+
+
+def build_run_scheduler() -> RunScheduler | None:
+    """Scheduler configured from RUN_* settings, or None when RUN_SCHEDULER is off."""
+    if not RUN_SCHEDULER:
+        return None
+    scheduler = RunScheduler(
+        max_concurrency=RUN_MAX_CONCURRENCY,
+        per_workflow=_limits(RUN_MAX_CONCURRENCY_PER_WORKFLOW),
+        max_queue_depth=RUN_QUEUE_MAX_DEPTH,
+    )
+    logger.info(
+        "🚦 Run scheduler: %d concurrent run(s), per-workflow %s, queue depth %d",
+        scheduler.max_concurrency, scheduler.per_workflow or "-", scheduler.max_queue_depth,
+    )
+    return scheduler
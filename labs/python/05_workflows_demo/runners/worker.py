@@ -0,0 +1,193 @@
+# runners/worker.py
+"""
+Queue worker: pulls workflow runs from maf_jobs (persistence/postgres_job_queue.py)
+and executes them against the shared Postgres checkpoint storage.
+
+  - `concurrency` jobs in flight per worker process, each on a fresh
+    workflow instance whose checkpoints are filed under the job ID,
+  - a heartbeat task per job; if the heartbeat finds the job was taken over
+    (this worker looked dead) the local run is cancelled. Failed heartbeats
+    are retried; after JOB_HEARTBEAT_MAX_FAILURES in a row the run is
+    cancelled too, since the job will soon look stale and run elsewhere.
+    Each run streams through cancellable_stream() with its own CancelToken,
+    so cancelling it stops the superstep task and its executors as well,
+    without a final checkpoint (the job's checkpoints belong to the new owner),
+  - a job that already has checkpoints (takeover after a crash, or a job
+    released by a stopping worker) resumes from the newest one instead of
+    starting over. Workflows built without checkpointing simply rerun.
+
+Jobs that stop for human input end as "needs_input" with the pending
+prompts and the checkpoint to resume from (`console.py --resume <id>`).
+"""
+
+import asyncio
+import os
+import socket
+import uuid
+from typing import Any
+
+from agent_framework import RequestInfoEvent, WorkflowOutputEvent
+
+from config import JOB_HEARTBEAT_MAX_FAILURES, JOB_HEARTBEAT_SECONDS, JOB_POLL_SECONDS, RUN_DEADLINE_SECONDS
+from logger import get_logger
+from metrics import usage_tracker
+from persistence.postgres_job_queue import Job, PostgresJobQueue
+from persistence.usage_store import save_run_usage
+from runners.batch import jsonable
+from runners.cancellation import CancelToken, RunCancelled, cancellable_stream
+from workflows.framework_compat import bind_checkpoints
+from workflows.workflow_factory import WorkflowFactory
+
+logger = get_logger("maf.worker")
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class Worker:
+    def __init__(
+        self,
+        wf_factory: WorkflowFactory,
+        queue: PostgresJobQueue,
+        worker_id: str | None = None,
+        concurrency: int = 1,
+        workflow_ids: list[str] | None = None,
+        poll_interval: float = JOB_POLL_SECONDS,
+        heartbeat_interval: float = JOB_HEARTBEAT_SECONDS,
+        heartbeat_max_failures: int = JOB_HEARTBEAT_MAX_FAILURES,
+    ):
+        self.wf_factory = wf_factory
+        self.queue = queue
+        self.worker_id = worker_id or default_worker_id()
+        self.concurrency = max(1, concurrency)
+        self.workflow_ids = workflow_ids
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_max_failures = max(1, heartbeat_max_failures)
+        self._stopping = asyncio.Event()
+        self.processed = 0
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self, drain: bool = False) -> None:
+        """Process jobs until `stop()`; with `drain=True`, return once the queue is empty."""
+        logger.info(
+            "👷 Worker %s started (concurrency %d, workflows %s)",
+            self.worker_id, self.concurrency, self.workflow_ids or "all",
+        )
+        await asyncio.gather(*[self._loop(drain) for _ in range(self.concurrency)])
+        logger.info("👷 Worker %s stopped after %d job(s)", self.worker_id, self.processed)
+
+    async def _loop(self, drain: bool) -> None:
+        while not self._stopping.is_set():
+            job = await self.queue.claim(self.worker_id, self.workflow_ids)
+            if job is None:
+                if drain:
+                    return
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._process(job)
+            self.processed += 1
+
+    # -------------------------------------------------------
+    # One job
+    # -------------------------------------------------------
+    async def _process(self, job: Job) -> None:
+        logger.info("▶️ Job %s (%s), attempt %d/%d", job.job_id, job.workflow_id, job.attempts, job.max_attempts)
+        lost = asyncio.Event()
+        token = CancelToken(job.workflow_id, deadline_s=RUN_DEADLINE_SECONDS or None)
+        run_task = asyncio.create_task(self._execute(job, token))
+        heartbeat = asyncio.create_task(self._heartbeat(job, run_task, token, lost))
+        try:
+            status, result, error = await run_task
+        except RunCancelled as e:
+            if lost.is_set():
+                logger.warning("Job %s: ownership lost, local run stopped", job.job_id)
+                return
+            status, result, error = "failed", None, str(e)
+        except asyncio.CancelledError:
+            if lost.is_set():
+                logger.warning("Job %s: ownership lost, local run abandoned", job.job_id)
+                return
+            # Worker shutdown: hand the job back, it resumes from its checkpoint elsewhere
+            await self.queue.release(job.job_id, self.worker_id)
+            raise
+        except Exception as e:
+            logger.exception("Job %s failed", job.job_id)
+            status, result, error = "failed", None, f"{type(e).__name__}: {e}"
+        finally:
+            heartbeat.cancel()
+
+        if status == "failed" and job.attempts < job.max_attempts:
+            await self.queue.retry(job.job_id, self.worker_id, error)
+            logger.info("🔁 Job %s requeued (attempt %d/%d failed)", job.job_id, job.attempts, job.max_attempts)
+            return
+        if not await self.queue.finish(job.job_id, self.worker_id, status, result, error):
+            logger.warning("Job %s finished here but belongs to another worker now; result dropped", job.job_id)
+            return
+        logger.info("✅ Job %s → %s", job.job_id, status)
+
+    async def _heartbeat(self, job: Job, run_task: asyncio.Task, token: CancelToken, lost: asyncio.Event) -> None:
+        failures = 0
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                owned = await self.queue.heartbeat(job.job_id, self.worker_id)
+            except Exception as e:
+                failures += 1
+                logger.warning(
+                    "Job %s: heartbeat failed (%d/%d): %s", job.job_id, failures, self.heartbeat_max_failures, e
+                )
+                if failures < self.heartbeat_max_failures:
+                    continue
+                # The job is about to look stale: stop before another worker runs it too
+                logger.error("Job %s: no heartbeat for %d attempts, cancelling the local run", job.job_id, failures)
+            else:
+                failures = 0
+                if owned:
+                    continue
+                logger.warning("Job %s was taken over by another worker", job.job_id)
+            lost.set()
+            # Stops the superstep task too; cancelling run_task alone would leave it running
+            token.cancel("job ownership lost", save_checkpoint=False)
+            await asyncio.wait({run_task}, timeout=self.heartbeat_interval)
+            if not run_task.done():
+                run_task.cancel()
+            return
+
+    async def _execute(self, job: Job, token: CancelToken) -> tuple[str, dict, str | None]:
+        storage = self.queue.storage
+        workflow = self.wf_factory.create(job.workflow_id)
+        bind_checkpoints(workflow, job.job_id)
+        checkpoint_id = await storage.latest_checkpoint_id(job.job_id)
+
+        outputs: list[Any] = []
+        requests: list[RequestInfoEvent] = []
+        with usage_tracker.track_run(job.workflow_id, resumed_from=checkpoint_id) as run_usage:
+            if checkpoint_id:
+                logger.info("⏩ Job %s resumes from checkpoint %s", job.job_id, checkpoint_id)
+                stream = workflow.run_stream_from_checkpoint(checkpoint_id, checkpoint_storage=storage)
+            else:
+                stream = workflow.run_stream(job.input)
+            async for event in cancellable_stream(workflow, stream, token):
+                if isinstance(event, WorkflowOutputEvent):
+                    outputs.append(event.data)
+                elif isinstance(event, RequestInfoEvent):
+                    requests.append(event)
+        await save_run_usage(storage, run_usage)
+
+        result: dict[str, Any] = {
+            "output": jsonable(outputs[-1] if len(outputs) == 1 else outputs),
+            "resumed_from": checkpoint_id,
+            "usage": run_usage.total.to_dict(),
+        }
+        if requests:
+            result["requests"] = [jsonable(getattr(e.data, "prompt", e.data)) for e in requests]
+            result["checkpoint_id"] = await storage.latest_checkpoint_id(job.job_id)
+            return "needs_input", result, None
+        return "done", result, None
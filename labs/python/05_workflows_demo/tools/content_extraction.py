@@ -0,0 +1,223 @@
+"""
+tools/content_extraction.py
+---------------------------
+Content-extraction stage for fetched web pages.
+
+Pages returned by the MCP fetch tools still carry navigation, scripts,
+cookie banners and other boilerplate. Every one of those characters ends up
+in an LLM prompt, so pages are cleaned before they are handed to agents:
+
+  1. main-content extraction (drop boilerplate elements, keep <article>/<main>)
+  2. HTML → Markdown conversion (markdownify)
+  3. repeated menu lines and (outside the main content) cookie banners
+     removed from the text
+  4. whitespace collapse
+
+The parsing work is synchronous and CPU-bound, so `extract_page` runs it in
+the shared process pool (tools/offload.py) and logs the token savings for
+each page.
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+
+from bs4 import BeautifulSoup
+from markdownify import markdownify
+
+from tools.offload import offload_service
+
+logger = logging.getLogger("content_extraction")
+
+
+# ---------------------------------------------------------------------
+# Heuristics
+# ---------------------------------------------------------------------
+
+BOILERPLATE_TAGS = (
+    "script", "style", "noscript", "template", "iframe", "svg", "canvas",
+    "nav", "header", "footer", "aside", "form", "button", "input", "select",
+)
+
+# Matched against whole class/id tokens ("sidebar", "cookie-banner"), so a
+# main wrapper like class="content has-sidebar" is not taken for boilerplate
+BOILERPLATE_HINTS = re.compile(
+    r"^(cookies?|consent|gdpr|banner|newsletter|subscribe|sidebar|breadcrumbs?|"
+    r"share|social|related|advert|ads?|promo|popup|modal|navbar|nav|menu|footer|comments?)([-_].*)?$",
+    re.IGNORECASE,
+)
+
+MAIN_CONTENT_SELECTORS = (
+    "article", "main", "[role=main]", "#content", "#main",
+    ".content", ".post", ".article", ".entry-content",
+)
+
+_HTML_MARKERS = re.compile(r"<(html|body|div|p|article|main|head)\b", re.IGNORECASE)
+_MARKDOWN_LINK = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+_NAV_SEPARATORS = re.compile(r"\s[|·•»›/]\s")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+# A consent banner: "cookie" together with what the banner asks for
+_COOKIE_LINE = re.compile(
+    r"\bcookies?\b.*\b(accept|allow|reject|decline|manage|preferences|settings|consent)\b"
+    r"|\b(accept|allow|reject|decline|manage|we use)\b.*\bcookies?\b",
+    re.IGNORECASE,
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return (len(text) + 3) // 4
+
+
+def looks_like_html(text: str) -> bool:
+    """Return True when the payload is (mostly) raw HTML rather than text/Markdown."""
+    return bool(_HTML_MARKERS.search(text[:4096]))
+
+
+# ---------------------------------------------------------------------
+# Pipeline stages
+# ---------------------------------------------------------------------
+
+def extract_main_content(html: str) -> str:
+    """Strip boilerplate elements and return the HTML of the main content block."""
+    soup = BeautifulSoup(html, "html.parser")
+
+    for tag in soup(BOILERPLATE_TAGS):
+        tag.decompose()
+
+    for el in soup.find_all(True):
+        if el.decomposed or el.name in ("html", "body", "article", "main"):
+            continue
+        tokens = [el.get("id") or "", *(el.get("class") or [])]
+        if not any(BOILERPLATE_HINTS.match(token) for token in tokens if token):
+            continue
+        # Never drop the wrapper of the page's main content
+        if el.find(["main", "article"]) or el.find(attrs={"role": "main"}):
+            continue
+        el.decompose()
+
+    candidates = [el for sel in MAIN_CONTENT_SELECTORS for el in soup.select(sel)]
+    if candidates:
+        main = max(candidates, key=lambda el: len(el.get_text(" ", strip=True)))
+    else:
+        main = soup.body or soup
+    return str(main)
+
+
+def html_to_markdown(html: str, keep_links: bool = False) -> str:
+    """Convert HTML to Markdown. Links are reduced to their text unless `keep_links`."""
+    strip = ["img"] if keep_links else ["img", "a"]
+    return markdownify(html, heading_style="ATX", bullets="-", strip=strip)
+
+
+def collapse_whitespace(text: str) -> str:
+    """Trim lines, collapse runs of spaces and blank lines."""
+    lines = [re.sub(r"[ \t ]+", " ", line).strip() for line in text.splitlines()]
+    text = "\n".join(lines)
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def _is_nav_like(line: str) -> bool:
+    """Mostly link text, or short items separated like a menu ("Home | Blog | About")."""
+    link_chars = sum(len(m.group(0)) for m in _MARKDOWN_LINK.finditer(line))
+    if link_chars and link_chars >= len(line) / 2:
+        return True
+    return len(line) < 120 and len(_NAV_SEPARATORS.findall(line)) >= 2
+
+
+def strip_text_boilerplate(text: str, edge_lines: int = 3) -> str:
+    """
+    Drop repeated menu/link rows and cookie banners from text/Markdown.
+    Fenced code blocks and table rows are kept verbatim.
+
+    Link rows are only dropped when they repeat, so a reference or "further
+    reading" list survives. Cookie lines are only dropped when they repeat or
+    sit where a banner lands in a text dump: the first `edge_lines` non-empty
+    lines before the first heading, or the last `edge_lines`. A sentence
+    about cookies inside the content is kept.
+    """
+    lines = text.splitlines()
+    content = [i for i, line in enumerate(lines) if line.strip()]
+    edges: set[int] = set()
+    if edge_lines:
+        for i in content[:edge_lines]:
+            if lines[i].lstrip().startswith("#"):
+                break
+            edges.add(i)
+        edges.update(content[-edge_lines:])
+    seen: set[str] = set()
+    kept = []
+    in_fence = False
+    for index, line in enumerate(lines):
+        stripped = line.strip()
+        if _FENCE.match(line):
+            in_fence = not in_fence
+            kept.append(line)
+            continue
+        if in_fence or stripped.startswith("|"):
+            kept.append(line)
+            continue
+        if stripped:
+            if len(stripped) < 200 and _COOKIE_LINE.search(stripped):
+                if index in edges or stripped in seen:
+                    continue
+                seen.add(stripped)
+            # menus and footers tend to repeat verbatim
+            elif _is_nav_like(stripped):
+                if stripped in seen:
+                    continue
+                seen.add(stripped)
+        kept.append(line)
+    return "\n".join(kept)
+
+
+# ---------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------
+
+@dataclass
+class ExtractionResult:
+    url: str
+    text: str
+    raw_tokens: int
+    clean_tokens: int
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.raw_tokens - self.clean_tokens
+
+    @property
+    def savings_ratio(self) -> float:
+        return self.saved_tokens / self.raw_tokens if self.raw_tokens else 0.0
+
+
+def clean_page(raw: str, url: str = "", keep_links: bool = False) -> ExtractionResult:
+    """Run the full extraction pipeline synchronously (safe to ship to a worker)."""
+    raw = raw or ""
+    if looks_like_html(raw):
+        # Banners were removed with their elements: the rest is main content
+        text = html_to_markdown(extract_main_content(raw), keep_links=keep_links)
+        text = strip_text_boilerplate(text, edge_lines=0)
+    else:
+        text = strip_text_boilerplate(raw)
+    text = collapse_whitespace(text)
+    return ExtractionResult(
+        url=url,
+        text=text,
+        raw_tokens=estimate_tokens(raw),
+        clean_tokens=estimate_tokens(text),
+    )
+
+
+async def extract_page(raw: str, url: str = "", keep_links: bool = False) -> ExtractionResult:
+    """Clean a fetched page off the event loop and log the token savings."""
+    result = await offload_service.run("process", clean_page, raw, url, keep_links)
+    logger.info(
+        "Extracted %s: ~%d → ~%d tokens (saved %d, %.0f%%)",
+        url or "<page>",
+        result.raw_tokens,
+        result.clean_tokens,
+        result.saved_tokens,
+        result.savings_ratio * 100,
+    )
+    return result
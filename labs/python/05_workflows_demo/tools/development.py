@@ -15,6 +15,8 @@ from typing import Annotated, Optional
 from pydantic import Field
 from agent_framework import ai_function
 
+from tools.offload import offload
+
 
 # ---------------------------------------------------------------------
 # Project & environment utilities
@@ -140,6 +142,7 @@ def lint_code(
     name="summarize_codebase",
     description="Count files, lines of code, and summarize language distribution."
 )
+@offload("process")
 def summarize_codebase(
     root: Annotated[str, Field(description="Root directory of the codebase.")]="."
 ) -> dict:
@@ -5,7 +5,9 @@ Local filesystem tools usable both directly in Python and as function tools
 for agents built with the Microsoft Agent Framework (Azure OpenAI Chat agents).
 
 Each function is decorated with @ai_function so it can be registered as a tool.
-All use standard Python I/O and are safe for local execution.
+All use standard Python I/O and are safe for local execution. Tools that can
+walk or read large trees are marked with @offload so they run outside the
+event loop (see tools/offload.py).
 """
 
 import os
@@ -17,6 +19,8 @@ from pathlib import Path
 from pydantic import Field
 from agent_framework import ai_function
 
+from tools.offload import offload
+
 
 # ---------------------------------------------------------------------
 # Helper utilities (non-tool internal helpers)
@@ -58,6 +62,7 @@ def create_directory(
     name="directory_tree",
     description="Get a recursive tree view of files and directories as a JSON structure."
 )
+@offload("process")
 def directory_tree(
     path: Annotated[str, Field(description="Root directory to scan recursively.")],
 ) -> str:
@@ -170,6 +175,7 @@ def read_file(
     name="read_multiple_files",
     description="Read the contents of multiple files simultaneously and return as a dict."
 )
+@offload("thread")
 def read_multiple_files(
     paths: Annotated[List[str], Field(description="List of file paths to read.")],
 ) -> dict[str, str]:
@@ -185,6 +191,7 @@ def read_multiple_files(
     name="search_files",
     description="Recursively search for files and directories matching a pattern."
 )
+@offload("thread")
 def search_files(
     root: Annotated[str, Field(description="Root directory to search recursively.")],
     pattern: Annotated[str, Field(description="Wildcard pattern (e.g. '*.py')")],
@@ -1,6 +1,8 @@
 # tools/mcp_tools.py
 from typing import Annotated, Optional
+from runners.cancellation import raise_if_cancelled
 from .mcp_gateway_client import MCPGatewayClient
+from .content_extraction import extract_page
 import logging
 
 logger = logging.getLogger("mcp_tools")
@@ -21,6 +23,7 @@ async def search_duckduckgo(
 ) -> str:
     if not mcp_client or not mcp_client.session:
         raise RuntimeError("MCP client not initialized")
+    raise_if_cancelled()
     return await mcp_client.call_tool("search", {"query": query, "max_results": max_results})
 
 
@@ -29,8 +32,13 @@ async def fetch_webpage(
 ) -> str:
     if not mcp_client or not mcp_client.session:
         raise RuntimeError("MCP client not initialized")
+    raise_if_cancelled()
     try:
-        return await mcp_client.call_tool("fetch_content", {"url": url})
+        raw = await mcp_client.call_tool("fetch_content", {"url": url})
     except Exception:
-        return await mcp_client.call_tool("fetch", {"url": url})
+        raise_if_cancelled()
+        raw = await mcp_client.call_tool("fetch", {"url": url})
+    # Strip boilerplate before the page lands in an LLM prompt
+    result = await extract_page(raw, url)
+    return result.text
   
@@ -0,0 +1,210 @@
+"""
+tools/offload.py
+----------------
+Shared executor service for blocking work, so one tool call cannot stall
+every other workflow run and SSE stream in the process.
+
+  - a thread pool for blocking I/O (filesystem walks, large reads/writes),
+  - a process pool for CPU-bound Python (HTML parsing, line counting, JSON
+    dumping of big trees), which a thread cannot run in parallel because
+    of the GIL.
+
+Tools opt in declaratively by stacking `@offload(...)` under `@ai_function`:
+
+    @ai_function(name="directory_tree", description="...")
+    @offload("process")
+    def directory_tree(path: ...) -> str: ...
+
+The function keeps its signature (the tool schema does not change) but
+becomes a coroutine that runs in the chosen pool. Process-pool functions
+must be module-level with picklable arguments and results; they are looked
+up by name in the worker process because the module attribute itself is
+the AIFunction wrapper.
+
+Calls made inside a cancellable workflow run (runners/cancellation.py)
+stop waiting when the run's CancelToken fires: work not started yet is
+dropped from the pool queue, work already running finishes in the
+background and its result is discarded.
+
+Per-function call counts and timings are in `offload_service.stats()`;
+the event loop's own blocking time is measured by metrics/event_loop.py.
+"""
+
+import asyncio
+import functools
+import importlib
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Callable, Literal
+
+from config import OFFLOAD_ENABLED, OFFLOAD_PROCESSES, OFFLOAD_START_METHOD, OFFLOAD_THREADS
+
+logger = logging.getLogger("maf.tools.offload")
+
+Kind = Literal["thread", "process"]
+
+# "module:qualname" → undecorated function, for lookups inside pool processes
+_REGISTRY: dict[str, Callable[..., Any]] = {}
+
+
+def _invoke_registered(key: str, args: tuple, kwargs: dict) -> Any:
+    """Process-pool entry point: import the defining module once, then call."""
+    if key not in _REGISTRY:
+        importlib.import_module(key.split(":", 1)[0])
+    return _REGISTRY[key](*args, **kwargs)
+
+
+@dataclass
+class OffloadStats:
+    calls: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    max_s: float = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "seconds": round(self.seconds, 3),
+            "avg_s": round(self.seconds / self.calls, 3) if self.calls else None,
+            "max_s": round(self.max_s, 3),
+        }
+
+
+class OffloadService:
+    """Lazily created thread and process pools shared by the whole process."""
+
+    def __init__(
+        self,
+        threads: int = 8,
+        processes: int = 2,
+        start_method: str = "spawn",
+        enabled: bool = True,
+    ):
+        self.threads = threads
+        self.processes = processes
+        self.start_method = start_method
+        self.enabled = enabled
+        self._thread_pool: ThreadPoolExecutor | None = None
+        self._process_pool: ProcessPoolExecutor | None = None
+        self._stats: dict[str, OffloadStats] = {}
+
+    def _pool(self, kind: Kind) -> Executor:
+        if kind == "thread":
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="maf-offload")
+            return self._thread_pool
+        if self._process_pool is None:
+            # Not fork: the parent has an event loop, DB pools and client threads
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.processes, mp_context=multiprocessing.get_context(self.start_method)
+            )
+            logger.info("⚙️ Offload process pool started (%d workers, %s)", self.processes, self.start_method)
+        return self._process_pool
+
+    async def run(self, kind: Kind, fn: Callable[..., Any], *args: Any, name: str | None = None, **kwargs: Any) -> Any:
+        """Run `fn(*args, **kwargs)` in the thread or process pool and await the result."""
+        name = name or getattr(fn, "__qualname__", repr(fn))
+        stats = self._stats.setdefault(f"{kind}:{name}", OffloadStats())
+        t0 = time.perf_counter()
+        try:
+            if not self.enabled:
+                return fn(*args, **kwargs)
+            call = functools.partial(fn, *args, **kwargs)
+            pool = self._pool(kind)
+            try:
+                return await self._submit(pool, kind, call, name)
+            except BrokenProcessPool:
+                # A worker died (OOM, segfault in a C extension): start a fresh pool once
+                logger.warning("Offload process pool broken, restarting it for %s", name)
+                self._discard_pool(pool)
+                return await self._submit(self._pool(kind), kind, call, name)
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - t0
+            stats.calls += 1
+            stats.seconds += elapsed
+            stats.max_s = max(stats.max_s, elapsed)
+
+    async def _submit(self, pool: Executor, kind: Kind, call: Callable[[], Any], name: str) -> Any:
+        # Imported here: pool processes import this module and need none of the runners
+        from runners.cancellation import RunCancelled, current_cancel_token, raise_if_cancelled
+
+        token = current_cancel_token()
+        if token is None:
+            return await asyncio.get_running_loop().run_in_executor(pool, call)
+        raise_if_cancelled()
+        future = pool.submit(call)
+        result = asyncio.wrap_future(future)
+        waiter = asyncio.ensure_future(token.wait())
+        try:
+            done, _ = await asyncio.wait({result, waiter}, timeout=token.remaining(), return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            result.cancel()
+            raise
+        finally:
+            waiter.cancel()
+        if result in done:
+            return result.result()
+        if not done:
+            token.expire()
+        # Drops the call if it has not started; a running one cannot be interrupted
+        if not future.cancel():
+            logger.info("Run cancelled while %s runs in the %s pool; its result will be dropped", name, kind)
+        result.cancel()
+        raise RunCancelled(token.reason or "cancelled", token.last_checkpoint_id)
+
+    def _discard_pool(self, pool: Executor) -> None:
+        # Concurrent calls may all see the same broken pool: only the first replaces it
+        if self._process_pool is pool:
+            self._process_pool = None
+        # Releases the broken pool's management thread and fails its queued futures
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {name: s.to_dict() for name, s in self._stats.items()}
+
+    def shutdown(self) -> None:
+        for pool in (self._thread_pool, self._process_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._thread_pool = self._process_pool = None
+
+
+offload_service = OffloadService(
+    threads=OFFLOAD_THREADS,
+    processes=OFFLOAD_PROCESSES,
+    start_method=OFFLOAD_START_METHOD,
+    enabled=OFFLOAD_ENABLED,
+)
+
+
+def offload(kind: Kind = "thread"):
+    """
+    Make a blocking function a coroutine that runs in the shared `kind` pool.
+    Stack it under `@ai_function` so the tool schema is built from the
+    original signature.
+    """
+    if kind not in ("thread", "process"):
+        raise ValueError(f"offload kind must be 'thread' or 'process', got {kind!r}")
+
+    def decorator(fn: Callable[..., Any]):
+        key = f"{fn.__module__}:{fn.__qualname__}"
+        _REGISTRY[key] = fn
+
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if kind == "process":
+                return await offload_service.run("process", _invoke_registered, key, args, kwargs, name=fn.__name__)
+            return await offload_service.run("thread", fn, *args, name=fn.__name__, **kwargs)
+
+        wrapper.offload_kind = kind
+        return wrapper
+
+    return decorator
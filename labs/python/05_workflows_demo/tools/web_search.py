@@ -0,0 +1,209 @@
+"""
+tools/web_search.py
+-------------------
+Direct web search for the SearchExecutors (SEARCH_MODE=direct).
+
+In agent mode SearchAgent calls `search_duckduckgo` and then writes the
+URLs back out as JSON: a full LLM round trip (prompt with every result,
+generated list) just to reformat the tool's own output, and a regex
+fallback when the model does not comply. Here the executor calls the tool
+itself and the results are handled locally:
+
+  1. optional query rewrite by QueryRewriterAgent (SEARCH_QUERY_REWRITE),
+  2. `search_duckduckgo` over MCP, asking for spare results,
+  3. parsing of the tool text (numbered "Title / URL: / Summary:" blocks,
+     JSON, or bare URLs as a last resort),
+  4. dedupe on a normalized URL (scheme, "www.", tracking parameters,
+     fragments and DuckDuckGo redirect links ignored),
+  5. ranking by query-term overlap with title and snippet, the search
+     engine's own order breaking ties, and at most `per_domain` URLs per site.
+
+The search stage then costs one MCP round trip (plus the short rewrite
+call when enabled) instead of a tool-calling conversation.
+"""
+
+import json
+import logging
+import re
+from dataclasses import dataclass
+from urllib.parse import parse_qs, parse_qsl, unquote, urlencode, urlsplit, urlunsplit
+
+from runners.cancellation import RunCancelled
+
+from .mcp_tools import search_duckduckgo
+
+logger = logging.getLogger("web_search")
+
+
+@dataclass
+class SearchHit:
+    url: str
+    title: str = ""
+    snippet: str = ""
+    position: int = 0
+
+
+# ---------------------------------------------------------------------
+# Parsing
+# ---------------------------------------------------------------------
+
+_RESULT_START = re.compile(r"^\s*(\d+)[.)]\s+(.*)$")
+_FIELD = re.compile(r"^\s*(url|link|href|summary|snippet|description|body)\s*:\s*(.*)$", re.IGNORECASE)
+_URL = re.compile(r"https?://[^\s<>\"'`)\]]+")
+
+
+def parse_search_results(text: str) -> list[SearchHit]:
+    """Search hits, in engine order, from the text returned by the search tool."""
+    text = (text or "").strip()
+    if text[:1] in "[{":
+        try:
+            hits = _hits_from_json(json.loads(text))
+            if hits:
+                return hits
+        except json.JSONDecodeError:
+            pass
+    hits = _hits_from_blocks(text)
+    if hits:
+        return hits
+    return [SearchHit(url=_clean_url(url), position=i) for i, url in enumerate(_URL.findall(text))]
+
+
+def _hits_from_json(data) -> list[SearchHit]:
+    if isinstance(data, dict):
+        data = data.get("results") or data.get("items") or []
+    hits = []
+    for item in data if isinstance(data, list) else []:
+        if isinstance(item, str):
+            url, title, snippet = item, "", ""
+        elif isinstance(item, dict):
+            url = item.get("url") or item.get("href") or item.get("link") or ""
+            title = item.get("title") or ""
+            snippet = item.get("snippet") or item.get("body") or item.get("summary") or item.get("description") or ""
+        else:
+            continue
+        if url.startswith("http"):
+            hits.append(SearchHit(url=_clean_url(url), title=title, snippet=snippet, position=len(hits)))
+    return hits
+
+
+def _hits_from_blocks(text: str) -> list[SearchHit]:
+    """The DuckDuckGo MCP server's "N. Title / URL: ... / Summary: ..." blocks."""
+    hits: list[SearchHit] = []
+    current: SearchHit | None = None
+    for line in text.splitlines():
+        start = _RESULT_START.match(line)
+        if start:
+            current = SearchHit(url="", title=start.group(2).strip(), position=len(hits))
+            hits.append(current)
+            continue
+        field = _FIELD.match(line)
+        if current is None or not field:
+            continue
+        name, value = field.group(1).lower(), field.group(2).strip()
+        if name in ("url", "link", "href"):
+            current.url = _clean_url(value)
+        else:
+            current.snippet = value
+    return [hit for hit in hits if hit.url.startswith("http")]
+
+
+def _clean_url(url: str) -> str:
+    url = url.strip().rstrip(".,;")
+    parts = urlsplit(url)
+    # DuckDuckGo HTML results link through /l/?uddg=<target>
+    if parts.netloc.endswith("duckduckgo.com") and parts.path.startswith("/l/"):
+        target = parse_qs(parts.query).get("uddg")
+        if target:
+            return unquote(target[0])
+    return url
+
+
+# ---------------------------------------------------------------------
+# Dedupe and ranking
+# ---------------------------------------------------------------------
+
+_TRACKING_PARAM = re.compile(r"^(utm_\w+|gclid|fbclid|ref|ref_src|mc_cid|mc_eid)$", re.IGNORECASE)
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it",
+    "of", "on", "or", "the", "to", "what", "when", "where", "which", "who", "why", "with",
+}
+
+
+def url_key(url: str) -> str:
+    """Identity of a URL for deduplication."""
+    parts = urlsplit(url)
+    host = parts.netloc.lower().removeprefix("www.")
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if not _TRACKING_PARAM.match(k)))
+    return urlunsplit(("", host, parts.path.rstrip("/") or "/", query, ""))
+
+
+def _terms(text: str) -> set[str]:
+    return {word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS and len(word) > 1}
+
+
+def rank_hits(hits: list[SearchHit], query: str, limit: int = 10, per_domain: int = 2) -> list[SearchHit]:
+    """Deduplicated hits, most relevant first, at most `per_domain` per site."""
+    unique: dict[str, SearchHit] = {}
+    for hit in hits:
+        parts = urlsplit(hit.url)
+        if parts.netloc.endswith("duckduckgo.com"):
+            continue  # ads and engine links
+        existing = unique.get(url_key(hit.url))
+        if existing is None:
+            unique[url_key(hit.url)] = hit
+        elif not existing.snippet:
+            existing.title, existing.snippet = existing.title or hit.title, hit.snippet
+
+    query_terms = _terms(query)
+
+    def score(hit: SearchHit) -> tuple[float, int]:
+        if not query_terms:
+            return 0.0, hit.position
+        title, snippet = _terms(hit.title), _terms(hit.snippet)
+        path = _terms(urlsplit(hit.url).path)
+        overlap = 2 * len(query_terms & title) + len(query_terms & snippet) + len(query_terms & path)
+        return -overlap / len(query_terms), hit.position
+
+    ranked, per_site = [], {}
+    for hit in sorted(unique.values(), key=score):
+        host = urlsplit(hit.url).netloc.lower().removeprefix("www.")
+        if per_domain and per_site.get(host, 0) >= per_domain:
+            continue
+        per_site[host] = per_site.get(host, 0) + 1
+        ranked.append(hit)
+        if len(ranked) >= limit:
+            break
+    return ranked
+
+
+# ---------------------------------------------------------------------
+# Search
+# ---------------------------------------------------------------------
+
+async def rewrite_query(rewriter, query: str) -> str:
+    """Ask `rewriter` (QueryRewriterAgent) for a search-engine query; the original on any failure."""
+    try:
+        response = await rewriter.run(query)
+    except RunCancelled:
+        raise
+    except Exception as e:
+        logger.warning("Query rewrite failed, searching the original query: %s", e)
+        return query
+    lines = [line.strip().strip("\"'`") for line in (response.text or "").splitlines() if line.strip()]
+    rewritten = lines[0] if lines else ""
+    if not rewritten or len(rewritten) > 4 * max(len(query), 50):
+        return query
+    logger.info("Search query rewritten: %r → %r", query, rewritten)
+    return rewritten
+
+
+async def direct_search(query: str, limit: int = 10, rewriter=None, per_domain: int = 2) -> list[str]:
+    """Up to `limit` ranked, deduplicated result URLs for `query`, without an LLM in the loop."""
+    search_query = await rewrite_query(rewriter, query) if rewriter is not None else query
+    # Spare results make up for duplicates and capped domains
+    raw = await search_duckduckgo(search_query, max_results=limit * 2)
+    hits = parse_search_results(raw)
+    ranked = rank_hits(hits, query if search_query == query else f"{query} {search_query}", limit, per_domain)
+    logger.info("Direct search: %d result(s), %d URL(s) kept for %r", len(hits), len(ranked), search_query)
+    return [hit.url for hit in ranked]
@@ -0,0 +1,96 @@
+# worker.py
+"""
+Distributed workflow runs over the Postgres job queue (maf_jobs).
+
+Start workers on any number of nodes pointing at the same Postgres:
+  python worker.py --concurrency 2
+  python worker.py --workflows 06SearchAndSumm,08MagSearchTools --drain
+
+Enqueue runs (from anywhere):
+  python worker.py --enqueue 08MagSearchTools --input "Agent Framework with Docker Model Runner"
+  python worker.py --enqueue 06SearchAndSumm --batch inputs.jsonl --priority batch
+  python worker.py --status
+"""
+
+import argparse
+import asyncio
+
+from config import JOB_MAX_ATTEMPTS, JOB_STALE_SECONDS, LOOP_LAG_WARN_MS, MCP_GATEWAY_URL
+
+from logger import get_logger
+from agents import AgentFactory
+from clients.replay import taped_mcp_client
+from metrics import LoopLagMonitor
+from persistence.checkpoint_storage_factory import CheckpointStorageFactory
+from persistence.postgres_job_queue import PostgresJobQueue
+from runners.batch import read_batch
+from runners.scheduler import PRIORITIES
+from runners.worker import Worker
+from tools import mcp_tools
+from tools.mcp_gateway_client import MCPGatewayClient
+from tools.offload import offload_service
+from workflows.workflow_factory import WorkflowFactory
+
+logger = get_logger("maf.worker")
+
+
+async def enqueue(queue: PostgresJobQueue, args) -> None:
+    priority = PRIORITIES[args.priority]
+    if args.batch:
+        items = read_batch(args.batch)
+        for item in items:
+            # Batch IDs make re-enqueueing the same file idempotent
+            await queue.enqueue(args.enqueue, item.input, priority, JOB_MAX_ATTEMPTS, job_id=f"{args.batch}:{item.id}")
+        logger.info("📥 Enqueued %d job(s) for %s", len(items), args.enqueue)
+    else:
+        job_id = await queue.enqueue(args.enqueue, args.input, priority, JOB_MAX_ATTEMPTS)
+        logger.info("📥 Enqueued job %s for %s", job_id, args.enqueue)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Run (or enqueue) workflow jobs from the Postgres job queue.")
+    parser.add_argument("--enqueue", metavar="WF", help="Enqueue a run of this workflow ID instead of working")
+    parser.add_argument("--input", default="Join Microsoft Agent Framework With Docker Model Runner")
+    parser.add_argument("--batch", help="JSONL file of inputs to enqueue (with --enqueue)")
+    parser.add_argument("--priority", choices=list(PRIORITIES), default="batch")
+    parser.add_argument("--status", action="store_true", help="Print job counts by status and exit")
+    parser.add_argument("--concurrency", type=int, default=1, help="Jobs in flight in this worker")
+    parser.add_argument("--workflows", help="Comma-separated workflow IDs this worker accepts (default: all)")
+    parser.add_argument("--drain", action="store_true", help="Exit once the queue is empty")
+    args = parser.parse_args()
+
+    storage = await CheckpointStorageFactory().init_postgres()
+    queue = PostgresJobQueue(storage, stale_after=JOB_STALE_SECONDS)
+    await queue.initialize()
+
+    try:
+        if args.status:
+            logger.info("Jobs by status: %s", await queue.counts())
+            return
+        if args.enqueue:
+            await enqueue(queue, args)
+            return
+
+        mcp_client = taped_mcp_client(MCPGatewayClient(MCP_GATEWAY_URL))
+        await mcp_client.connect()
+        await mcp_client.list_tools()
+        mcp_tools.init_mcp_client(mcp_client)
+        loop_monitor = LoopLagMonitor(warn_after=LOOP_LAG_WARN_MS / 1000).start()
+        try:
+            wf_factory = WorkflowFactory(AgentFactory().init_defaults(), storage).init_defaults()
+            workflow_ids = [w.strip() for w in args.workflows.split(",")] if args.workflows else None
+            await Worker(wf_factory, queue, concurrency=args.concurrency, workflow_ids=workflow_ids).run(drain=args.drain)
+        finally:
+            await mcp_client.close()
+            await loop_monitor.stop()
+            logger.info(loop_monitor.format_stats())
+            offload_service.shutdown()
+    finally:
+        await storage.close()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\nWorker stopped; in-flight jobs were handed back to the queue.")
@@ -0,0 +1,223 @@
+# workflows/checkpoint_policy.py
+"""
+How often a workflow built `.with_checkpointing(...)` actually saves.
+
+The framework snapshots every executor and writes a checkpoint after every
+superstep, including supersteps that only moved a message between two
+cheap executors. A CheckpointPolicy decides at each superstep boundary:
+
+  every          every superstep (the framework default)
+  every:N        every N-th superstep
+  hitl           only when the superstep issued a HITL request
+  expensive      only after a superstep in which an agent executor (one
+                 with an `agent`, i.e. an LLM call) or a listed executor ran
+  interval:S     at most once every S seconds
+
+Terms combine with "+", e.g. "every:4+expensive". Supersteps that issue a
+HITL request are always saved: that checkpoint is what lets a run waiting
+for a human be answered after a restart. So is the final checkpoint of a
+cancelled run (runners/cancellation.py).
+
+WorkflowFactory applies the policy per workflow (CHECKPOINT_POLICY,
+CHECKPOINT_POLICY_PER_WORKFLOW). Saved/skipped counts and save time per
+workflow are in `checkpoint_stats`, plus bytes written when
+CHECKPOINT_MEASURE_BYTES is on (measuring serializes each checkpoint a
+second time); benchmarks/checkpoint_policy_benchmark.py compares the
+policies on one run.
+"""
+
+import json
+import time
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from agent_framework import ExecutorCompletedEvent, RequestInfoEvent, Workflow, WorkflowCheckpoint
+
+from config import CHECKPOINT_MEASURE_BYTES, CHECKPOINT_POLICY, CHECKPOINT_POLICY_PER_WORKFLOW
+from logger import get_logger
+
+logger = get_logger("maf.checkpoint_policy")
+
+
+@dataclass(frozen=True)
+class SuperstepBoundary:
+    superstep: int
+    executors: frozenset[str]
+    hitl: bool
+    since_last_save_s: float
+
+
+@dataclass(frozen=True)
+class CheckpointPolicy:
+    always: bool = False
+    every_n: int | None = None
+    expensive: bool = False
+    interval_s: float | None = None
+    expensive_ids: frozenset[str] = frozenset()
+
+    @classmethod
+    def parse(cls, spec: str, expensive_ids=()) -> "CheckpointPolicy":
+        options: dict[str, Any] = {"expensive_ids": frozenset(expensive_ids)}
+        for term in filter(None, (t.strip() for t in spec.split("+"))):
+            name, _, arg = term.partition(":")
+            if name == "every" and not arg:
+                options["always"] = True
+            elif name == "every":
+                options["every_n"] = max(1, int(arg))
+            elif name == "hitl":
+                pass  # HITL boundaries are part of every policy
+            elif name == "expensive":
+                options["expensive"] = True
+            elif name == "interval":
+                options["interval_s"] = float(arg)
+            else:
+                raise ValueError(f"Unknown checkpoint policy term {term!r} in {spec!r}")
+        return cls(**options)
+
+    def should_save(self, boundary: SuperstepBoundary, expensive_executors: frozenset[str]) -> bool:
+        if self.always or boundary.hitl:
+            return True
+        if self.every_n and boundary.superstep % self.every_n == 0:
+            return True
+        if self.expensive and boundary.executors & expensive_executors:
+            return True
+        return self.interval_s is not None and boundary.since_last_save_s >= self.interval_s
+
+
+@dataclass
+class CheckpointWriteStats:
+    saved: int = 0
+    skipped: int = 0
+    bytes: int | None = None  # None: sizes not measured
+    save_s: float = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        measured = self.bytes is not None
+        return {
+            "saved": self.saved,
+            "skipped": self.skipped,
+            "kb_written": round(self.bytes / 1024, 1) if measured else None,
+            "avg_kb": round(self.bytes / self.saved / 1024, 1) if measured and self.saved else None,
+            "save_s": round(self.save_s, 3),
+        }
+
+
+# Registered workflow ID → write statistics of every instance built for it
+checkpoint_stats: dict[str, CheckpointWriteStats] = {}
+
+
+def format_checkpoint_stats() -> str:
+    lines = [f"{'workflow':<20} {'saved':>6} {'skipped':>8} {'KB':>9} {'avg KB':>7} {'save s':>7}"]
+    for wf_id, stats in checkpoint_stats.items():
+        s = stats.to_dict()
+        lines.append(
+            f"{wf_id:<20} {s['saved']:>6} {s['skipped']:>8} {s['kb_written'] if s['kb_written'] is not None else '-':>9} {s['avg_kb'] or '-':>7} {s['save_s']:>7}"
+        )
+    return "\n".join(lines)
+
+
+class _MeteredStorage:
+    """Forwards to the real storage, timing (and optionally sizing) each checkpoint write."""
+
+    def __init__(self, storage, stats: CheckpointWriteStats, measure_bytes: bool = False):
+        self._storage = storage
+        self._stats = stats
+        self._measure_bytes = measure_bytes
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._storage, name)
+
+    async def save_checkpoint(self, checkpoint: WorkflowCheckpoint) -> str:
+        t0 = time.perf_counter()
+        try:
+            return await self._storage.save_checkpoint(checkpoint)
+        finally:
+            self._stats.save_s += time.perf_counter() - t0
+            self._stats.saved += 1
+            if self._measure_bytes:
+                size = len(json.dumps(asdict(checkpoint), default=str).encode("utf-8"))
+                self._stats.bytes = (self._stats.bytes or 0) + size
+
+
+def expensive_executors(workflow: Workflow, extra_ids=()) -> frozenset[str]:
+    """Executors that call an LLM (hold an `agent`), plus any listed explicitly."""
+    return frozenset(
+        executor_id for executor_id, executor in workflow.executors.items() if getattr(executor, "agent", None) is not None
+    ) | frozenset(extra_ids)
+
+
+def apply_checkpoint_policy(
+    workflow: Workflow,
+    policy: CheckpointPolicy,
+    stats_key: str | None = None,
+    measure_bytes: bool = CHECKPOINT_MEASURE_BYTES,
+) -> Workflow:
+    """
+    Gate the workflow instance's checkpoint writes with `policy` and meter
+    them into `checkpoint_stats[stats_key]` (sizes only with `measure_bytes`).
+    Workflows built without checkpointing are returned unchanged.
+    """
+    runner = workflow._runner
+    ctx = runner.context
+    if not ctx.has_checkpointing():
+        return workflow
+    stats = checkpoint_stats.setdefault(stats_key or workflow.id, CheckpointWriteStats())
+    if measure_bytes and stats.bytes is None:
+        # Measured from the start: a run that saves nothing wrote 0 KB, not "unknown"
+        stats.bytes = 0
+    expensive = expensive_executors(workflow, policy.expensive_ids)
+    seen: set[str] = set()
+    hitl = False
+    last_save: float | None = None
+
+    original_add_event = ctx.add_event
+    original_create = runner._create_checkpoint_if_enabled
+
+    async def add_event(event) -> None:
+        nonlocal hitl
+        if isinstance(event, ExecutorCompletedEvent):
+            seen.add(event.executor_id)
+        elif isinstance(event, RequestInfoEvent):
+            hitl = True
+        await original_add_event(event)
+
+    async def create_checkpoint_if_enabled(checkpoint_type: str) -> str | None:
+        nonlocal hitl, last_save
+        now = time.monotonic()
+        if last_save is None or checkpoint_type == "after_initial_execution":
+            last_save = now
+        boundary = SuperstepBoundary(runner._iteration, frozenset(seen), hitl, now - last_save)
+        seen.clear()
+        hitl = False
+        if not ctx.has_checkpointing():
+            return None
+        if checkpoint_type != "cancelled" and not policy.should_save(boundary, expensive):
+            stats.skipped += 1
+            logger.debug("[%s] checkpoint skipped at superstep %d", workflow.id, boundary.superstep)
+            return None
+        # Re-wrapped when a resume swapped in another storage
+        if not isinstance(ctx._checkpoint_storage, _MeteredStorage):
+            ctx._checkpoint_storage = _MeteredStorage(ctx._checkpoint_storage, stats, measure_bytes)
+        checkpoint_id = await original_create(checkpoint_type)
+        last_save = time.monotonic()
+        return checkpoint_id
+
+    ctx.add_event = add_event
+    runner._create_checkpoint_if_enabled = create_checkpoint_if_enabled
+    return workflow
+
+
+def _policies(value: str) -> dict[str, str]:
+    """Parse "wfA=hitl,wfB=every:3" into {"wfA": "hitl", "wfB": "every:3"}."""
+    policies = {}
+    for part in value.split(","):
+        if "=" in part:
+            wf_id, spec = part.split("=", 1)
+            policies[wf_id.strip()] = spec.strip()
+    return policies
+
+
+def build_checkpoint_policies() -> tuple[CheckpointPolicy, dict[str, CheckpointPolicy]]:
+    """Default policy and per-workflow overrides from CHECKPOINT_POLICY* settings."""
+    default = CheckpointPolicy.parse(CHECKPOINT_POLICY)
+    return default, {wf_id: CheckpointPolicy.parse(spec) for wf_id, spec in _policies(CHECKPOINT_POLICY_PER_WORKFLOW).items()}
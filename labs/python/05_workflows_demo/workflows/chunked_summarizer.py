@@ -0,0 +1,237 @@
+# workflows/chunked_summarizer.py
+"""
+Reusable map-reduce summarization executor.
+
+Long material (fetched pages, collected notes) does not fit a single prompt on
+a local model. The executor:
+
+  1. splits the text into chunks that fit a token budget,
+  2. summarizes the chunks concurrently (bounded), each in its own short
+     conversation with the summarizer agent,
+  3. reduces the partial summaries hierarchically until they fit one prompt,
+     and writes the final answer.
+"""
+
+import asyncio
+import re
+
+from agent_framework import (
+    ChatMessage,
+    Executor,
+    WorkflowContext,
+    handler,
+)
+from agents import AgentFactory
+from config import SUMMARY_CHUNK_TOKENS, SUMMARY_MAX_CONCURRENCY
+from logger import get_logger
+from runners.cancellation import RunCancelled
+from tools.content_extraction import estimate_tokens
+
+logger = get_logger("maf.chunked_summarizer")
+
+
+# ------------------------------------------------------------
+# Token-budget splitting
+# ------------------------------------------------------------
+def _split_oversized(block: str, max_tokens: int) -> list[str]:
+    """Split a single block that exceeds the budget, by sentence, then hard cut."""
+    pieces: list[str] = []
+    current = ""
+    for sentence in re.split(r"(?<=[.!?])\s+", block):
+        if estimate_tokens(sentence) > max_tokens and current:
+            # Keep the order: what came before the oversized sentence goes first
+            pieces.append(current)
+            current = ""
+        while estimate_tokens(sentence) > max_tokens:
+            cut = max_tokens * 4
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:]
+        candidate = f"{current} {sentence}".strip()
+        if current and estimate_tokens(candidate) > max_tokens:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_by_token_budget(text: str, max_tokens: int) -> list[str]:
+    """Greedily pack paragraphs into chunks of at most `max_tokens` (estimated)."""
+    chunks: list[str] = []
+    current: list[str] = []
+    current_tokens = 0
+    for block in re.split(r"\n\s*\n", text or ""):
+        block = block.strip()
+        if not block:
+            continue
+        block_tokens = estimate_tokens(block)
+        if block_tokens > max_tokens:
+            parts = _split_oversized(block, max_tokens)
+        else:
+            parts = [block]
+        for part in parts:
+            part_tokens = estimate_tokens(part)
+            if current and current_tokens + part_tokens > max_tokens:
+                chunks.append("\n\n".join(current))
+                current, current_tokens = [], 0
+            current.append(part)
+            current_tokens += part_tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def group_by_token_budget(texts: list[str], max_tokens: int) -> list[list[str]]:
+    """Pack partial summaries into groups for one reduce step (at least two per group)."""
+    groups: list[list[str]] = []
+    current: list[str] = []
+    current_tokens = 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if len(current) >= 2 and current_tokens + tokens > max_tokens:
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+# ------------------------------------------------------------
+# Executor
+# ------------------------------------------------------------
+class ChunkedSummarizerExecutor(Executor):
+    """
+    Map-reduce summarizer. Reads its material from shared state (`source_key`)
+    or from the incoming message, focuses the summaries on `query_key`, and
+    either yields the final text as workflow output or forwards it downstream.
+    """
+
+    def __init__(
+        self,
+        factory: AgentFactory,
+        id="chunked_summarizer",
+        agent_name: str = "SummarizerAgent",
+        source_key: str | None = None,
+        query_key: str | None = "user_query",
+        result_key: str | None = None,
+        chunk_tokens: int = SUMMARY_CHUNK_TOKENS,
+        max_concurrency: int = SUMMARY_MAX_CONCURRENCY,
+        yield_output: bool = True,
+    ):
+        super().__init__(id=id)
+        self.agent = factory.get(agent_name)
+        self._source_key = source_key
+        self._query_key = query_key
+        self._result_key = result_key
+        self._chunk_tokens = chunk_tokens
+        self._max_concurrency = max(1, max_concurrency)
+        self._yield_output = yield_output
+
+    @handler
+    async def handle(self, message: ChatMessage, ctx: WorkflowContext[ChatMessage, str]):
+        try:
+            material = (await self._get_optional(ctx, self._source_key)) or message.text or ""
+            query = (await self._get_optional(ctx, self._query_key)) or message.text or ""
+            result = await self.summarize(material.strip(), query)
+        except RunCancelled:
+            raise
+        except Exception as e:
+            logger.exception("[ChunkedSummarizer] Error during summarization: %s", e)
+            result = "⚠️ Summarizer failed."
+
+        if self._result_key:
+            await ctx.set_shared_state(self._result_key, result)
+        if self._yield_output:
+            await ctx.yield_output(result)
+        else:
+            await ctx.send_message(ChatMessage(role="assistant", text=result))
+
+    async def summarize(self, material: str, query: str) -> str:
+        """Run the map → (hierarchical) reduce → final pipeline over `material`."""
+        if not material:
+            return "No material to summarize."
+
+        chunks = split_by_token_budget(material, self._chunk_tokens)
+        logger.info(
+            "[ChunkedSummarizer] ~%d tokens → %d chunk(s) (budget %d, concurrency %d)",
+            estimate_tokens(material), len(chunks), self._chunk_tokens, self._max_concurrency,
+        )
+        if len(chunks) == 1:
+            return await self._run(self._final_prompt(query, chunks))
+        return await self._run(self._final_prompt(query, await self.condense(chunks, query)))
+
+    async def condense(self, chunks: list[str], query: str) -> list[str]:
+        """Map → (hierarchical) reduce only: partial summaries of `chunks` that fit one chunk budget."""
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+        summaries = await asyncio.gather(*[
+            self._bounded(semaphore, self._map_prompt(query, chunk, i + 1, len(chunks)))
+            for i, chunk in enumerate(chunks)
+        ])
+
+        level = 1
+        while sum(estimate_tokens(s) for s in summaries) > self._chunk_tokens and len(summaries) > 1:
+            groups = group_by_token_budget(summaries, self._chunk_tokens)
+            logger.info("[ChunkedSummarizer] reduce level %d: %d → %d", level, len(summaries), len(groups))
+            summaries = await asyncio.gather(*[
+                self._bounded(semaphore, self._reduce_prompt(query, group)) for group in groups
+            ])
+            level += 1
+        return summaries
+
+    # --------------------------------------------------------
+    # Prompts
+    # --------------------------------------------------------
+    @staticmethod
+    def _map_prompt(query: str, chunk: str, index: int, total: int) -> str:
+        return (
+            f"You are summarizing part {index} of {total} of the research material "
+            f"for the question:\n'{query}'.\n\n"
+            "Extract only the facts, figures and arguments that help answer the question. "
+            "Keep source URLs when present. Be concise.\n\n"
+            f"{chunk}"
+        )
+
+    @staticmethod
+    def _reduce_prompt(query: str, summaries: list[str]) -> str:
+        joined = "\n\n---\n\n".join(summaries)
+        return (
+            f"Merge these partial research summaries for the question:\n'{query}'.\n"
+            "Remove duplicates, keep every distinct fact and source URL, stay concise.\n\n"
+            f"{joined}"
+        )
+
+    @staticmethod
+    def _final_prompt(query: str, summaries: list[str]) -> str:
+        joined = "\n\n---\n\n".join(summaries)
+        return (
+            f"You are writing a concise research summary that directly answers this question:\n"
+            f"'{query}'.\n\n"
+            "Here is the collected material:\n\n"
+            f"{joined}\n\n"
+            "Write a clear, factual answer, focused strictly on the question."
+        )
+
+    # --------------------------------------------------------
+    # Helpers
+    # --------------------------------------------------------
+    async def _bounded(self, semaphore: asyncio.Semaphore, prompt: str) -> str:
+        async with semaphore:
+            return await self._run(prompt)
+
+    async def _run(self, prompt: str) -> str:
+        # No thread: every call is a fresh, short conversation
+        response = await self.agent.run([ChatMessage(role="user", text=prompt)])
+        return (response.text or "").strip()
+
+    @staticmethod
+    async def _get_optional(ctx: WorkflowContext, key: str | None):
+        if not key:
+            return None
+        try:
+            return await ctx.get_shared_state(key)
+        except KeyError:
+            return None
@@ -0,0 +1,82 @@
+# workflows/deadlines.py
+"""
+Per-executor deadlines.
+
+An executor's handler runs with no time bound: one pathological generation
+(a local model looping on its own output) blocks the run forever. With a
+deadline, `Executor.execute` of that executor instance is cancelled after
+the given number of seconds, which cancels the model request it is awaiting
+and fails the run with ExecutorDeadlineExceeded (a WorkflowFailedEvent
+naming the executor), instead of hanging.
+
+Nothing is bounded unless EXECUTOR_DEADLINES says so. Deadlines are keyed
+by executor ID or executor class name, "*" is the default for every other
+executor and 0 disables a deadline:
+
+    EXECUTOR_DEADLINES="title_generator=120,search_agent=180,collector_agent=0,*=900"
+
+The deadline covers the whole superstep of that executor, retries and tool
+loops included; size it for the slowest legitimate run, not the average.
+"""
+
+import asyncio
+import functools
+import time
+from typing import Any
+
+from agent_framework import Workflow
+
+from config import EXECUTOR_DEADLINES
+from logger import get_logger
+
+logger = get_logger("maf.deadlines")
+
+
+class ExecutorDeadlineExceeded(TimeoutError):
+    def __init__(self, executor_id: str, seconds: float):
+        super().__init__(f"Executor '{executor_id}' exceeded its {seconds:g}s deadline")
+        self.executor_id = executor_id
+        self.seconds = seconds
+
+
+def parse_deadlines(spec: str) -> dict[str, float]:
+    """Parse "search_executor=120,*=900" into {"search_executor": 120.0, "*": 900.0}."""
+    deadlines = {}
+    for part in spec.split(","):
+        if "=" in part:
+            key, seconds = part.split("=", 1)
+            deadlines[key.strip()] = float(seconds)
+    return deadlines
+
+
+def deadline_for(executor: Any, deadlines: dict[str, float]) -> float | None:
+    for key in (executor.id, type(executor).__name__, "*"):
+        if key in deadlines:
+            return deadlines[key] if deadlines[key] > 0 else None
+    return None
+
+
+def apply_executor_deadlines(workflow: Workflow, deadlines: dict[str, float] | None = None) -> Workflow:
+    """Bound `execute` of every executor of this workflow instance that has a deadline."""
+    deadlines = parse_deadlines(EXECUTOR_DEADLINES) if deadlines is None else deadlines
+    for executor in workflow.executors.values():
+        seconds = deadline_for(executor, deadlines)
+        if seconds is None:
+            continue
+        executor.execute = _bounded(executor, executor.execute, seconds)
+    return workflow
+
+
+def _bounded(executor: Any, execute, seconds: float):
+    @functools.wraps(execute)
+    async def bounded(*args: Any, **kwargs: Any) -> Any:
+        t0 = time.monotonic()
+        try:
+            return await asyncio.wait_for(execute(*args, **kwargs), seconds)
+        except asyncio.TimeoutError:
+            if time.monotonic() - t0 < seconds:
+                raise  # raised by the handler itself, not the deadline
+            logger.error("[%s] cancelled after its %gs deadline", executor.id, seconds)
+            raise ExecutorDeadlineExceeded(executor.id, seconds) from None
+
+    return bounded
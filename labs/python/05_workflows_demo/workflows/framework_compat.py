@@ -0,0 +1,46 @@
+# workflows/framework_compat.py
+"""
+The few agent_framework internals used outside the runner hooks, kept in
+one place. The framework does not expose them publicly, so a version that
+renames or removes one fails here with a clear error instead of an
+AttributeError deep inside a run.
+"""
+
+from typing import Any, Callable
+
+from agent_framework import Workflow
+
+
+class FrameworkIncompatible(RuntimeError):
+    """This agent_framework version lacks an internal the demo relies on."""
+
+
+def bind_checkpoints(workflow: Workflow, run_key: str) -> None:
+    """
+    File the instance's checkpoints under `run_key`. A Workflow otherwise uses
+    its construction-time UUID, which no other process (or later run) can know.
+    """
+    context = getattr(getattr(workflow, "_runner", None), "context", None)
+    set_workflow_id = getattr(context, "set_workflow_id", None)
+    if set_workflow_id is None:
+        raise FrameworkIncompatible(
+            "Workflow._runner.context.set_workflow_id not found in this agent_framework version: "
+            "checkpoints cannot be filed under a stable workflow or job ID"
+        )
+    set_workflow_id(run_key)
+
+
+def checkpoint_codec() -> tuple[Callable[[Any], Any], Callable[[Any], Any]]:
+    """
+    The framework's (encode, decode) pair for checkpoint values: JSON-safe
+    documents that round-trip dataclasses, ChatMessages and other framework
+    types, i.e. exactly what a checkpoint can hold.
+    """
+    try:
+        from agent_framework._workflows._runner_context import _decode_checkpoint_value, _encode_checkpoint_value
+    except ImportError as e:
+        raise FrameworkIncompatible(
+            "agent_framework._workflows._runner_context._encode_checkpoint_value/_decode_checkpoint_value "
+            f"not found in this agent_framework version: {e}"
+        ) from e
+    return _encode_checkpoint_value, _decode_checkpoint_value
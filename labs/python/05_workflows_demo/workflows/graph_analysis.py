@@ -0,0 +1,412 @@
+# workflows/graph_analysis.py
+"""
+Critical-path analysis of built workflows.
+
+The graph comes from the Workflow itself (edge groups), the cost of each
+executor from recorded runs (`executor_time_s` in the run usage summaries,
+see metrics/usage.py) or, when nothing was recorded, one unit per agent
+executor.
+
+What each executor really needs is read from its handler source:
+
+  - whether the handler uses the incoming message at all,
+  - which shared-state keys it reads and writes (`ctx.get_shared_state("k")`
+    / `ctx.set_shared_state("k", ...)`, also inside `self._helper()` calls).
+
+An executor that ignores its message depends only on the writers of the keys
+it reads. An edge into it is then ordering only, and the executor could run
+concurrently with that branch. Example: wf08 with `concurrent_stages=False`,
+where search only reads "user_query" but waits for title → folder.
+
+Makespan is estimated with the superstep model the runner uses: executors
+in the same superstep run together, and the superstep lasts as long as its
+slowest executor. The "rewired" estimate puts every executor in the
+superstep right after its last real dependency (as a fan-in would).
+Conditional edges are counted as taken, so both estimates are upper bounds.
+"""
+
+import ast
+import inspect
+import textwrap
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+
+from agent_framework import Executor, FanInEdgeGroup, Workflow
+
+PROJECT_PACKAGES = ("workflows", "agents", "tools")
+
+
+# ------------------------------------------------------------
+# Graph model
+# ------------------------------------------------------------
+@dataclass
+class ExecutorInfo:
+    id: str
+    kind: str
+    # False only when the handler source was analyzed and never touches its message
+    consumes_input: bool = True
+    reads: set[str] = field(default_factory=set)
+    writes: set[str] = field(default_factory=set)
+    # Shared-state access with a non-literal key: treated as depending on everything upstream
+    dynamic_state: bool = False
+    analyzed: bool = False
+    uses_agent: bool = False
+
+
+@dataclass
+class GraphEdge:
+    source: str
+    target: str
+    group: str
+    # Index of the edge group in `workflow.edge_groups`
+    group_index: int = 0
+    conditional: bool = False
+    back_edge: bool = False
+
+
+@dataclass
+class WorkflowGraph:
+    workflow_id: str
+    start: str
+    executors: dict[str, ExecutorInfo]
+    edges: list[GraphEdge]
+
+    def forward_edges(self) -> list[GraphEdge]:
+        return [e for e in self.edges if not e.back_edge]
+
+    def predecessors(self, node: str) -> set[str]:
+        return {e.source for e in self.forward_edges() if e.target == node}
+
+    def ancestors(self, node: str) -> set[str]:
+        seen: set[str] = set()
+        stack = list(self.predecessors(node))
+        while stack:
+            current = stack.pop()
+            if current not in seen:
+                seen.add(current)
+                stack.extend(self.predecessors(current))
+        return seen
+
+    def topological_order(self) -> list[str]:
+        indegree = {node: 0 for node in self.executors}
+        for edge in self.forward_edges():
+            indegree[edge.target] += 1
+        order, ready = [], [self.start] + [n for n, d in indegree.items() if d == 0 and n != self.start]
+        while ready:
+            node = ready.pop(0)
+            order.append(node)
+            for edge in self.forward_edges():
+                if edge.source == node:
+                    indegree[edge.target] -= 1
+                    if indegree[edge.target] == 0:
+                        ready.append(edge.target)
+        return order
+
+
+# ------------------------------------------------------------
+# Extraction
+# ------------------------------------------------------------
+def _handler_functions(executor: Executor) -> list[tuple[Any, str | None]]:
+    """(function, name of its message parameter) for every handler of the executor."""
+    handlers = []
+    original = getattr(executor, "_original_func", None)  # FunctionExecutor (@executor)
+    candidates = [original] if original is not None else list(getattr(executor, "_handlers", {}).values())
+    for candidate in candidates:
+        fn = getattr(candidate, "__func__", candidate)
+        params = [p for p in inspect.signature(fn).parameters if p not in ("self", "cls")]
+        handlers.append((fn, params[0] if params else None))
+    return handlers
+
+
+def _parse_function(fn) -> ast.FunctionDef | ast.AsyncFunctionDef | None:
+    try:
+        tree = ast.parse(textwrap.dedent(inspect.getsource(fn)))
+    except (OSError, TypeError, SyntaxError):
+        return None
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            return node
+    return None
+
+
+def _state_access(node: ast.AST, info: ExecutorInfo, helpers: dict[str, Any], seen: set[str]) -> None:
+    """Collect shared-state keys used in `node`, following `self.<method>()` calls."""
+    for call in (n for n in ast.walk(node) if isinstance(n, ast.Call) and isinstance(n.func, ast.Attribute)):
+        attr = call.func.attr
+        if attr in ("get_shared_state", "set_shared_state"):
+            key = call.args[0] if call.args else None
+            if isinstance(key, ast.Constant) and isinstance(key.value, str):
+                (info.reads if attr == "get_shared_state" else info.writes).add(key.value)
+            else:
+                info.dynamic_state = True
+        elif isinstance(call.func.value, ast.Name) and call.func.value.id == "self" and attr in helpers and attr not in seen:
+            seen.add(attr)
+            helper = _parse_function(helpers[attr])
+            if helper is not None:
+                _state_access(helper, info, helpers, seen)
+
+
+def inspect_executor(executor: Executor) -> ExecutorInfo:
+    info = ExecutorInfo(
+        id=executor.id,
+        kind=type(executor).__name__,
+        uses_agent=hasattr(executor, "agent") or type(executor).__name__ == "AgentExecutor",
+    )
+    if not type(executor).__module__.startswith(PROJECT_PACKAGES):
+        # Framework executors (RequestInfoExecutor, AgentExecutor...) always use their input
+        return info
+    helpers = {name: fn for name, fn in inspect.getmembers(type(executor), inspect.isfunction)}
+    consumes = False
+    for fn, message_param in _handler_functions(executor):
+        tree = _parse_function(fn)
+        if tree is None:
+            return info
+        body = ast.Module(body=tree.body, type_ignores=[])
+        used = {n.id for n in ast.walk(body) if isinstance(n, ast.Name)}
+        consumes = consumes or (message_param in used)
+        _state_access(body, info, helpers, set())
+    info.consumes_input = consumes
+    info.analyzed = True
+    return info
+
+
+def extract_graph(workflow: Workflow) -> WorkflowGraph:
+    executors = {eid: inspect_executor(ex) for eid, ex in workflow.executors.items()}
+    edges = []
+    for index, group in enumerate(workflow.edge_groups):
+        selection = getattr(group, "selection_func_name", None) is not None
+        for edge in group.edges:
+            edges.append(
+                GraphEdge(
+                    source=edge.source_id,
+                    target=edge.target_id,
+                    group=type(group).__name__,
+                    group_index=index,
+                    conditional=selection or getattr(edge, "condition_name", None) is not None,
+                )
+            )
+    graph = WorkflowGraph(workflow.id, workflow.start_executor_id, executors, edges)
+    _mark_back_edges(graph)
+    return graph
+
+
+def _mark_back_edges(graph: WorkflowGraph) -> None:
+    """Edges closing a cycle (loops such as wf05's judge → transform) are ignored by the analysis."""
+    on_stack: set[str] = set()
+    done: set[str] = set()
+    outgoing = defaultdict(list)
+    for edge in graph.edges:
+        outgoing[edge.source].append(edge)
+
+    def visit(node: str) -> None:
+        on_stack.add(node)
+        for edge in outgoing[node]:
+            if edge.target in on_stack:
+                edge.back_edge = True
+            elif edge.target not in done:
+                visit(edge.target)
+        on_stack.discard(node)
+        done.add(node)
+
+    visit(graph.start)
+    for node in graph.executors:
+        if node not in done:
+            visit(node)
+
+
+# ------------------------------------------------------------
+# Dependencies and schedules
+# ------------------------------------------------------------
+def true_dependencies(graph: WorkflowGraph) -> dict[str, set[str]]:
+    """What each executor must wait for: the message it consumes and the state it reads."""
+    deps: dict[str, set[str]] = {}
+    for node in graph.topological_order():
+        info = graph.executors[node]
+        preds = graph.predecessors(node)
+        if not info.analyzed or info.consumes_input or info.dynamic_state:
+            needed = set(preds)
+        else:
+            needed = set()
+        if info.dynamic_state:
+            needed |= graph.ancestors(node)
+        else:
+            for ancestor in graph.ancestors(node):
+                if graph.executors[ancestor].writes & info.reads:
+                    needed.add(ancestor)
+        if not needed and node != graph.start:
+            needed = {graph.start}  # something still has to trigger it
+        deps[node] = needed
+    return deps
+
+
+def superstep_schedule(graph: WorkflowGraph, waits_for: dict[str, list[set[str]]]) -> dict[str, int]:
+    """Superstep of each executor; `waits_for[node]` = groups of sources that must all have run."""
+    steps: dict[str, int] = {}
+    for node in graph.topological_order():
+        groups = [g for g in waits_for.get(node, []) if g]
+        steps[node] = max((max(steps.get(s, 0) for s in g) + 1 for g in groups), default=0)
+    return steps
+
+
+def makespan(steps: dict[str, int], weights: dict[str, float]) -> float:
+    per_step: dict[int, float] = defaultdict(float)
+    for node, step in steps.items():
+        per_step[step] = max(per_step[step], weights.get(node, 0.0))
+    return sum(per_step.values())
+
+
+def critical_path(graph: WorkflowGraph, weights: dict[str, float]) -> tuple[float, list[str]]:
+    """Heaviest start-to-sink path of the declared graph (back edges removed)."""
+    best: dict[str, tuple[float, list[str]]] = {}
+    for node in graph.topological_order():
+        incoming = [best[p] for p in graph.predecessors(node) if p in best]
+        length, path = max(incoming, key=_path_key, default=(0.0, []))
+        best[node] = (length + weights.get(node, 0.0), path + [node])
+    return max(best.values(), key=_path_key, default=(0.0, []))
+
+
+def _path_key(length_path: tuple[float, list[str]]) -> tuple[float, int]:
+    # Ties (e.g. zero-cost executors) go to the longer chain
+    return length_path[0], len(length_path[1])
+
+
+# ------------------------------------------------------------
+# Report
+# ------------------------------------------------------------
+@dataclass
+class SequentialPair:
+    source: str
+    target: str
+    reason: str
+
+
+@dataclass
+class CriticalPathReport:
+    workflow_id: str
+    weights: dict[str, float]
+    assumed: set[str]
+    unit: str
+    critical_path: list[str]
+    critical_length: float
+    declared_makespan: float
+    rewired_makespan: float
+    declared_steps: dict[str, int]
+    rewired_steps: dict[str, int]
+    ordering_only: list[SequentialPair]
+    graph: WorkflowGraph
+
+    @property
+    def speedup(self) -> float:
+        return self.declared_makespan / self.rewired_makespan if self.rewired_makespan else 1.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "workflow_id": self.workflow_id,
+            "unit": self.unit,
+            "weights": {k: round(v, 3) for k, v in self.weights.items()},
+            "assumed_weights": sorted(self.assumed),
+            "critical_path": self.critical_path,
+            "critical_length": round(self.critical_length, 3),
+            "declared_makespan": round(self.declared_makespan, 3),
+            "rewired_makespan": round(self.rewired_makespan, 3),
+            "estimated_speedup": round(self.speedup, 2),
+            "ordering_only_edges": [vars(p) for p in self.ordering_only],
+            "back_edges": [f"{e.source}->{e.target}" for e in self.graph.edges if e.back_edge],
+        }
+
+    def format(self) -> str:
+        fmt = (lambda v: f"{v:.2f}s") if self.unit == "s" else (lambda v: f"{v:g}u")
+        lines = [f"== {self.workflow_id} =="]
+        path = " → ".join(
+            f"{n} ({fmt(self.weights.get(n, 0.0))}{'*' if n in self.assumed else ''})" for n in self.critical_path
+        )
+        lines.append(f"critical path {fmt(self.critical_length)}: {path}")
+        if self.critical_length > 0:
+            heaviest = max(self.critical_path, key=lambda n: self.weights.get(n, 0.0))
+            share = self.weights.get(heaviest, 0.0) / self.critical_length * 100
+            lines.append(f"dominant executor: {heaviest} ({share:.0f}% of the critical path)")
+        for pair in self.ordering_only:
+            lines.append(f"ordering-only edge {pair.source} → {pair.target}: {pair.reason}")
+        lines.append(
+            f"superstep makespan: declared {fmt(self.declared_makespan)} "
+            f"({max(self.declared_steps.values(), default=-1) + 1} steps), "
+            f"rewired {fmt(self.rewired_makespan)} ({max(self.rewired_steps.values(), default=-1) + 1} steps)"
+            + (f" → estimated speedup ×{self.speedup:.2f}" if self.speedup > 1.001 else " (no gain)")
+        )
+        back = [f"{e.source}→{e.target}" for e in self.graph.edges if e.back_edge]
+        if back:
+            lines.append(f"loops ignored: {', '.join(back)}")
+        if self.assumed:
+            lines.append("* no recorded timing; assumed")
+        return "\n".join(lines)
+
+
+def analyze(
+    workflow: Workflow,
+    timings: dict[str, float] | None = None,
+    default_agent_weight: float = 1.0,
+) -> CriticalPathReport:
+    """
+    Critical path and parallelization headroom of one workflow. `timings`
+    maps executor ID → seconds per run; missing executors get
+    `default_agent_weight` if they call an agent and 0 otherwise.
+    """
+    graph = extract_graph(workflow)
+    timings = timings or {}
+    weights, assumed = {}, set()
+    for node, info in graph.executors.items():
+        if node in timings:
+            weights[node] = timings[node]
+        else:
+            weights[node] = default_agent_weight if info.uses_agent else 0.0
+            assumed.add(node)
+
+    # Declared: each edge group is one activation (fan-in waits for all its sources)
+    waits: dict[str, dict[Any, set[str]]] = defaultdict(dict)
+    for i, edge in enumerate(graph.forward_edges()):
+        key = edge.group_index if edge.group == FanInEdgeGroup.__name__ else ("edge", i)
+        waits[edge.target].setdefault(key, set()).add(edge.source)
+    declared = {node: list(groups.values()) for node, groups in waits.items()}
+    deps = true_dependencies(graph)
+    rewired = {node: [needed] for node, needed in deps.items()}
+
+    ordering_only = []
+    for edge in graph.forward_edges():
+        if edge.source in deps.get(edge.target, set()) or edge.source == graph.start:
+            continue
+        info = graph.executors[edge.target]
+        reads = f"reads {sorted(info.reads)}" if info.reads else "reads no shared state"
+        ordering_only.append(
+            SequentialPair(edge.source, edge.target, f"{edge.target} ignores its message and {reads} not written by {edge.source}")
+        )
+
+    length, path = critical_path(graph, weights)
+    declared_steps = superstep_schedule(graph, declared)
+    rewired_steps = superstep_schedule(graph, rewired)
+    return CriticalPathReport(
+        workflow_id=workflow.id,
+        weights=weights,
+        assumed=assumed,
+        unit="s" if timings else "units",
+        critical_path=path,
+        critical_length=length,
+        declared_makespan=makespan(declared_steps, weights),
+        rewired_makespan=makespan(rewired_steps, weights),
+        declared_steps=declared_steps,
+        rewired_steps=rewired_steps,
+        ordering_only=ordering_only,
+        graph=graph,
+    )
+
+
+def executor_timings(summaries: Iterable[dict]) -> dict[str, dict[str, float]]:
+    """Mean executor wall time per run, by workflow ID, from run usage summaries."""
+    totals: dict[str, dict[str, list[float]]] = defaultdict(lambda: defaultdict(list))
+    for summary in summaries:
+        for executor_id, seconds in (summary.get("executor_time_s") or {}).items():
+            totals[summary.get("workflow_id")][executor_id].append(seconds)
+    return {
+        wf_id: {ex: sum(values) / len(values) for ex, values in per_executor.items()}
+        for wf_id, per_executor in totals.items()
+    }
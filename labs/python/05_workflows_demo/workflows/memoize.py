@@ -0,0 +1,209 @@
+# workflows/memoize.py
+"""
+Memoized executor handlers.
+
+Re-running a workflow with the same input redoes every deterministic step.
+A handler decorated with `@memoized(...)` (under `@handler`) is keyed by a
+SHA-256 of:
+
+  - the executor class, executor ID and handler name,
+  - the declared `version` and a digest of the handler's bytecode, so
+    entries go stale when the code changes,
+  - the input message and the shared-state keys the handler reads.
+
+On a miss the handler runs against a recording context; the messages it
+sends, the outputs it yields and the shared state it writes are stored.
+On a hit they are replayed in the same order without running the handler.
+
+    class TitleGeneratorExecutor(Executor):
+        @handler
+        @memoized(version="1", state_keys=("user_query",))
+        async def handle(self, message: ChatMessage, ctx: WorkflowContext[ChatMessage]): ...
+
+Only opt handlers in whose effects are fully described by those three
+kinds of writes. Side effects outside the workflow (files, folders) are
+not replayed; `still_valid` gets the replayed shared-state writes and can
+reject an entry whose side effect is gone.
+
+The store is pluggable (`set_memo_store()`): anything with async
+`get(key)` / `put(key, value, agent=...)`, by default a ResponseCache (memory
+LRU + SQLite) when EXECUTOR_MEMO is on. With no store, handlers run as usual.
+"""
+
+import functools
+import hashlib
+import json
+from typing import Any, Callable
+
+from clients.replay import current_tape
+from clients.response_cache import ResponseCache
+from config import EXECUTOR_MEMO, EXECUTOR_MEMO_MAX_ENTRIES, EXECUTOR_MEMO_PATH
+from logger import get_logger
+from .framework_compat import FrameworkIncompatible, checkpoint_codec
+
+logger = get_logger("maf.memoize")
+
+# Per-message fields that differ between otherwise identical inputs
+_VOLATILE_KEYS = {"message_id", "created_at", "raw_representation", "additional_properties"}
+
+_store: Any = None
+_store_configured = False
+memo_stats = {"hits": 0, "misses": 0, "stale": 0}
+
+
+def set_memo_store(store: Any) -> None:
+    """Use `store` for every memoized handler (None disables memoization)."""
+    global _store, _store_configured
+    _store, _store_configured = store, True
+
+
+def memo_store() -> Any:
+    global _store, _store_configured
+    if not _store_configured:
+        _store_configured = True
+        if EXECUTOR_MEMO and current_tape() is not None:
+            # A replayed handler makes no model calls, so they would be missing from the tape
+            logger.info("Executor memoization off while a record/replay tape is configured")
+        elif EXECUTOR_MEMO and _codec_available():
+            _store = ResponseCache(max_entries=EXECUTOR_MEMO_MAX_ENTRIES, sqlite_path=EXECUTOR_MEMO_PATH or None)
+            logger.info("Executor memoization on (%s)", EXECUTOR_MEMO_PATH or "memory only")
+    return _store
+
+
+def _codec_available() -> bool:
+    try:
+        checkpoint_codec()
+        return True
+    except FrameworkIncompatible as e:
+        logger.warning("Executor memoization off: %s", e)
+        return False
+
+
+def _encode(value: Any) -> Any:
+    return checkpoint_codec()[0](value)
+
+
+def _decode(value: Any) -> Any:
+    return checkpoint_codec()[1](value)
+
+
+# ------------------------------------------------------------
+# Keys
+# ------------------------------------------------------------
+def _strip_volatile(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _strip_volatile(v) for k, v in value.items() if k not in _VOLATILE_KEYS}
+    if isinstance(value, list):
+        return [_strip_volatile(v) for v in value]
+    return value
+
+
+def code_digest(fn: Callable) -> str:
+    """Digest of the function's bytecode and constants (changes when its body does)."""
+    code = fn.__code__
+    payload = code.co_code + repr(code.co_consts).encode() + repr(code.co_names).encode()
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+def memo_key(executor: Any, handler_name: str, version: str, digest: str, message: Any, state: dict[str, Any]) -> str:
+    document = {
+        "executor": f"{type(executor).__module__}:{type(executor).__qualname__}",
+        "executor_id": executor.id,
+        "handler": handler_name,
+        "version": version,
+        "code": digest,
+        "input": _strip_volatile(_encode(message)),
+        "state": _strip_volatile(_encode(state)),
+    }
+    canonical = json.dumps(document, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+# ------------------------------------------------------------
+# Recording / replay
+# ------------------------------------------------------------
+class _RecordingContext:
+    """WorkflowContext proxy that records what the handler emits."""
+
+    def __init__(self, ctx: Any):
+        self._ctx = ctx
+        self.ops: list[tuple] = []
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._ctx, name)
+
+    async def send_message(self, message: Any, target_id: str | None = None) -> None:
+        self.ops.append(("send", message, target_id))
+        await self._ctx.send_message(message, target_id=target_id)
+
+    async def yield_output(self, output: Any) -> None:
+        self.ops.append(("output", output))
+        await self._ctx.yield_output(output)
+
+    async def set_shared_state(self, key: str, value: Any) -> None:
+        self.ops.append(("state", key, value))
+        await self._ctx.set_shared_state(key, value)
+
+
+async def _replay(ctx: Any, ops: list) -> None:
+    for op in ops:
+        if op[0] == "send":
+            await ctx.send_message(op[1], target_id=op[2])
+        elif op[0] == "output":
+            await ctx.yield_output(op[1])
+        elif op[0] == "state":
+            await ctx.set_shared_state(op[1], op[2])
+
+
+async def _read_state(ctx: Any, keys) -> dict[str, Any]:
+    state = {}
+    for key in keys:
+        try:
+            state[key] = await ctx.get_shared_state(key)
+        except KeyError:
+            state[key] = None
+    return state
+
+
+def memoized(
+    version: str,
+    state_keys: tuple[str, ...] = (),
+    still_valid: Callable[[dict[str, Any]], bool] | None = None,
+):
+    """
+    Cache a handler's emitted messages, outputs and shared-state writes by
+    input + `state_keys`. Bump `version` when behaviour changes in ways the
+    bytecode digest cannot see (prompts in other modules, agent config).
+    """
+
+    def decorator(fn: Callable):
+        digest = code_digest(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(self, message: Any, ctx: Any) -> Any:
+            store = memo_store()
+            if store is None:
+                return await fn(self, message, ctx)
+            key = memo_key(self, fn.__name__, version, digest, message, await _read_state(ctx, state_keys))
+            record = await store.get(key)
+            if record is not None:
+                ops = [tuple(op) for op in _decode(record["ops"])]
+                writes = {op[1]: op[2] for op in ops if op[0] == "state"}
+                if still_valid is None or still_valid(writes):
+                    memo_stats["hits"] += 1
+                    logger.info("[%s] memoized result replayed (%d op(s))", self.id, len(ops))
+                    await _replay(ctx, ops)
+                    return None
+                memo_stats["stale"] += 1
+            else:
+                memo_stats["misses"] += 1
+
+            recorder = _RecordingContext(ctx)
+            result = await fn(self, message, recorder)
+            await store.put(key, {"ops": _encode(recorder.ops)}, agent=self.id)
+            return result
+
+        wrapper.memoized_version = version
+        return wrapper
+
+    return decorator
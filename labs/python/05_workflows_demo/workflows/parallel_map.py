@@ -0,0 +1,247 @@
+# workflows/parallel_map.py
+"""
+Dynamic N-way fan-out: map a coroutine (or an executor factory) over a list
+whose size is only known at run time (URLs, files, documents).
+
+WorkflowBuilder fan-out edges are fixed when the graph is built (see wf04),
+so the per-item parallelism happens inside one executor:
+
+  - bounded concurrency (`max_concurrency`),
+  - per-item timeout and retries,
+  - results in input order (`ordered=True`) or in completion order,
+  - a ParallelMapProgressEvent per finished item,
+  - outstanding items are cancelled if the run is cancelled (an item
+    raising RunCancelled included, which is never retried) or, with
+    `on_error="raise"`, as soon as one item fails.
+
+`parallel_map()` is the plain-async core and can be used from any executor.
+wf06 fetches its pages with a ParallelMapExecutor running one executor per
+URL; wf08 calls `parallel_map()` from its collector.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Literal
+
+from agent_framework import (
+    Executor,
+    ExecutorEvent,
+    WorkflowBuilder,
+    WorkflowContext,
+    handler,
+)
+
+from logger import get_logger
+from runners.cancellation import RunCancelled
+
+logger = get_logger("maf.parallel_map")
+
+ItemFn = Callable[[Any], Awaitable[Any]]
+OnError = Literal["skip", "none", "raise"]
+
+
+# ------------------------------------------------------------
+# Results and events
+# ------------------------------------------------------------
+@dataclass
+class ItemOutcome:
+    index: int
+    item: Any
+    result: Any = None
+    error: str | None = None
+    attempts: int = 0
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class MapReport:
+    total: int
+    outcomes: list[ItemOutcome] = field(default_factory=list)
+
+    @property
+    def failed(self) -> list[ItemOutcome]:
+        return [o for o in self.outcomes if not o.ok]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "total": self.total,
+            "succeeded": self.total - len(self.failed),
+            "failed": [{"index": o.index, "item": str(o.item), "error": o.error, "attempts": o.attempts} for o in self.failed],
+        }
+
+
+class ParallelMapProgressEvent(ExecutorEvent):
+    """One item finished. `data` = {index, ok, error, completed, total, result?}."""
+
+
+# ------------------------------------------------------------
+# Core
+# ------------------------------------------------------------
+async def _run_item(
+    fn: ItemFn,
+    index: int,
+    item: Any,
+    timeout: float | None,
+    max_retries: int,
+    retry_backoff: float,
+) -> ItemOutcome:
+    outcome = ItemOutcome(index=index, item=item)
+    loop = asyncio.get_running_loop()
+    t0 = loop.time()
+    for attempt in range(1, max_retries + 2):
+        outcome.attempts = attempt
+        try:
+            outcome.result = await asyncio.wait_for(fn(item), timeout) if timeout else await fn(item)
+            outcome.error = None
+            break
+        except asyncio.TimeoutError:
+            outcome.error = f"timed out after {timeout:g}s"
+        except RunCancelled:
+            # The whole run stops: neither a retry nor a failed item
+            raise
+        except Exception as e:
+            outcome.error = str(e) or type(e).__name__
+        if attempt <= max_retries:
+            logger.info("[ParallelMap] item %d failed (%s), retry %d/%d", index, outcome.error, attempt, max_retries)
+            await asyncio.sleep(retry_backoff * 2 ** (attempt - 1))
+    outcome.seconds = loop.time() - t0
+    return outcome
+
+
+async def parallel_map(
+    items: list[Any],
+    fn: ItemFn,
+    max_concurrency: int = 4,
+    ordered: bool = True,
+    item_timeout: float | None = None,
+    max_retries: int = 0,
+    retry_backoff: float = 1.0,
+    on_error: OnError = "skip",
+    on_progress: Callable[[ItemOutcome, int, int], Awaitable[None]] | None = None,
+) -> tuple[list[Any], MapReport]:
+    """
+    Apply `fn` to every item with at most `max_concurrency` in flight.
+
+    Failed items are dropped (`on_error="skip"`), kept as None
+    (`"none"`, keeps positions aligned with the input) or abort the whole
+    map (`"raise"`, remaining items are cancelled).
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    report = MapReport(total=len(items))
+
+    async def bounded(index: int, item: Any) -> ItemOutcome:
+        async with semaphore:
+            return await _run_item(fn, index, item, item_timeout, max_retries, retry_backoff)
+
+    tasks = [asyncio.create_task(bounded(i, item)) for i, item in enumerate(items)]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            outcome = await finished
+            report.outcomes.append(outcome)
+            if on_progress:
+                await on_progress(outcome, len(report.outcomes), len(items))
+            if not outcome.ok and on_error == "raise":
+                raise RuntimeError(f"item {outcome.index} ({outcome.item!r}) failed: {outcome.error}")
+    finally:
+        # Cancellation of the caller (or fail-fast) must not leave work running
+        pending = [t for t in tasks if not t.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    outcomes = sorted(report.outcomes, key=lambda o: o.index) if ordered else report.outcomes
+    results = [
+        o.result if o.ok else None
+        for o in outcomes
+        if o.ok or on_error == "none"
+    ]
+    return results, report
+
+
+# ------------------------------------------------------------
+# Executor
+# ------------------------------------------------------------
+def executor_as_item_fn(create_executor: Callable[[], Executor]) -> ItemFn:
+    """
+    Adapt an executor factory to `ItemFn`: each item runs through a one-node
+    workflow around its own executor (executors keep per-run state and must
+    not be shared by concurrent workflows), and the executor's yielded
+    output(s) become the item result.
+    """
+    if isinstance(create_executor, Executor):
+        raise TypeError("executor_as_item_fn takes a factory building one Executor per item, not an Executor")
+
+    async def run(item: Any) -> Any:
+        workflow = WorkflowBuilder().set_start_executor(create_executor()).build()
+        outputs = (await workflow.run(item)).get_outputs()
+        return outputs[0] if len(outputs) == 1 else outputs
+
+    return run
+
+
+class ParallelMapExecutor(Executor):
+    """
+    Receives a list, maps `fn` over it and sends the list of results to the
+    next edge. `fn` is a coroutine function, or pass `executor_factory` to
+    run every item through its own executor instance. The MapReport is
+    stored in shared state under `report_key` when given.
+    """
+
+    def __init__(
+        self,
+        fn: ItemFn | None = None,
+        id: str = "parallel_map",
+        max_concurrency: int = 4,
+        ordered: bool = True,
+        item_timeout: float | None = None,
+        max_retries: int = 0,
+        on_error: OnError = "skip",
+        report_key: str | None = None,
+        emit_results_in_progress: bool = False,
+        executor_factory: Callable[[], Executor] | None = None,
+    ):
+        super().__init__(id=id)
+        if (fn is None) == (executor_factory is None):
+            raise ValueError("ParallelMapExecutor needs exactly one of `fn` or `executor_factory`")
+        if isinstance(fn, Executor):
+            raise TypeError("Pass executor_factory=lambda: MyExecutor(...): one executor instance per item")
+        self._fn = executor_as_item_fn(executor_factory) if executor_factory is not None else fn
+        self._max_concurrency = max_concurrency
+        self._ordered = ordered
+        self._item_timeout = item_timeout
+        self._max_retries = max_retries
+        self._on_error = on_error
+        self._report_key = report_key
+        self._emit_results = emit_results_in_progress
+
+    @handler
+    async def handle(self, items: list[Any], ctx: WorkflowContext[list]):
+        logger.info("[%s] mapping %d item(s), concurrency %d", self.id, len(items), self._max_concurrency)
+
+        async def progress(outcome: ItemOutcome, completed: int, total: int):
+            data = {"index": outcome.index, "ok": outcome.ok, "error": outcome.error,
+                    "completed": completed, "total": total}
+            if self._emit_results and outcome.ok:
+                data["result"] = outcome.result
+            await ctx.add_event(ParallelMapProgressEvent(self.id, data))
+
+        results, report = await parallel_map(
+            items,
+            self._fn,
+            max_concurrency=self._max_concurrency,
+            ordered=self._ordered,
+            item_timeout=self._item_timeout,
+            max_retries=self._max_retries,
+            on_error=self._on_error,
+            on_progress=progress,
+        )
+        if report.failed:
+            logger.warning("[%s] %d/%d item(s) failed", self.id, len(report.failed), report.total)
+        if self._report_key:
+            await ctx.set_shared_state(self._report_key, report.to_dict())
+        await ctx.send_message(results)
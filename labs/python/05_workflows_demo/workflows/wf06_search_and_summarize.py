@@ -1,5 +1,6 @@
 # workflows/wf06_search_and_summarize.py
 import json
+from typing_extensions import Never
 from agent_framework import (
     ChatMessage,
     Executor,
@@ -8,7 +9,12 @@ from agent_framework import (
     handler,
 )
 from agents import AgentFactory
+from config import FETCH_MAX_CONCURRENCY, SEARCH_MODE, SEARCH_QUERY_REWRITE
 from logger import get_logger
+from tools.mcp_tools import fetch_webpage
+from tools.web_search import direct_search
+from .chunked_summarizer import ChunkedSummarizerExecutor
+from .parallel_map import ParallelMapExecutor
 
 logger = get_logger("maf.wf06_search_summarize")
 
@@ -27,11 +33,16 @@ class InputToChat(Executor):
 # Search Executor (uses DuckDuckGo MCP)
 # ------------------------------------------------------------
 class SearchExecutor(Executor):
-    """Performs the first research step: topic → list of relevant URLs."""
+    """
+    Performs the first research step: topic → list of relevant URLs.
+    In direct mode (SEARCH_MODE) the search tool is called without SearchAgent.
+    """
 
-    def __init__(self, factory: AgentFactory, id="search_executor"):
+    def __init__(self, factory: AgentFactory, id="search_executor", mode: str = SEARCH_MODE):
         super().__init__(id=id)
-        self.agent = factory.get("SearchAgent")
+        self.direct = mode == "direct"
+        self.agent = None if self.direct else factory.get("SearchAgent")
+        self.rewriter = factory.get("QueryRewriterAgent") if self.direct and SEARCH_QUERY_REWRITE else None
 
     @handler
     async def handle(self, message: ChatMessage, ctx: WorkflowContext[list[str]]):
@@ -39,6 +50,12 @@ class SearchExecutor(Executor):
         query_text = user_query or message.text
         logger.info("[SearchExecutor] Searching for: %s", query_text)
 
+        if self.direct:
+            urls = await direct_search(query_text, limit=10, rewriter=self.rewriter)
+            await ctx.set_shared_state("search_results", urls)
+            await ctx.send_message(urls)
+            return
+
         # Make sure the query uses both context and message
         enriched_prompt = ChatMessage(
             role="user",
@@ -65,74 +82,51 @@ class SearchExecutor(Executor):
         await ctx.send_message(urls)
 
 # ------------------------------------------------------------
-# Fetch Executor (fetches + summarizes content)
+# Fetch stage (one PageFetchExecutor per URL, via ParallelMapExecutor)
 # ------------------------------------------------------------
-class FetchExecutor(Executor):
-    """Fetches content from multiple URLs and emits summarized text."""
-    
-    def __init__(self, factory: AgentFactory, id="fetch_agent"):
+class PageFetchExecutor(Executor):
+    """
+    Fetches and cleans one URL via the MCP fetch tool. Runs as the per-item
+    executor of a ParallelMapExecutor, so a failed fetch fails only its item.
+    """
+
+    def __init__(self, id="page_fetch"):
         super().__init__(id=id)
-        self.agent = factory.get("FetchAgent")
 
     @handler
-    async def handle(self, urls: list[str], ctx: WorkflowContext[ChatMessage]):
-        
-        user_query = await ctx.get_shared_state("user_query")
-        if not urls:
-            logger.warning("[FetchExecutor] No URLs provided.")
-            await ctx.yield_output(ChatMessage(role="assistant", text="No URLs to fetch."))
-            return
+    async def handle(self, url: str, ctx: WorkflowContext[Never, str]):
+        text = await fetch_webpage(url)
+        await ctx.yield_output(f"Source: {url}\n\n{text}" if text else "")
 
-        logger.info("[FetchExecutor] Fetching %d URLs...", len(urls))
-        urls_text = "\n".join(urls)
-        prompt = ChatMessage(
-            role="user",
-            text=(
-                f"You are performing research for the question:\n'{user_query}'.\n"
-                "Fetch and summarize the following web pages. "
-                "Focus on extracting information that helps answer the question. "
-                "Separate each site summary with '---'.\n\n"
-                f"{urls_text}"
-            ),
-        )
 
-        response = await self.agent.run([prompt])
-        fetched_text = (response.text or "").strip()
-        await ctx.set_shared_state("fetched_summary", fetched_text)
-        await ctx.send_message(ChatMessage(role="assistant", text=fetched_text))
+class FetchedPagesExecutor(Executor):
+    """
+    Joins the pages fetched in parallel into `fetched_text`. Summarization is
+    left to the map-reduce summarizer so that no single prompt has to hold
+    every page.
+    """
 
-# ------------------------------------------------------------
-# Summarizer Executor (final synthesis)
-# ------------------------------------------------------------
-class SummarizerExecutor(Executor):
-    def __init__(self, factory: AgentFactory, id="summarizer_agent"):
+    def __init__(self, id="fetched_pages", report_key: str = "fetch_report"):
         super().__init__(id=id)
-        self.agent = factory.get("SummarizerAgent")
+        self._report_key = report_key
 
     @handler
-    async def handle(self, message: ChatMessage, ctx: WorkflowContext[str]):
-        """Synthesizes the final output based on fetched summaries."""
-        try:
-            user_query = await ctx.get_shared_state("user_query")
-            fetched_summary = await ctx.get_shared_state("fetched_summary") or message.text
-
-            combined_prompt = ChatMessage(
-                role="user",
-                text=(
-                    f"You are writing a concise research summary that directly answers this question:\n"
-                    f"'{user_query}'.\n\n"
-                    "Here is the collected material:\n\n"
-                    f"{fetched_summary}\n\n"
-                    "Write a clear, factual answer, focused strictly on the question."
-                ),
-            )
-
-            response = await self.agent.run([combined_prompt])
-            result = (response.text or "").strip()
-            await ctx.yield_output(result)
-        except Exception as e:
-            logger.exception("[SummarizerExecutor] Error during summarization: %s", e)
-            await ctx.yield_output("⚠️ Summarizer failed.")
+    async def handle(self, pages: list, ctx: WorkflowContext[ChatMessage, ChatMessage]):
+        urls = (await ctx.get_shared_state("search_results")) or []
+        if not urls:
+            logger.warning("[FetchedPagesExecutor] No URLs provided.")
+            await ctx.yield_output(ChatMessage(role="assistant", text="No URLs to fetch."))
+            return
+
+        report = await ctx.get_shared_state(self._report_key)
+        for failed in report["failed"]:
+            logger.warning("[FetchedPagesExecutor] Failed to fetch %s: %s", failed["item"], failed["error"])
+        sections = [page for page in pages if page]
+        fetched_text = "\n\n".join(sections)
+        logger.info("[FetchedPagesExecutor] Fetched %d/%d pages (%d chars)", len(sections), len(urls), len(fetched_text))
+
+        await ctx.set_shared_state("fetched_text", fetched_text)
+        await ctx.send_message(ChatMessage(role="assistant", text=fetched_text))
 
 # ------------------------------------------------------------
 # Workflow definition
@@ -140,15 +134,27 @@ class SummarizerExecutor(Executor):
 def build_search_and_summarize_workflow(factory: AgentFactory):
     entry = InputToChat(id="input_to_chat")
     searcher = SearchExecutor(factory=factory)
-    fetcher = FetchExecutor(factory=factory)
-    summarizer = SummarizerExecutor(factory=factory)
+    fetcher = ParallelMapExecutor(
+        id="fetch_agent",
+        executor_factory=PageFetchExecutor,
+        max_concurrency=FETCH_MAX_CONCURRENCY,
+        report_key="fetch_report",
+    )
+    pages = FetchedPagesExecutor(report_key="fetch_report")
+    summarizer = ChunkedSummarizerExecutor(
+        factory=factory,
+        id="summarizer_agent",
+        source_key="fetched_text",
+        query_key="user_query",
+    )
 
     workflow = (
         WorkflowBuilder()
         .set_start_executor(entry)
         .add_edge(entry, searcher)
         .add_edge(searcher, fetcher)
-        .add_edge(fetcher, summarizer)
+        .add_edge(fetcher, pages)
+        .add_edge(pages, summarizer)
         .build()
     )
     workflow.id = "06SearchAndSumm"
@@ -1,4 +1,5 @@
 # workflows/wf07_search_with_hitl.py
+import json
 from dataclasses import dataclass
 from agent_framework import (
     ChatMessage,
@@ -13,7 +14,10 @@ from agent_framework import (
 )
 from agents import AgentFactory
 
+from config import SEARCH_MODE, SEARCH_QUERY_REWRITE
 from logger import get_logger
+from tools.web_search import direct_search
+from .chunked_summarizer import ChunkedSummarizerExecutor
 
 logger = get_logger("maf.wf04")
 
@@ -24,16 +28,24 @@ class InputToChat(Executor):
     @handler
     async def start(self, text: str, ctx: WorkflowContext[ChatMessage]):
         logger.info("[InputToChat] user input: %s", text)
+        await ctx.set_shared_state("user_query", text)
         await ctx.send_message(ChatMessage(role="user", text=text))
 
 
 class SearchExecutor(Executor):
-    def __init__(self, factory: AgentFactory, id="search_agent"):
+    def __init__(self, factory: AgentFactory, id="search_agent", mode: str = SEARCH_MODE):
         super().__init__(id=id)
-        self.agent = factory.get("SearchAgent")
+        self.direct = mode == "direct"
+        self.agent = None if self.direct else factory.get("SearchAgent")
+        self.rewriter = factory.get("QueryRewriterAgent") if self.direct and SEARCH_QUERY_REWRITE else None
 
     @handler
     async def handle(self, message: ChatMessage, ctx: WorkflowContext[ChatMessage]):
+        if self.direct:
+            # Same JSON array of URLs SearchAgent is asked to produce
+            urls = await direct_search(message.text, limit=10, rewriter=self.rewriter)
+            await ctx.send_message(ChatMessage(role="assistant", text=json.dumps(urls)))
+            return
         response = await self.agent.run([message])
         await ctx.send_message(ChatMessage(role="assistant", text=(response.text or "").strip()))
 
@@ -103,31 +115,7 @@ class ApprovalGateway(Executor):
             await ctx.yield_output("Human declined to continue.")
 
 
-# ---------- 3) Summarizer ----------
-
-class SummarizerExecutor(Executor):
-    def __init__(self, factory: AgentFactory, id="summarizer_agent"):
-        super().__init__(id=id)
-        self.agent = factory.get("SummarizerAgent")
-
-    @handler
-    async def handle(self, message: ChatMessage, ctx: WorkflowContext[str]):
-        fetched_text = (await ctx.get_shared_state("fetched_text")) or (message.text or "")
-        fetched_text = fetched_text.strip()
-
-        combined = (
-            f"{message.text}\n\n---\n{fetched_text}"
-            if fetched_text
-            else message.text
-        )
-
-        response = await self.agent.run([ChatMessage(role="user", text=combined)])
-        result = (response.text or "").strip()
-        await ctx.yield_output(result)
-        logger.info("[Summarizer] produced %d chars", len(result))
-
-
-# ---------- 4) Workflow builder ----------
+# ---------- 3) Workflow builder ----------
 
 def build_search_with_hitl_workflow(factory: AgentFactory, checkpoint_storage):
     entry = InputToChat(id="input_to_chat")
@@ -135,7 +123,13 @@ def build_search_with_hitl_workflow(factory: AgentFactory, checkpoint_storage):
     # Agentic executors
     searcher = SearchExecutor(factory=factory)
     fetcher = FetchExecutor(factory=factory)
-    summarizer = SummarizerExecutor(factory=factory)
+    # Map-reduce summarizer: fetched text may not fit a single prompt
+    summarizer = ChunkedSummarizerExecutor(
+        factory=factory,
+        id="summarizer_agent",
+        source_key="fetched_text",
+        query_key="user_query",
+    )
     
     # We could have mutliple approval gateways for different steps
     review = RequestInfoExecutor(id="request_info")
@@ -1,4 +1,20 @@
 # workflows/wf08_search_with_multiagent_and_tooling.py
+"""
+Research pipeline: title → folder, search (concurrently) → collect → synthesize.
+
+The collector fans out per URL (fetch → MarkdownSummarizerAgent → file)
+with bounded concurrency and joins before the folder synthesis.
+
+Search only needs the user query, so it runs in the same superstep as the
+title/folder branch; the collector waits for both (fan-in). Build with
+`concurrent_stages=False` for the original strictly sequential chain.
+"""
+
+import asyncio
+import re
+from pathlib import Path
+from urllib.parse import urlparse
+
 from agent_framework import (
     ChatMessage,
     Executor,
@@ -7,7 +23,13 @@ from agent_framework import (
     handler,
 )
 from agents import AgentFactory
+from config import COLLECT_MAX_CONCURRENCY, COLLECT_MAX_RETRIES, SEARCH_MODE, SEARCH_QUERY_REWRITE, SUMMARY_CHUNK_TOKENS
 from logger import get_logger
+from tools.mcp_tools import fetch_webpage
+from tools.web_search import direct_search, parse_search_results
+from .chunked_summarizer import ChunkedSummarizerExecutor, split_by_token_budget
+from .memoize import memoized
+from .parallel_map import parallel_map
 
 logger = get_logger("maf.wf08_search_multiagent_tooling")
 
@@ -32,6 +54,7 @@ class TitleGeneratorExecutor(Executor):
         self.agent = factory.get("TitleGeneratorAgent")
 
     @handler
+    @memoized(version="1", state_keys=("user_query",))
     async def handle(self, message: ChatMessage, ctx: WorkflowContext[ChatMessage]):
         user_query = await ctx.get_shared_state("user_query")
         response = await self.agent.run([ChatMessage(role="user", text=user_query)])
@@ -50,12 +73,19 @@ class FolderCreatorExecutor(Executor):
         self.agent = factory.get("FolderManagerAgent")
 
     @handler
+    # Replayed only while the folder it created still exists
+    @memoized(
+        version="2",
+        state_keys=("research_title",),
+        still_valid=lambda state: _folder_exists(state.get("folder_path")),
+    )
     async def handle(self, message: ChatMessage, ctx: WorkflowContext[ChatMessage]):
         title = await ctx.get_shared_state("research_title")
         response = await self.agent.run([
             ChatMessage(role="user", text=f"Create a folder for: {title}")
         ])
-        folder_path = response.text.strip()
+        # Absolute, so later steps (and a memoized replay) do not depend on the agent's wording or the CWD
+        folder_path = str(_resolve_folder(response.text, title).resolve())
         await ctx.set_shared_state("folder_path", folder_path)
         logger.info("[FolderCreator] Folder created at: %s", folder_path)
         await ctx.send_message(ChatMessage(role="assistant", text=folder_path))
@@ -65,48 +95,147 @@ class FolderCreatorExecutor(Executor):
 # Search (DuckDuckGo MCP)
 # ------------------------------------------------------------
 class SearchExecutor(Executor):
-    def __init__(self, factory: AgentFactory, id="search_agent"):
+    def __init__(self, factory: AgentFactory, id="search_agent", mode: str = SEARCH_MODE):
         super().__init__(id=id)
-        self.agent = factory.get("SearchAgent")
+        self.direct = mode == "direct"
+        self.agent = None if self.direct else factory.get("SearchAgent")
+        self.rewriter = factory.get("QueryRewriterAgent") if self.direct and SEARCH_QUERY_REWRITE else None
 
     @handler
     async def handle(self, message: ChatMessage, ctx: WorkflowContext[ChatMessage]):
-        title = await ctx.get_shared_state("research_title")
-        response = await self.agent.run([
-            ChatMessage(role="user", text=f"Search for the topic: {title}")
-        ])
-        urls = [u for u in (response.text or "").split() if u.startswith("http")]
+        # The raw query is enough: no need to wait for the generated title
+        user_query = await ctx.get_shared_state("user_query")
+        if self.direct:
+            urls = await direct_search(user_query, limit=10, rewriter=self.rewriter)
+        else:
+            response = await self.agent.run([
+                ChatMessage(role="user", text=f"Search for the topic: {user_query}")
+            ])
+            # SearchAgent answers with a JSON array of URLs, but may fall back to a list or prose
+            urls = list(dict.fromkeys(hit.url for hit in parse_search_results(response.text or "")))
         await ctx.set_shared_state("search_results", urls[:10])
         logger.info("[SearchExecutor] Found %d URLs", len(urls[:10]))
         await ctx.send_message(ChatMessage(role="assistant", text=f"Found {len(urls[:10])} URLs."))
 
 
 # ------------------------------------------------------------
-# Collect, summarize, and save results
+# Collect, summarize, and save results (one short conversation per URL)
 # ------------------------------------------------------------
+def _slug_for(url: str, index: int) -> str:
+    parsed = urlparse(url)
+    tail = parsed.path.rstrip("/").rsplit("/", 1)[-1] or parsed.netloc
+    slug = re.sub(r"[^a-z0-9]+", "_", f"{parsed.netloc}_{tail}".lower()).strip("_")[:60]
+    return f"{index:02d}_{slug or 'page'}.md"
+
+
+def _resolve_folder(agent_text: str | None, title: str | None) -> Path:
+    """Pull the created folder path out of the folder agent's reply."""
+    match = re.search(r"(?:^|[\s'\"`(])(/[^\s'\"`]+|[A-Za-z]:\\[^\s'\"`]+)", agent_text or "")
+    if match:
+        return Path(match.group(1).rstrip(".,;:)"))
+    slug = re.sub(r"[^a-z0-9]+", "_", (title or "research").lower()).strip("_") or "research"
+    return Path("mnt") / "labp05" / slug
+
+
+def _folder_exists(folder_path: str | None) -> bool:
+    return bool(folder_path) and Path(folder_path).is_absolute() and Path(folder_path).is_dir()
+
+
 class CollectorExecutor(Executor):
-    def __init__(self, factory: AgentFactory, id="collector_agent"):
+    """
+    Fetches every URL, summarizes each page with MarkdownSummarizerAgent in
+    its own conversation and writes the Markdown file directly. Pages longer
+    than one chunk are first condensed by the map-reduce summarizer
+    (SummarizerAgent, focused on the user query). URLs are processed
+    concurrently (bounded) with per-URL retries; failures are reported
+    instead of failing the whole collection.
+    """
+
+    def __init__(
+        self,
+        factory: AgentFactory,
+        id="collector_agent",
+        max_concurrency: int = COLLECT_MAX_CONCURRENCY,
+        max_retries: int = COLLECT_MAX_RETRIES,
+    ):
         super().__init__(id=id)
-        self.agent = factory.get("CollectorAgent")
+        self.agent = factory.get("MarkdownSummarizerAgent")
+        # Not a graph node: only its map → reduce steps are used, per page
+        self._condenser = ChunkedSummarizerExecutor(
+            factory, id=f"{id}_pages", agent_name="SummarizerAgent", query_key=None, yield_output=False
+        )
+        self._max_concurrency = max(1, max_concurrency)
+        self._max_retries = max(0, max_retries)
 
     @handler
     async def handle(self, message: ChatMessage, ctx: WorkflowContext[ChatMessage]):
-        urls = await ctx.get_shared_state("search_results") or []
-        folder = await ctx.get_shared_state("folder_path")
+        await self._collect(ctx)
+
+    @handler
+    async def handle_joined(self, messages: list[ChatMessage], ctx: WorkflowContext[ChatMessage]):
+        # Fan-in: folder branch and search branch have both finished
+        await self._collect(ctx)
+
+    async def _collect(self, ctx: WorkflowContext[ChatMessage]):
+        # One file per distinct URL, even when the search repeats one
+        urls = list(dict.fromkeys(await ctx.get_shared_state("search_results") or []))
         if not urls:
             logger.warning("[Collector] No URLs found, skipping.")
             return
+        folder = _resolve_folder(
+            await ctx.get_shared_state("folder_path"),
+            await ctx.get_shared_state("research_title"),
+        )
+        await asyncio.to_thread(folder.mkdir, parents=True, exist_ok=True)
 
-        prompt = (
-            f"Store Markdown summaries for these URLs into folder:\n{folder}\n\n"
-            f"URLs:\n" + "\n".join(urls) +
-            "\nEach summary must include a # TL;DR section."
+        logger.info("[Collector] Collecting %d URLs into %s (concurrency %d)", len(urls), folder, self._max_concurrency)
+        paths = {url: folder / _slug_for(url, i + 1) for i, url in enumerate(urls)}
+        query = await ctx.get_shared_state("user_query")
+        # Fan-in: every URL finishes (or fails) before the synthesis step starts
+        written, report = await parallel_map(
+            urls,
+            lambda url: self._process(url, paths[url], query),
+            max_concurrency=self._max_concurrency,
+            max_retries=self._max_retries,
         )
-        response = await self.agent.run([ChatMessage(role="user", text=prompt)])
-        summary_index = (response.text or "").strip()
-        await ctx.set_shared_state("summary_index", summary_index)
-        logger.info("[Collector] Finished processing all URLs.")
-        await ctx.send_message(ChatMessage(role="assistant", text="All pages processed and saved."))
+
+        await ctx.set_shared_state("folder_path", str(folder))
+        await ctx.set_shared_state("summary_index", "\n".join(written))
+        await ctx.set_shared_state("collection_report", {"folder": str(folder), "written": written, **report.to_dict()})
+        for o in report.failed:
+            logger.warning("[Collector] Gave up on %s after %d attempt(s): %s", o.item, o.attempts, o.error)
+        logger.info("[Collector] Saved %d/%d pages.", len(written), len(urls))
+        await ctx.send_message(ChatMessage(
+            role="assistant",
+            text=f"Saved {len(written)}/{len(urls)} pages to {folder}."
+            + (f" Failed: {', '.join(o.item for o in report.failed)}" if report.failed else ""),
+        ))
+
+    async def _process(self, url: str, path: Path, query: str) -> str:
+        markdown = await self._summarize(url, await fetch_webpage(url), query)
+        await asyncio.to_thread(path.write_text, markdown, encoding="utf-8")
+        logger.info("[Collector] %s → %s", url, path.name)
+        return str(path)
+
+    async def _summarize(self, url: str, page: str, query: str) -> str:
+        if not page or not page.strip():
+            raise ValueError("empty page")
+        # The Markdown summary is one short conversation: condense longer pages to a chunk first
+        chunks = split_by_token_budget(page, SUMMARY_CHUNK_TOKENS)
+        if len(chunks) == 1:
+            excerpt = chunks[0]
+        else:
+            logger.info("[Collector] %s: %d chunks, condensing before the Markdown summary", url, len(chunks))
+            excerpt = "\n\n---\n\n".join(await self._condenser.condense(chunks, query))
+        response = await self.agent.run([ChatMessage(role="user", text=f"URL: {url}\n\n{excerpt}")])
+        markdown = (response.text or "").strip()
+        if not markdown:
+            raise ValueError("empty summary")
+        if "# TL;DR" not in markdown:
+            markdown = f"# TL;DR\n\n{markdown}"
+        if not markdown.startswith(url):
+            markdown = f"{url}\n\n{markdown}"
+        return markdown + "\n"
 
 
 # ------------------------------------------------------------
@@ -134,7 +263,11 @@ class FolderSummarizerExecutor(Executor):
 # ------------------------------------------------------------
 # Workflow definition
 # ------------------------------------------------------------
-def build_search_with_multiagent_and_tooling_workflow(factory: AgentFactory, checkpoint_storage):
+def build_search_with_multiagent_and_tooling_workflow(
+    factory: AgentFactory,
+    checkpoint_storage,
+    concurrent_stages: bool = True,
+):
     entry = InputToChat(id="input_to_chat")
     title = TitleGeneratorExecutor(factory=factory)
     folder = FolderCreatorExecutor(factory=factory)
@@ -142,16 +275,23 @@ def build_search_with_multiagent_and_tooling_workflow(factory: AgentFactory, che
     collector = CollectorExecutor(factory=factory)
     summarizer = FolderSummarizerExecutor(factory=factory)
 
-    builder = (
-        WorkflowBuilder()
-        .set_start_executor(entry)
-        .add_edge(entry, title)
-        .add_edge(title, folder)
-        .add_edge(folder, searcher)
-        .add_edge(searcher, collector)
-        .add_edge(collector, summarizer)
-        .with_checkpointing(checkpoint_storage)
-    )
+    builder = WorkflowBuilder().set_start_executor(entry)
+    if concurrent_stages:
+        builder = (
+            builder
+            .add_fan_out_edges(entry, [title, searcher])
+            .add_edge(title, folder)
+            .add_fan_in_edges([folder, searcher], collector)
+        )
+    else:
+        builder = (
+            builder
+            .add_edge(entry, title)
+            .add_edge(title, folder)
+            .add_edge(folder, searcher)
+            .add_edge(searcher, collector)
+        )
+    builder = builder.add_edge(collector, summarizer).with_checkpointing(checkpoint_storage)
 
     wf = builder.build()
     wf.id = "08MagSearchTools"
@@ -1,11 +1,15 @@
 # workflows/workflow_factory.py
-from typing import Dict
+from typing import Callable, Dict
 
 from agent_framework import Workflow
 from agents import AgentFactory
 
+from config import EXECUTOR_DEADLINES, USAGE_TRACKING, WORKFLOW_POOL_MAX_IDLE
 from logger import get_logger
+from metrics import instrument_executors
 from persistence.checkpoint_storage_factory import CheckpointStorageFactory
+from persistence.usage_store import track_run_usage
+from runners.scheduler import build_run_scheduler
 
 # Import builders
 from .wf01_basic_sequence import build_basic_sequence_workflow
@@ -16,6 +20,10 @@ from .wf05_loop_with_evaluation import build_loop_with_evaluation_workflow
 from .wf06_search_and_summarize import build_search_and_summarize_workflow
 from .wf07_search_with_hitl import build_search_with_hitl_workflow
 from .wf08_search_with_multiagent_and_tooling import build_search_with_multiagent_and_tooling_workflow
+from .checkpoint_policy import CheckpointPolicy, apply_checkpoint_policy, build_checkpoint_policies
+from .deadlines import apply_executor_deadlines, parse_deadlines
+from .framework_compat import bind_checkpoints
+from .workflow_pool import PooledWorkflow, WorkflowPool
 
 logger = get_logger("maf.workflow_factory")
 
@@ -23,53 +31,136 @@ logger = get_logger("maf.workflow_factory")
 class WorkflowFactory:
     """
     Central registry and factory for all Workflows.
-    Each workflow is registered using its own `workflow.id` value
-    (as defined inside the builder).
+    Each workflow is registered under its `workflow.id` value
+    (the same ID the builder assigns).
+
+    Workflows are built lazily on first `get()`, so only the agents a workflow
+    actually uses get constructed. `all()` builds everything (DevUI mode).
+    `create()` always builds a new instance, for runs that must not share
+    executor state. `pooled()` wraps the workflow in a PooledWorkflow that
+    runs each call on its own instance (concurrent DevUI users, batch mode),
+    admitted by the shared RunScheduler when RUN_SCHEDULER is on.
+
+    Every instance of a checkpointing workflow saves according to its
+    CheckpointPolicy: CHECKPOINT_POLICY, overridden per workflow by
+    CHECKPOINT_POLICY_PER_WORKFLOW or `set_checkpoint_policy()`, and its
+    executors are bounded by EXECUTOR_DEADLINES.
     """
 
     def __init__(self, agent_factory: AgentFactory, checkpoint_storage: CheckpointStorageFactory):
         self._agent_factory = agent_factory
         self._checkpoint_storage = checkpoint_storage
+        self._builders: Dict[str, Callable[[], Workflow]] = {}
         self._registry: Dict[str, Workflow] = {}
+        self._pools: Dict[str, WorkflowPool] = {}
+        self._pooled: Dict[tuple[str, str], PooledWorkflow] = {}
+        self.scheduler = build_run_scheduler()
+        self._default_policy, self._policies = build_checkpoint_policies()
+        self._deadlines = parse_deadlines(EXECUTOR_DEADLINES)
+        if USAGE_TRACKING:
+            # Lets usage records name the executor that made each agent call
+            instrument_executors()
 
     # -------------------------------------------------------
     # Initialization
     # -------------------------------------------------------
     def init_defaults(self):
         """
-        Instantiate all default workflows and register them by their internal ID.
+        Register all default workflow builders by their workflow ID.
         """
-        builder_fns = [
-            lambda: build_basic_sequence_workflow(),
-            lambda: build_sequential_executors_workflow(self._agent_factory),
-            lambda: build_conditional_branching_workflow(),
-            lambda: build_parallel_fanout_workflow(),
-            lambda: build_loop_with_evaluation_workflow(),
-            lambda: build_search_and_summarize_workflow(self._agent_factory),
-            lambda: build_search_with_hitl_workflow(self._agent_factory, self._checkpoint_storage),
-            lambda: build_search_with_multiagent_and_tooling_workflow(self._agent_factory, self._checkpoint_storage),
-        ]
-
-        for build_fn in builder_fns:
-            try:
-                wf = build_fn()
-                wf_id = getattr(wf, "id", None)
-                if not wf_id:
-                    raise ValueError("Workflow builder did not set `workflow.id`")
-                self._registry[wf_id] = wf
-                logger.info(f"✅ Registered workflow: {wf_id}")
-            except Exception as e:
-                logger.error(f"❌ Failed to build workflow: {e}")
+        builder_fns = {
+            "01BSequence": lambda: build_basic_sequence_workflow(),
+            "02AgSequence": lambda: build_sequential_executors_workflow(self._agent_factory),
+            "03CondBranch": lambda: build_conditional_branching_workflow(),
+            "04ParFanOut": lambda: build_parallel_fanout_workflow(),
+            "05LoopEval": lambda: build_loop_with_evaluation_workflow(),
+            "06SearchAndSumm": lambda: build_search_and_summarize_workflow(self._agent_factory),
+            "07SearchHITL": lambda: build_search_with_hitl_workflow(self._agent_factory, self._checkpoint_storage),
+            "08MagSearchTools": lambda: build_search_with_multiagent_and_tooling_workflow(self._agent_factory, self._checkpoint_storage),
+        }
+        for wf_id, build_fn in builder_fns.items():
+            self.register(wf_id, build_fn)
+        return self
 
+    def register(self, wf_id: str, build_fn: Callable[[], Workflow]):
+        self._builders[wf_id] = build_fn
+        self._forget(wf_id)
         return self
 
+    def set_checkpoint_policy(self, wf_id: str, policy: CheckpointPolicy | str):
+        """Checkpoint policy for instances of `wf_id` built from now on."""
+        self._policies[wf_id] = CheckpointPolicy.parse(policy) if isinstance(policy, str) else policy
+        self._forget(wf_id)
+        return self
+
+    def checkpoint_policy(self, wf_id: str) -> CheckpointPolicy:
+        return self._policies.get(wf_id, self._default_policy)
+
+    def _forget(self, wf_id: str) -> None:
+        """Drop built and pooled instances so the next access rebuilds them."""
+        self._registry.pop(wf_id, None)
+        self._pools.pop(wf_id, None)
+        for key in [key for key in self._pooled if key[0] == wf_id]:
+            del self._pooled[key]
+
+    def _build(self, wf_id: str, announce: bool = True) -> Workflow:
+        wf = self._builders[wf_id]()
+        built_id = getattr(wf, "id", None)
+        if built_id != wf_id:
+            raise ValueError(f"Workflow builder for '{wf_id}' set `workflow.id` to '{built_id}'")
+        # Checkpoints are filed under the registered ID (not a per-instance UUID), so
+        # `console.py --resume latest` finds them; worker runs rebind to their job ID
+        bind_checkpoints(wf, wf_id)
+        apply_checkpoint_policy(wf, self.checkpoint_policy(wf_id), stats_key=wf_id)
+        apply_executor_deadlines(wf, self._deadlines)
+        if USAGE_TRACKING:
+            # DevUI runs open no usage run themselves: each streamed run gets its own
+            track_run_usage(wf, wf_id, self._checkpoint_storage)
+        if announce:
+            logger.info(f"✅ Registered workflow: {wf_id}")
+        return wf
+
     # -------------------------------------------------------
     # Access methods
     # -------------------------------------------------------
     def get(self, wf_id: str) -> Workflow:
+        if wf_id not in self._builders:
+            raise KeyError(f"Workflow '{wf_id}' not found. Available: {list(self._builders)}")
         if wf_id not in self._registry:
-            raise KeyError(f"Workflow '{wf_id}' not found. Available: {list(self._registry)}")
+            self._registry[wf_id] = self._build(wf_id)
         return self._registry[wf_id]
 
-    def all(self):
+    def create(self, wf_id: str) -> Workflow:
+        """Build a fresh, unshared instance of the workflow (not cached)."""
+        if wf_id not in self._builders:
+            raise KeyError(f"Workflow '{wf_id}' not found. Available: {list(self._builders)}")
+        return self._build(wf_id, announce=False)
+
+    def pooled(self, wf_id: str, max_idle: int = WORKFLOW_POOL_MAX_IDLE, priority: str = "interactive") -> PooledWorkflow:
+        """
+        Workflow stand-in whose runs each get their own (pooled) instance.
+        Stand-ins of different priority classes share the workflow's pool.
+        """
+        if (wf_id, priority) not in self._pooled:
+            template = self.get(wf_id)
+            if wf_id not in self._pools:
+                self._pools[wf_id] = WorkflowPool(wf_id, lambda: self.create(wf_id), max_idle=max_idle)
+            self._pooled[(wf_id, priority)] = PooledWorkflow(
+                self._pools[wf_id], template, self.scheduler, priority, checkpoint_storage=self._checkpoint_storage
+            )
+        return self._pooled[(wf_id, priority)]
+
+    def all(self, pooled: bool = False):
+        for wf_id in self._builders:
+            if wf_id in self._registry:
+                continue
+            try:
+                self._registry[wf_id] = self._build(wf_id)
+            except Exception as e:
+                logger.error(f"❌ Failed to build workflow {wf_id}: {e}")
+        if pooled:
+            return [self.pooled(wf_id) for wf_id in self._registry]
         return list(self._registry.values())
+
+    def ids(self) -> list[str]:
+        return list(self._builders)
@@ -0,0 +1,270 @@
+# workflows/workflow_pool.py
+"""
+Pooled workflow instances for concurrent runs of the same workflow.
+
+A Workflow object refuses concurrent runs, and its executors keep
+per-instance state, so a single registered instance serializes (or mixes
+up) parallel DevUI users. PooledWorkflow looks like that single workflow
+(same id, name, executors, start executor: everything DevUI inspects is
+delegated to a template instance) but runs every call on an instance
+taken from a WorkflowPool:
+
+  - idle instances are reused, new ones are built from the cached builder
+    when all are busy; at most `max_idle` are kept around,
+  - a run that stops with pending HITL requests keeps its instance parked
+    until `send_responses_streaming()` answers them, `discard_pending()`
+    gives up on them, or it is evicted: parked instances expire after
+    WORKFLOW_POOL_PARK_TTL_SECONDS and at most WORKFLOW_POOL_MAX_PARKED
+    are kept (the oldest goes first),
+  - an instance whose run raised is discarded, not reused.
+
+With a RunScheduler (runners/scheduler.py) every run, and every resumption
+with HITL answers, first waits for a slot in its priority class.
+
+Every run is cancellable (runners/cancellation.py): it uses the caller's
+CancelToken, or its own one bounded by RUN_DEADLINE_SECONDS, and stops its
+instance's executors when the token fires or the consumer goes away.
+
+A run started without a usage run of its caller (DevUI) gets its own one,
+queue time included, saved next to its checkpoints when it ends.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterable, AsyncIterator, Callable
+
+from agent_framework import (
+    RequestInfoEvent,
+    Workflow,
+    WorkflowEvent,
+    WorkflowRunResult,
+    WorkflowStartedEvent,
+    WorkflowStatusEvent,
+)
+
+from config import RUN_DEADLINE_SECONDS, USAGE_TRACKING, WORKFLOW_POOL_MAX_PARKED, WORKFLOW_POOL_PARK_TTL_SECONDS
+from logger import get_logger
+from metrics import usage_tracker
+from persistence.usage_store import tracked_run_stream
+from runners.cancellation import CancelToken, cancellable_stream, current_cancel_token
+from runners.scheduler import RunScheduler
+
+logger = get_logger("maf.workflow_pool")
+
+
+class WorkflowPool:
+    def __init__(
+        self,
+        wf_id: str,
+        create: Callable[[], Workflow],
+        max_idle: int = 4,
+        max_parked: int = WORKFLOW_POOL_MAX_PARKED,
+        park_ttl_s: float = WORKFLOW_POOL_PARK_TTL_SECONDS,
+    ):
+        self.wf_id = wf_id
+        self._create = create
+        self._max_idle = max(0, max_idle)
+        self._max_parked = max(0, max_parked)
+        self._park_ttl_s = park_ttl_s
+        self._idle: list[Workflow] = []
+        # request_id → instance waiting for that HITL response
+        self._parked: dict[str, Workflow] = {}
+        # id(instance) → (its pending request IDs, parked at), oldest first
+        self._waiting: dict[int, tuple[set[str], float]] = {}
+        self._lock = asyncio.Lock()
+        self.created = 0
+        self.in_use = 0
+        self.evicted = 0
+
+    async def acquire(self) -> Workflow:
+        async with self._lock:
+            self.in_use += 1
+            if self._idle:
+                return self._idle.pop()
+            self.created += 1
+        logger.debug("[%s] building pooled instance #%d", self.wf_id, self.created)
+        return self._create()
+
+    async def claim_parked(self, request_ids) -> tuple[Workflow, set[str]]:
+        """Take the instance waiting for (one of) these request IDs, with all its pending IDs."""
+        async with self._lock:
+            for request_id in request_ids:
+                wf = self._parked.get(request_id)
+                if wf is None:
+                    continue
+                waiting = self._unpark(wf)
+                self.in_use += 1
+                return wf, waiting
+        raise KeyError(f"No '{self.wf_id}' run is waiting for requests {list(request_ids)}")
+
+    async def discard_parked(self, request_ids) -> bool:
+        """Drop the instance waiting for (one of) these request IDs; nobody will answer them."""
+        async with self._lock:
+            for request_id in request_ids:
+                wf = self._parked.get(request_id)
+                if wf is not None:
+                    self._unpark(wf)
+                    return True
+        return False
+
+    async def release(self, wf: Workflow, pending: set[str], failed: bool = False) -> None:
+        async with self._lock:
+            self.in_use -= 1
+            if failed:
+                return
+            if pending:
+                self._evict_parked()
+                self._waiting[id(wf)] = (set(pending), time.monotonic())
+                for request_id in pending:
+                    self._parked[request_id] = wf
+            elif len(self._idle) < self._max_idle:
+                self._idle.append(wf)
+
+    def _unpark(self, wf: Workflow) -> set[str]:
+        waiting, _ = self._waiting.pop(id(wf), (set(), 0.0))
+        for request_id in waiting:
+            self._parked.pop(request_id, None)
+        return waiting
+
+    def _evict_parked(self) -> None:
+        """Make room for one more parked instance: expired ones first, then the oldest."""
+        now = time.monotonic()
+        for waiting, parked_at in list(self._waiting.values()):
+            expired = bool(self._park_ttl_s) and now - parked_at > self._park_ttl_s
+            full = bool(self._max_parked) and len(self._waiting) >= self._max_parked
+            if not (expired or full):
+                break
+            wf = self._parked[next(iter(waiting))]
+            self._unpark(wf)
+            self.evicted += 1
+            logger.warning(
+                "[%s] dropped a run waiting for input since %.0fs (%s)",
+                self.wf_id, now - parked_at, "expired" if expired else "too many parked runs",
+            )
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "created": self.created,
+            "in_use": self.in_use,
+            "idle": len(self._idle),
+            "waiting_for_input": len(self._waiting),
+            "evicted": self.evicted,
+        }
+
+
+class PooledWorkflow:
+    """Drop-in stand-in for a Workflow that runs each call on a pooled instance."""
+
+    def __init__(
+        self,
+        pool: WorkflowPool,
+        template: Workflow,
+        scheduler: RunScheduler | None = None,
+        priority: str = "interactive",
+        checkpoint_storage=None,
+    ):
+        self._pool = pool
+        self._template = template
+        self._scheduler = scheduler
+        self._priority = priority
+        self._checkpoint_storage = checkpoint_storage
+
+    def __getattr__(self, name: str) -> Any:
+        # Running on the template would bypass the pool and the scheduler
+        if name.startswith(("run", "send_responses")):
+            raise AttributeError(f"PooledWorkflow does not support '{name}'")
+        # Metadata (id, name, executors, get_start_executor, to_json...) comes from the template
+        return getattr(self._template, name)
+
+    @property
+    def pool(self) -> WorkflowPool:
+        return self._pool
+
+    # -------------------------------------------------------
+    # Runs
+    # -------------------------------------------------------
+    def run_stream(self, message: Any, **kwargs: Any) -> AsyncIterable[WorkflowEvent]:
+        return self._tracked(self._run_stream(message, **kwargs))
+
+    def run_stream_from_checkpoint(self, checkpoint_id: str, **kwargs: Any) -> AsyncIterable[WorkflowEvent]:
+        return self._tracked(self._run_stream_from_checkpoint(checkpoint_id, **kwargs), resumed_from=checkpoint_id)
+
+    def send_responses_streaming(self, responses: dict[str, Any]) -> AsyncIterable[WorkflowEvent]:
+        return self._tracked(self._send_responses_streaming(responses))
+
+    async def _run_stream(self, message: Any, **kwargs: Any) -> AsyncIterable[WorkflowEvent]:
+        async with self._slot(self._priority):
+            wf = await self._pool.acquire()
+            async for event in self._drive(wf, wf.run_stream(message, **kwargs), set()):
+                yield event
+
+    async def _run_stream_from_checkpoint(self, checkpoint_id: str, **kwargs: Any) -> AsyncIterable[WorkflowEvent]:
+        async with self._slot(self._priority):
+            wf = await self._pool.acquire()
+            async for event in self._drive(wf, wf.run_stream_from_checkpoint(checkpoint_id, **kwargs), set()):
+                yield event
+
+    async def _send_responses_streaming(self, responses: dict[str, Any]) -> AsyncIterable[WorkflowEvent]:
+        # A human is waiting on this run: it goes ahead of new runs
+        async with self._slot("hitl"):
+            wf, waiting = await self._pool.claim_parked(responses)
+            still_pending = waiting - set(responses)
+            async for event in self._drive(wf, wf.send_responses_streaming(responses), still_pending):
+                yield event
+
+    def _tracked(self, stream, resumed_from: str | None = None) -> AsyncIterable[WorkflowEvent]:
+        if not USAGE_TRACKING:
+            return stream
+        # Opened before the scheduler slot, so the run's queue time is counted
+        return tracked_run_stream(self._checkpoint_storage, self._pool.wf_id, stream, resumed_from=resumed_from)
+
+    async def discard_pending(self, request_ids) -> bool:
+        """Give up on a run waiting for these HITL requests and free its instance."""
+        return await self._pool.discard_parked(request_ids)
+
+    async def run(self, message: Any, *, include_status_events: bool = False) -> WorkflowRunResult:
+        return await self._collect(self.run_stream(message), include_status_events)
+
+    async def run_from_checkpoint(self, checkpoint_id: str, **kwargs: Any) -> WorkflowRunResult:
+        return await self._collect(self.run_stream_from_checkpoint(checkpoint_id, **kwargs))
+
+    async def send_responses(self, responses: dict[str, Any]) -> WorkflowRunResult:
+        return await self._collect(self.send_responses_streaming(responses))
+
+    @staticmethod
+    async def _collect(stream, include_status_events: bool = False) -> WorkflowRunResult:
+        # Same filtering as Workflow.run()
+        events, status_events = [], []
+        async for event in stream:
+            if isinstance(event, WorkflowStartedEvent):
+                continue
+            if isinstance(event, WorkflowStatusEvent):
+                status_events.append(event)
+                if not include_status_events:
+                    continue
+            events.append(event)
+        return WorkflowRunResult(events, status_events)
+
+    @asynccontextmanager
+    async def _slot(self, priority: str) -> AsyncIterator[None]:
+        if self._scheduler is None:
+            yield
+            return
+        async with self._scheduler.slot(self._pool.wf_id, priority) as ticket:
+            run = usage_tracker.current_run()
+            if run is not None:
+                run.queue_time_s += ticket.queued_s
+            yield
+
+    async def _drive(self, wf: Workflow, stream, pending: set[str]) -> AsyncIterable[WorkflowEvent]:
+        failed = True
+        token = current_cancel_token() or CancelToken(self._pool.wf_id, deadline_s=RUN_DEADLINE_SECONDS or None)
+        try:
+            async for event in cancellable_stream(wf, stream, token):
+                if isinstance(event, RequestInfoEvent):
+                    pending.add(event.request_id)
+                yield event
+            failed = False
+        finally:
+            await self._pool.release(wf, pending, failed=failed)